@@ -0,0 +1,113 @@
+import asyncio
+import time
+from typing import Optional
+
+from backend.config import (
+    CHAT_MAX_CONCURRENCY,
+    CHAT_MAX_QUEUE,
+    CHAT_QUEUE_TIMEOUT,
+    logger,
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a generation cannot be admitted; maps to HTTP 429."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A granted generation slot, released once however often it is released."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release()
+
+    async def __aenter__(self) -> "AdmissionTicket":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """Per-process limit on concurrent LLM generations.
+
+    Up to `max_concurrent` generations run at once and up to `max_queue`
+    more wait for a slot. A request arriving with the queue full, or
+    waiting longer than `queue_timeout`, is rejected right away instead of
+    piling latency onto every other request.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = CHAT_MAX_CONCURRENCY,
+        max_queue: int = CHAT_MAX_QUEUE,
+        queue_timeout: float = CHAT_QUEUE_TIMEOUT,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected += 1
+        logger.warning(f"Rejected chat generation: {reason}")
+        return AdmissionRejected(reason, retry_after=self.queue_timeout)
+
+    async def acquire(self) -> AdmissionTicket:
+        """Wait for a generation slot, raising AdmissionRejected if overloaded."""
+        semaphore = self._get_semaphore()
+        if semaphore.locked() and self.waiting >= self.max_queue:
+            raise self._reject(f"{self.waiting} generations already queued")
+
+        start_time = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject(f"no slot freed within {self.queue_timeout}s")
+        finally:
+            self.waiting -= 1
+
+        self.wait_seconds += time.perf_counter() - start_time
+        self.active += 1
+        self.admitted += 1
+        return AdmissionTicket(self)
+
+    def _release(self) -> None:
+        self.active -= 1
+        self._get_semaphore().release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait_seconds": self.wait_seconds / self.admitted
+            if self.admitted
+            else 0.0,
+        }
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional, Tuple
+
+from backend.config import (
+    ARTIFACT_BACKEND,
+    ARTIFACT_DIR,
+    ARTIFACT_S3_BUCKET,
+    ARTIFACT_S3_ENDPOINT,
+    logger,
+)
+
+ARTIFACT_ID_PATTERN = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+
+
+def artifact_id(data: bytes, extension: str) -> str:
+    """Content address of an artifact: its SHA-256 plus the file extension."""
+    return f"{hashlib.sha256(data).hexdigest()}.{extension.lstrip('.')}"
+
+
+def is_artifact_id(value: str) -> bool:
+    return bool(ARTIFACT_ID_PATTERN.match(value))
+
+
+class LocalArtifactBackend:
+    """Artifacts stored as files under a root directory, sharded by hash prefix."""
+
+    def __init__(self, root: str = ARTIFACT_DIR):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial artifact
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(key))
+        except FileNotFoundError:
+            return None
+
+    def read(self, key: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Read bytes start..end (inclusive) of an artifact."""
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            return f.read() if end is None else f.read(end - start + 1)
+
+
+class S3ArtifactBackend:
+    """Artifacts stored in an S3-compatible bucket (AWS S3, MinIO, ...)."""
+
+    def __init__(
+        self, bucket: str = ARTIFACT_S3_BUCKET, endpoint_url: str = ARTIFACT_S3_ENDPOINT
+    ):
+        try:
+            import boto3
+        except ImportError:
+            raise ImportError("boto3 is required for the s3 artifact backend")
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+
+    def _head(self, key: str) -> Optional[dict]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def put(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def size(self, key: str) -> Optional[int]:
+        head = self._head(key)
+        return head["ContentLength"] if head else None
+
+    def read(self, key: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = self.client.get_object(Bucket=self.bucket, Key=key, Range=byte_range)
+        return response["Body"].read()
+
+
+class ArtifactStore:
+    """Content-addressed store for tables, crops and renders made at ingestion.
+
+    Identical content maps to the same id, so it is written only once.
+    Backend calls block, so they run in threads.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.writes = 0
+        self.deduplicated = 0
+
+    async def put(self, data: bytes, extension: str) -> str:
+        key = artifact_id(data, extension)
+        if await asyncio.to_thread(self.backend.exists, key):
+            self.deduplicated += 1
+            return key
+
+        await asyncio.to_thread(self.backend.put, key, data)
+        self.writes += 1
+        return key
+
+    async def size(self, key: str) -> Optional[int]:
+        return await asyncio.to_thread(self.backend.size, key)
+
+    async def read(self, key: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        return await asyncio.to_thread(self.backend.read, key, start, end)
+
+    def stats(self) -> dict:
+        return {"writes": self.writes, "deduplicated": self.deduplicated}
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range "bytes=" header into inclusive offsets.
+
+    Returns None when the header is not a satisfiable single range.
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    start, end = match.groups()
+    if start == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def create_artifact_store() -> ArtifactStore:
+    if ARTIFACT_BACKEND == "s3":
+        backend = S3ArtifactBackend()
+    else:
+        backend = LocalArtifactBackend()
+    logger.info(f"Using {ARTIFACT_BACKEND} artifact store")
+    return ArtifactStore(backend)
+
+
+artifact_store = create_artifact_store()
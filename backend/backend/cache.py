@@ -0,0 +1,340 @@
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.config import CACHE_DIR, CACHE_TTL, logger
+from backend.database import redis_client
+
+_caches: Dict[str, "ContentCache"] = {}
+
+
+def content_key(*parts: str) -> str:
+    """Build a stable cache key from its parts."""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class RedisCacheBackend:
+    """Redis backend with per-entry idle TTL and LRU eviction above max_entries.
+
+    Recency is tracked in a sorted set scored by last access time. Reads
+    renew an entry's TTL, so members scored more than `ttl` ago are exactly
+    the expired entries and are pruned before counting for eviction.
+    """
+
+    def __init__(self, client, prefix: str, ttl: int, max_entries: int):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lru_key = f"{prefix}:lru"
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.client.get(self._key(key))
+        if value is None:
+            return None
+        pipe = self.client.pipeline()
+        pipe.expire(self._key(key), self.ttl)
+        pipe.zadd(self._lru_key, {key: time.time()})
+        await pipe.execute()
+        return json.loads(value)
+
+    async def set(self, key: str, value: Any) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self._key(key), json.dumps(value), ex=self.ttl)
+        pipe.zadd(self._lru_key, {key: time.time()})
+        await pipe.execute()
+        await self._evict()
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        values = await self.client.mget([self._key(key) for key in keys])
+        now = time.time()
+        hits = {key: now for key, value in zip(keys, values) if value is not None}
+        if hits:
+            pipe = self.client.pipeline()
+            for key in hits:
+                pipe.expire(self._key(key), self.ttl)
+            pipe.zadd(self._lru_key, hits)
+            await pipe.execute()
+        return [json.loads(value) if value is not None else None for value in values]
+
+    async def set_many(self, items: Dict[str, Any]) -> None:
+        now = time.time()
+        pipe = self.client.pipeline()
+        for key, value in items.items():
+            pipe.set(self._key(key), json.dumps(value), ex=self.ttl)
+        pipe.zadd(self._lru_key, {key: now for key in items})
+        await pipe.execute()
+        await self._evict()
+
+    async def delete(self, key: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.delete(self._key(key))
+        pipe.zrem(self._lru_key, key)
+        await pipe.execute()
+
+    async def _evict(self) -> None:
+        await self.client.zremrangebyscore(self._lru_key, 0, time.time() - self.ttl)
+        excess = await self.client.zcard(self._lru_key) - self.max_entries
+        if excess > 0:
+            evicted = await self.client.zpopmin(self._lru_key, excess)
+            keys = [
+                self._key(k.decode() if isinstance(k, bytes) else k)
+                for k, _ in evicted
+            ]
+            if keys:
+                await self.client.delete(*keys)
+
+
+class DiskCacheBackend:
+    """Local SQLite backend with the same TTL and LRU semantics.
+
+    Eviction runs once every tenth of `max_entries` writes, so the table
+    may hold up to 10% more entries than `max_entries` in between.
+    """
+
+    def __init__(self, path: str, ttl: int, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._evict_every = max(max_entries // 10, 1)
+        self._writes = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL, accessed_at REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)"
+            )
+        return self._conn
+
+    def _get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if row[1] < now:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return json.loads(row[0])
+
+    def _set_many(self, items: Dict[str, Any]) -> None:
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                [
+                    (key, json.dumps(value), now + self.ttl, now)
+                    for key, value in items.items()
+                ],
+            )
+            self._writes += len(items)
+            if self._writes >= self._evict_every:
+                self._writes = 0
+                self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then the least recently used above the cap."""
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                "ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            conn.commit()
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self._set_many, {key: value})
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        return await asyncio.to_thread(lambda: [self._get(key) for key in keys])
+
+    async def set_many(self, items: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._set_many, items)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+
+class FallbackCacheBackend:
+    """Use the primary backend, falling back to a local one while it is down."""
+
+    def __init__(self, primary, fallback, retry_after: float = 60):
+        self.primary = primary
+        self.fallback = fallback
+        self.retry_after = retry_after
+        self._primary_down_until = 0.0
+
+    async def _call(self, method: str, *args):
+        if time.monotonic() >= self._primary_down_until:
+            try:
+                return await getattr(self.primary, method)(*args)
+            except Exception as e:
+                logger.warning(f"Cache backend unavailable, using local fallback: {e}")
+                self._primary_down_until = time.monotonic() + self.retry_after
+        return await getattr(self.fallback, method)(*args)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await self._call("get", key)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self._call("set", key, value)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        return await self._call("get_many", keys)
+
+    async def set_many(self, items: Dict[str, Any]) -> None:
+        await self._call("set_many", items)
+
+    async def delete(self, key: str) -> None:
+        await self._call("delete", key)
+
+
+class ContentCache:
+    """A named cache that counts hits and misses.
+
+    Concurrent lookups of the same missing key share a single computation.
+    Backend errors are logged and treated as misses so they never fail the
+    caller.
+    """
+
+    def __init__(self, name: str, backend):
+        self.name = name
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        _caches[name] = self
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Error reading from {self.name} cache: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        try:
+            await self.backend.set(key, value)
+        except Exception as e:
+            logger.error(f"Error writing to {self.name} cache: {e}")
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        try:
+            values = await self.backend.get_many(keys)
+        except Exception as e:
+            logger.error(f"Error reading from {self.name} cache: {e}")
+            values = [None] * len(keys)
+        found = sum(value is not None for value in values)
+        self.hits += found
+        self.misses += len(keys) - found
+        return values
+
+    async def set_many(self, items: Dict[str, Any]) -> None:
+        if not items:
+            return
+        try:
+            await self.backend.set_many(items)
+        except Exception as e:
+            logger.error(f"Error writing to {self.name} cache: {e}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.backend.delete(key)
+        except Exception as e:
+            logger.error(f"Error deleting from {self.name} cache: {e}")
+
+    async def _load(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = await self.get(key)
+        if value is None:
+            value = await compute()
+            await self.set(key, value)
+        return value
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller went away
+            task.exception()
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the cached value of key, computing and storing it on a miss.
+
+        The computation runs in its own task shared by every caller, so a
+        caller that is cancelled neither cancels it nor the other callers.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._finish, key))
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def create_cache(name: str, max_entries: int, ttl: int = CACHE_TTL) -> ContentCache:
+    """Create a Redis-backed cache with a local disk fallback."""
+    backend = FallbackCacheBackend(
+        RedisCacheBackend(redis_client, f"aurora:cache:{name}", ttl, max_entries),
+        DiskCacheBackend(os.path.join(CACHE_DIR, f"{name}.sqlite3"), ttl, max_entries),
+    )
+    return ContentCache(name, backend)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters of every cache created in this process."""
+    return {name: cache.stats() for name, cache in _caches.items()}
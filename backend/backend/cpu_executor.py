@@ -0,0 +1,161 @@
+import asyncio
+import multiprocessing
+import time
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+from backend.config import CPU_TASK_TIMEOUT, CPU_WORKERS, logger
+
+
+class CPUTaskTimeout(Exception):
+    """Raised when a task in the CPU pool runs past its timeout."""
+
+
+class CPUExecutor:
+    """Process pool shared by all CPU-bound ingestion work.
+
+    Worker functions must be importable without ``backend.config`` and take
+    and return picklable values. Spawned workers also re-import the main
+    script, so the app is started with ``uvicorn backend.server:app`` rather
+    than by running server.py. Tasks wait for a free worker before being
+    submitted, so their timeout only covers execution. A task that exceeds
+    its timeout cannot be interrupted inside a worker, so the whole pool is
+    recycled: its processes are killed and the next task starts a fresh
+    pool. Other tasks lost with the pool are resubmitted.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = CPU_WORKERS,
+        task_timeout: float = CPU_TASK_TIMEOUT,
+        max_attempts: int = 3,
+    ):
+        self.max_workers = max_workers
+        self.task_timeout = task_timeout
+        self.max_attempts = max_attempts
+        self.tasks = 0
+        self.timeouts = 0
+        self.recycles = 0
+        self.resubmits = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Pools killed because a task timed out; their other tasks are innocent
+        self._timed_out_pools: "weakref.WeakSet[ProcessPoolExecutor]" = (
+            weakref.WeakSet()
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._slots
+
+    def _recycle(self, pool: ProcessPoolExecutor, timed_out: bool = False) -> None:
+        if timed_out:
+            self._timed_out_pools.add(pool)
+        if self._pool is not pool:
+            # Another task already replaced it
+            return
+
+        self._pool = None
+        self.recycles += 1
+        processes = list((pool._processes or {}).values())
+        # Killing the workers fails every task of the pool with
+        # BrokenProcessPool, which run() resubmits. Cancelling the pending
+        # futures would hand CancelledError to their callers instead.
+        pool.shutdown(wait=False)
+        for process in processes:
+            process.kill()
+        logger.warning(f"Recycled CPU pool, killed {len(processes)} workers")
+
+    async def _submit(
+        self, func: Callable[..., Any], *args
+    ) -> Tuple[ProcessPoolExecutor, Future]:
+        """Submit func once a worker is free, keeping the worker until it ends."""
+        slots = self._get_slots()
+        await slots.acquire()
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        try:
+            future = pool.submit(func, *args)
+        except BaseException as e:
+            slots.release()
+            if isinstance(e, BrokenProcessPool):
+                self._recycle(pool)
+            raise
+
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(slots.release)
+            except RuntimeError:
+                # The loop is closed, nobody is waiting for the worker
+                pass
+
+        future.add_done_callback(release)
+        return pool, future
+
+    async def run(
+        self, func: Callable[..., Any], *args, timeout: Optional[float] = None
+    ) -> Any:
+        """Run func(*args) in the pool, recycling the pool if it times out.
+
+        Tasks lost because another task timed out are resubmitted to the
+        fresh pool. Tasks lost because a worker died are resubmitted too, up
+        to `max_attempts` runs in total, since the task may be what kills it.
+        """
+        timeout = timeout or self.task_timeout
+        self.tasks += 1
+
+        attempt = 0
+        while True:
+            attempt += 1
+            pool = None
+            try:
+                pool, future = await self._submit(func, *args)
+                start_time = time.perf_counter()
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self._recycle(pool, timed_out=True)
+                raise CPUTaskTimeout(
+                    f"{func.__name__} timed out after "
+                    f"{time.perf_counter() - start_time:.1f}s"
+                )
+            except BrokenProcessPool:
+                if pool is not None:
+                    self._recycle(pool)
+                if pool in self._timed_out_pools:
+                    # Killed for another task's timeout, this run does not count
+                    attempt -= 1
+                elif attempt >= self.max_attempts:
+                    raise
+                self.resubmits += 1
+                logger.warning(
+                    f"CPU pool broke while running {func.__name__}, retrying"
+                )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "tasks": self.tasks,
+            "timeouts": self.timeouts,
+            "recycles": self.recycles,
+            "resubmits": self.resubmits,
+        }
+
+
+cpu_executor = CPUExecutor()
@@ -1,5 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from redis.asyncio import Redis
 from .config import MONGO_URI, QDRANT_HOST, QDRANT_PORT, logger, REDIS_URI
 from llama_index.storage.chat_store.redis import RedisChatStore
 
@@ -10,11 +11,16 @@ try:
     research_collection = db.research
 
     # Vector store initialization
+    # The sync client is only used from worker threads, where no async path exists
     qdrant_client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    async_qdrant_client = AsyncQdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
 
     # Chat store initialization
     redis_chat_store = RedisChatStore(redis_url=REDIS_URI)
 
+    # Cache and queue client initialization
+    redis_client = Redis.from_url(REDIS_URI)
+
 except Exception as e:
     logger.error(f"Failed to connect to databases: {e}")
     raise
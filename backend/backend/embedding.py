@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import time
+from typing import List, Optional
+
+from llama_index.core import Settings
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.utils import iter_batch
+
+from backend.cache import content_key, create_cache
+from backend.config import (
+    EMBED_BATCH_SIZE,
+    EMBED_CACHE_MAX_ENTRIES,
+    EMBED_CONCURRENCY,
+    UPSERT_BATCH_SIZE,
+    logger,
+)
+from backend.jobs import report_progress
+
+embedding_cache = create_cache("embeddings", EMBED_CACHE_MAX_ENTRIES)
+
+
+def embedding_cache_key(embed_model: BaseEmbedding, text: str) -> str:
+    """Key an embedding by model, truncate mode and whitespace-normalized text."""
+    model_name = getattr(embed_model, "model", None) or embed_model.model_name
+    truncate = getattr(embed_model, "truncate", None) or ""
+    text_hash = hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+    return content_key(model_name, truncate, text_hash)
+
+
+async def get_text_embeddings(
+    embed_model: BaseEmbedding, texts: List[str]
+) -> List[List[float]]:
+    """Embed texts, reusing cached vectors of chunks embedded before."""
+    keys = [embedding_cache_key(embed_model, text) for text in texts]
+    embeddings = await embedding_cache.get_many(keys)
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+    if missing:
+        new_embeddings = await embed_model.aget_text_embedding_batch(
+            [texts[i] for i in missing]
+        )
+        for i, embedding in zip(missing, new_embeddings):
+            embeddings[i] = embedding
+        await embedding_cache.set_many({keys[i]: embeddings[i] for i in missing})
+
+    await report_progress(
+        embedding_cache_hits=len(texts) - len(missing),
+        embedding_cache_misses=len(missing),
+    )
+    return embeddings
+
+
+async def embed_and_upsert(
+    nodes: List[BaseNode],
+    vector_store,
+    embed_model: Optional[BaseEmbedding] = None,
+    batch_size: int = EMBED_BATCH_SIZE,
+    concurrency: int = EMBED_CONCURRENCY,
+    upsert_batch_size: int = UPSERT_BATCH_SIZE,
+) -> None:
+    """Embed nodes in concurrent batches and upsert them as they arrive.
+
+    Up to `concurrency` embedding batches are in flight at once. Both queues
+    are bounded, so embedding pauses while the upserts fall behind.
+    Embedded nodes are written to the vector store in batches of
+    `upsert_batch_size`.
+    """
+    if not nodes:
+        return
+
+    embed_model = embed_model or Settings.embed_model
+    batches: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    embedded: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    start_time = time.perf_counter()
+
+    async def produce():
+        for batch in iter_batch(nodes, batch_size):
+            await batches.put(batch)
+        for _ in range(concurrency):
+            await batches.put(None)
+
+    async def embed():
+        while (batch := await batches.get()) is not None:
+            texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in batch]
+            embeddings = await get_text_embeddings(embed_model, texts)
+            for node, embedding in zip(batch, embeddings):
+                node.embedding = embedding
+            await embedded.put(batch)
+
+    async def upsert():
+        pending = []
+        while (batch := await embedded.get()) is not None:
+            pending.extend(batch)
+            if len(pending) >= upsert_batch_size:
+                await vector_store.async_add(pending)
+                await report_progress(nodes_embedded=len(pending))
+                pending = []
+        if pending:
+            await vector_store.async_add(pending)
+            await report_progress(nodes_embedded=len(pending))
+
+    producer = asyncio.create_task(produce())
+    embedders = [asyncio.create_task(embed()) for _ in range(concurrency)]
+    uploader = asyncio.create_task(upsert())
+
+    async def close_embedded():
+        await asyncio.gather(producer, *embedders)
+        await embedded.put(None)
+
+    tasks = [producer, *embedders, asyncio.create_task(close_embedded()), uploader]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    for task in tasks:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+
+    elapsed = time.perf_counter() - start_time
+    logger.info(
+        f"Embedded {len(nodes)} nodes in {elapsed:.2f}s "
+        f"({len(nodes) / elapsed if elapsed else 0:.1f} nodes/sec)"
+    )
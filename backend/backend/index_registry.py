@@ -0,0 +1,253 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from llama_index.core import StorageContext, VectorStoreIndex
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.types import (
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
+from llama_index.vector_stores.qdrant import QdrantVectorStore
+from llama_index.vector_stores.qdrant.utils import SparseEncoderCallable
+from qdrant_client.http import models as qdrant_models
+
+from backend.config import INDEX_CACHE_SIZE, INDEX_CACHE_TTL, SPARSE_MODEL, logger
+from backend.database import async_qdrant_client, qdrant_client
+from backend.retrieval import (
+    PreparedSparseEncoder,
+    build_retriever,
+    get_fusion_fn,
+    get_sparse_encoders,
+    retrieval_kwargs,
+    use_hybrid,
+)
+
+# Points per Qdrant scroll request when listing the chunks of a source
+SCROLL_PAGE_SIZE = 256
+
+SPARSE_QUERY_MODES = (VectorStoreQueryMode.HYBRID, VectorStoreQueryMode.SPARSE)
+
+
+def source_point_filter(reference_id: str) -> qdrant_models.Filter:
+    """Qdrant filter matching the points of one source."""
+    return qdrant_models.Filter(
+        must=[
+            qdrant_models.FieldCondition(
+                key="reference_id",
+                match=qdrant_models.MatchValue(value=reference_id),
+            )
+        ]
+    )
+
+
+async def scroll_source_nodes(research_id: str, reference_id: str) -> List[BaseNode]:
+    """Chunks of one source without their vectors, fetched page by page."""
+    if not await async_qdrant_client.collection_exists(research_id):
+        return []
+
+    nodes = []
+    offset = None
+    while True:
+        points, offset = await async_qdrant_client.scroll(
+            collection_name=research_id,
+            scroll_filter=source_point_filter(reference_id),
+            limit=SCROLL_PAGE_SIZE,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        nodes.extend(metadata_dict_to_node(point.payload) for point in points)
+        if offset is None:
+            return nodes
+
+
+class OffloadedQdrantVectorStore(QdrantVectorStore):
+    """QdrantVectorStore whose sparse encoders run in a thread.
+
+    QdrantVectorStore calls the sparse encoders of hybrid collections, such
+    as BM25, synchronously on the event loop when adding and querying. Here
+    they are wrapped in PreparedSparseEncoders, and the texts are encoded in
+    a thread just before the store's own async add or query runs.
+    """
+
+    _doc_encoder: Optional[PreparedSparseEncoder] = PrivateAttr(default=None)
+    _query_encoder: Optional[PreparedSparseEncoder] = PrivateAttr(default=None)
+
+    def __init__(
+        self,
+        *args: Any,
+        sparse_doc_fn: Optional[SparseEncoderCallable] = None,
+        sparse_query_fn: Optional[SparseEncoderCallable] = None,
+        **kwargs: Any,
+    ):
+        doc_encoder = sparse_doc_fn and PreparedSparseEncoder(sparse_doc_fn)
+        query_encoder = sparse_query_fn and PreparedSparseEncoder(sparse_query_fn)
+        super().__init__(
+            *args,
+            sparse_doc_fn=doc_encoder,
+            sparse_query_fn=query_encoder,
+            **kwargs,
+        )
+        self._doc_encoder = doc_encoder
+        self._query_encoder = query_encoder
+
+    async def async_add(self, nodes: List[BaseNode], **kwargs: Any) -> List[str]:
+        if self.enable_hybrid and self._doc_encoder is not None:
+            await self._doc_encoder.prepare(
+                [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+            )
+        return await super().async_add(nodes, **kwargs)
+
+    async def aquery(
+        self, query: VectorStoreQuery, **kwargs: Any
+    ) -> VectorStoreQueryResult:
+        if (
+            self.enable_hybrid
+            and self._query_encoder is not None
+            and query.query_str is not None
+            and query.mode in SPARSE_QUERY_MODES
+        ):
+            await self._query_encoder.prepare([query.query_str])
+        return await super().aquery(query, **kwargs)
+
+
+class IndexHandle:
+    """Vector store, index and derived engines of one Qdrant collection."""
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+        self.hybrid = use_hybrid(qdrant_client, collection_name)
+        hybrid_kwargs = {}
+        if self.hybrid:
+            encode_documents, encode_queries = get_sparse_encoders()
+            hybrid_kwargs = dict(
+                enable_hybrid=True,
+                fastembed_sparse_model=SPARSE_MODEL,
+                sparse_doc_fn=encode_documents,
+                sparse_query_fn=encode_queries,
+                hybrid_fusion_fn=get_fusion_fn(),
+            )
+        self.vector_store = OffloadedQdrantVectorStore(
+            client=qdrant_client,
+            aclient=async_qdrant_client,
+            collection_name=collection_name,
+            **hybrid_kwargs,
+        )
+        self.storage_context = StorageContext.from_defaults(
+            vector_store=self.vector_store
+        )
+        self.index = VectorStoreIndex.from_vector_store(
+            self.vector_store, storage_context=self.storage_context
+        )
+        self.last_used = time.monotonic()
+        self._engines: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def retrieval_kwargs(self) -> Dict[str, Any]:
+        """Retriever arguments matching this collection's retrieval mode."""
+        return retrieval_kwargs(self.hybrid)
+
+    def retriever(self):
+        """Cached retriever matching this collection's retrieval mode."""
+        return self.get_engine(
+            "retriever", lambda index: build_retriever(index, self.hybrid)
+        )
+
+    def get_engine(self, name: str, factory: Callable[[VectorStoreIndex], Any]):
+        """Return the engine built by factory, building it on first use."""
+        with self._lock:
+            if name not in self._engines:
+                self._engines[name] = factory(self.index)
+            return self._engines[name]
+
+
+class IndexRegistry:
+    """Process-wide LRU of index handles with an idle TTL.
+
+    Handles must be invalidated whenever the sources of a collection change.
+    Building a handle makes blocking Qdrant calls, so it runs in a thread;
+    concurrent misses for a collection share one build.
+    """
+
+    def __init__(self, max_size: int = INDEX_CACHE_SIZE, idle_ttl: float = INDEX_CACHE_TTL):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.hits = 0
+        self.misses = 0
+        self.build_seconds = 0.0
+        self._handles: "OrderedDict[str, IndexHandle]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._building: Dict[str, asyncio.Task] = {}
+
+    async def get(self, collection_name: str) -> IndexHandle:
+        now = time.monotonic()
+        with self._lock:
+            handle = self._handles.get(collection_name)
+            if handle is not None and now - handle.last_used <= self.idle_ttl:
+                handle.last_used = now
+                self._handles.move_to_end(collection_name)
+                self.hits += 1
+                return handle
+
+        task = self._building.get(collection_name)
+        if task is None:
+            task = asyncio.create_task(self._build(collection_name))
+            self._building[collection_name] = task
+            task.add_done_callback(functools.partial(self._finish, collection_name))
+        return await asyncio.shield(task)
+
+    def _finish(self, collection_name: str, task: asyncio.Task) -> None:
+        if self._building.get(collection_name) is task:
+            del self._building[collection_name]
+        if not task.cancelled():
+            task.exception()
+
+    async def _build(self, collection_name: str) -> IndexHandle:
+        start_time = time.perf_counter()
+        handle = await asyncio.to_thread(IndexHandle, collection_name)
+        elapsed = time.perf_counter() - start_time
+
+        with self._lock:
+            self.misses += 1
+            self.build_seconds += elapsed
+            if self._building.get(collection_name) is not asyncio.current_task():
+                # Invalidated while building, so the handle may be stale
+                return handle
+            self._handles[collection_name] = handle
+            self._handles.move_to_end(collection_name)
+            while len(self._handles) > self.max_size:
+                evicted, _ = self._handles.popitem(last=False)
+                logger.info(f"Evicted index handle for {evicted}")
+        logger.info(f"Built index handle for {collection_name} in {elapsed:.3f}s")
+        return handle
+
+    def invalidate(self, collection_name: str) -> None:
+        with self._lock:
+            self._handles.pop(collection_name, None)
+            self._building.pop(collection_name, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._handles.clear()
+            self._building.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._handles),
+                "hits": self.hits,
+                "misses": self.misses,
+                "avg_build_seconds": self.build_seconds / self.misses
+                if self.misses
+                else 0.0,
+            }
+
+
+index_registry = IndexRegistry()
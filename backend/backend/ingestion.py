@@ -0,0 +1,435 @@
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Set
+
+from bson import ObjectId
+from fastapi import UploadFile
+from llama_index.core import Document, Settings
+from llama_index.core.ingestion import run_transformations
+from llama_index.core.schema import BaseNode, MetadataMode
+from qdrant_client.http import models as qdrant_models
+
+from backend.config import (
+    FILE_CONCURRENCY,
+    GLOBAL_FILE_CONCURRENCY,
+    SUMMARIZE_ON_INGEST,
+    logger,
+)
+from backend.database import async_qdrant_client, research_collection
+from backend.embedding import embed_and_upsert
+from backend.index_registry import (
+    index_registry,
+    scroll_source_nodes,
+    source_point_filter,
+)
+from backend.jobs import job_handler, report_progress
+from backend.models import FileSource, JobStatus, LinkSource, SourceType
+from backend.processors.process_files import process_files, track_failed_pages
+from backend.processors.process_url import process_url
+from backend.semantic_cache import semantic_cache
+from backend.summary import summary_engine
+
+VOLATILE_METADATA_KEYS = [
+    "research_id",
+    "reference_id",
+    "created_at",
+    "dataframe",
+    "image",
+    # Set by SimpleDirectoryReader from the spooled copy of the upload
+    "file_path",
+    "file_name",
+]
+
+# Caps the files being parsed at once across every running job
+file_semaphore = asyncio.Semaphore(GLOBAL_FILE_CONCURRENCY)
+
+
+async def touch_source_in_mongodb(
+    research_id: str, reference_id: str, filename: str = None
+) -> None:
+    fields = {"sources.$.updated_at": datetime.utcnow().isoformat()}
+    if filename:
+        fields["sources.$.filename"] = filename
+
+    await research_collection.update_one(
+        {"_id": ObjectId(research_id), "sources.reference_id": reference_id},
+        {"$set": fields},
+    )
+
+
+async def source_exists(research_id: str, reference_id: str) -> bool:
+    research = await research_collection.find_one(
+        {"_id": ObjectId(research_id), "sources.reference_id": reference_id},
+        projection={"_id": 1},
+    )
+    return research is not None
+
+
+def source_entry(
+    reference_id: str,
+    url: str = None,
+    filename: str = None,
+    source_type: SourceType = None,
+) -> dict:
+    source_data = {
+        "reference_id": reference_id,
+        "type": source_type.value,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    if url:
+        source_data["url"] = url
+    if filename:
+        source_data["filename"] = filename
+    return source_data
+
+
+async def add_sources_to_mongodb(research_id: str, sources: List[dict]) -> None:
+    """Append source entries to a research in a single update."""
+    if not sources:
+        return
+
+    await research_collection.update_one(
+        {"_id": ObjectId(research_id)},
+        {"$push": {"sources": {"$each": sources}}},
+    )
+
+
+async def summarize_source(research_id: str, source: dict) -> None:
+    """Store the summary and key topics of one source on its entry."""
+    try:
+        result = await summary_engine.build_source_summary(research_id, source)
+    except Exception as e:
+        logger.error(f"Error summarizing source {source['reference_id']}: {e}")
+        return
+    if not result["summary"]:
+        return
+
+    await research_collection.update_one(
+        {"_id": ObjectId(research_id), "sources.reference_id": source["reference_id"]},
+        {
+            "$set": {
+                "sources.$.summary": result["summary"],
+                "sources.$.topics": result["topics"],
+            }
+        },
+    )
+    await report_progress(sources_summarized=1)
+
+
+async def summarize_sources(research_id: str, sources: List[dict]) -> None:
+    """Store the summary and key topics of ingested sources on their entries.
+
+    Failures are logged and leave the entry without a summary, in which case
+    chat summarizes the source from its chunks when asked. The sources are
+    already committed when this runs, so cancelling the job stops
+    summarizing but does not cancel the job: it completes with the summaries
+    counted in sources_summarized.
+    """
+    if not SUMMARIZE_ON_INGEST or not sources:
+        return
+
+    summarizing = asyncio.gather(
+        *(summarize_source(research_id, source) for source in sources)
+    )
+    try:
+        await asyncio.shield(summarizing)
+    except asyncio.CancelledError:
+        summarizing.cancel()
+        await asyncio.gather(summarizing, return_exceptions=True)
+        logger.warning(
+            f"Stopped summarizing sources of research {research_id} on cancel, "
+            f"their summaries are partial"
+        )
+
+
+def chunk_hash(node: BaseNode) -> str:
+    """Hash of the text a chunk is embedded from."""
+    text = node.get_content(metadata_mode=MetadataMode.EMBED)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+async def build_nodes(documents: List[Document]) -> List[BaseNode]:
+    """Split documents into the chunks stored in Qdrant."""
+    for document in documents:
+        # Keep per-upload values out of the embedded text so that unchanged
+        # chunks map to the same embedding cache entry
+        document.excluded_embed_metadata_keys = list(
+            set(document.excluded_embed_metadata_keys) | set(VOLATILE_METADATA_KEYS)
+        )
+    return await asyncio.to_thread(
+        run_transformations, documents, Settings.transformations
+    )
+
+
+async def embed_documents(research_id: str, documents: List[Document]) -> None:
+    """Embed documents and store them in the research's Qdrant collection."""
+    handle = await index_registry.get(research_id)
+    nodes = await build_nodes(documents)
+
+    await embed_and_upsert(nodes, handle.vector_store)
+    await report_progress(documents_embedded=len(documents))
+
+
+async def sync_source_documents(
+    research_id: str,
+    reference_id: str,
+    documents: List[Document],
+    failed_pages: Set[int] = frozenset(),
+) -> Dict[str, int]:
+    """Replace the chunks of a source, re-embedding only the ones that changed.
+
+    Stored chunks whose hash matches a new chunk are kept as they are, and so
+    are the stored chunks of pages in failed_pages, which did not parse this
+    time. New chunks are upserted before removed ones are deleted, so the
+    source stays searchable while it is being updated. Raises ValueError if
+    the source is deleted while it is being updated.
+    """
+    if not await source_exists(research_id, reference_id):
+        raise ValueError(f"Source {reference_id} was deleted")
+
+    handle = await index_registry.get(research_id)
+    nodes = await build_nodes(documents)
+
+    stored_ids: Dict[str, List[str]] = {}
+    kept = 0
+    for node in await scroll_source_nodes(research_id, reference_id):
+        if node.metadata.get("page_num") in failed_pages:
+            kept += 1
+            continue
+        stored_ids.setdefault(chunk_hash(node), []).append(node.node_id)
+
+    changed_nodes = []
+    reused = 0
+    for node in nodes:
+        ids = stored_ids.get(chunk_hash(node))
+        if ids:
+            ids.pop()
+            reused += 1
+        else:
+            changed_nodes.append(node)
+    removed_ids = [node_id for ids in stored_ids.values() for node_id in ids]
+
+    await embed_and_upsert(changed_nodes, handle.vector_store)
+    # delete_source removes the entry before the vectors, so a delete that
+    # raced the upsert shows up here and its vectors are removed again
+    if not await source_exists(research_id, reference_id):
+        await delete_source_vectors(research_id, reference_id)
+        raise ValueError(f"Source {reference_id} was deleted")
+    if removed_ids:
+        await handle.vector_store.adelete_nodes(node_ids=removed_ids)
+    await report_progress(documents_embedded=len(documents))
+    index_registry.invalidate(research_id)
+    await semantic_cache.invalidate(research_id)
+
+    logger.info(
+        f"Updated source {reference_id}: {reused} chunks reused, "
+        f"{len(changed_nodes)} recomputed, {len(removed_ids)} removed, "
+        f"{kept} kept from pages that failed to parse"
+    )
+    return {
+        "chunks_reused": reused,
+        "chunks_recomputed": len(changed_nodes),
+        "chunks_removed": len(removed_ids),
+    }
+
+
+async def delete_source_vectors(research_id: str, reference_id: str) -> None:
+    """Remove every vector of a source from the research's Qdrant collection."""
+    if not await async_qdrant_client.collection_exists(research_id):
+        return
+
+    await async_qdrant_client.delete(
+        collection_name=research_id,
+        points_selector=qdrant_models.FilterSelector(
+            filter=source_point_filter(reference_id)
+        ),
+    )
+    index_registry.invalidate(research_id)
+    await semantic_cache.invalidate(research_id)
+
+
+async def discard_embedded_sources(research_id: str, reference_ids: List[str]) -> None:
+    """Remove vectors of sources whose job did not commit."""
+    for reference_id in reference_ids:
+        try:
+            await delete_source_vectors(research_id, reference_id)
+        except Exception as e:
+            logger.error(f"Error discarding vectors of {reference_id}: {e}")
+
+
+async def ingest_file(
+    research_id: str, file_info: dict, semaphore: asyncio.Semaphore
+) -> FileSource:
+    """Parse and embed one uploaded file, recording failure instead of raising."""
+    file = FileSource(
+        filename=file_info["filename"],
+        research_id=research_id,
+        reference_id=file_info["reference_id"],
+    )
+    try:
+        async with semaphore, file_semaphore:
+            with open(file_info["path"], "rb") as f:
+                documents = await process_files(
+                    files=[UploadFile(file=f, filename=file.filename)],
+                    research_id=research_id,
+                    reference_id=file.reference_id,
+                )
+            if not documents:
+                raise ValueError("No content could be extracted from file")
+
+            await embed_documents(research_id, documents)
+        file.status = JobStatus.COMPLETED
+    except Exception as e:
+        logger.error(f"Error ingesting {file.filename}: {e}", exc_info=True)
+        await discard_embedded_sources(research_id, [file.reference_id])
+        file.status = JobStatus.FAILED
+        file.error = str(e)
+    return file
+
+
+@job_handler("files")
+async def ingest_files(job: dict) -> dict:
+    research_id = job["research_id"]
+    file_infos = job["payload"]["files"]
+    semaphore = asyncio.Semaphore(FILE_CONCURRENCY)
+
+    try:
+        files = await asyncio.gather(
+            *(ingest_file(research_id, file_info, semaphore) for file_info in file_infos)
+        )
+    except BaseException:
+        await discard_embedded_sources(
+            research_id, [file_info["reference_id"] for file_info in file_infos]
+        )
+        raise
+
+    sources = [
+        source_entry(
+            file.reference_id, filename=file.filename, source_type=SourceType.FILE
+        )
+        for file in files
+        if file.status == JobStatus.COMPLETED
+    ]
+    await add_sources_to_mongodb(research_id, sources)
+    index_registry.invalidate(research_id)
+    await semantic_cache.invalidate(research_id)
+    await summarize_sources(research_id, sources)
+
+    return {"files": [file.model_dump(mode="json") for file in files]}
+
+
+async def crawl_and_embed(research_id: str, url: str, reference_id: str) -> None:
+    documents = await process_url(
+        url=url, research_id=research_id, reference_id=reference_id
+    )
+    if not documents:
+        raise ValueError("No content could be extracted from URL")
+    await report_progress(pages_processed=1)
+
+    try:
+        await embed_documents(research_id, documents)
+    except BaseException:
+        await discard_embedded_sources(research_id, [reference_id])
+        raise
+
+
+@job_handler("link")
+async def ingest_link(job: dict) -> dict:
+    research_id = job["research_id"]
+    url = job["payload"]["url"]
+    reference_id = job["payload"]["reference_id"]
+
+    await crawl_and_embed(research_id, url, reference_id)
+
+    source = source_entry(reference_id, url=url, source_type=SourceType.LINK)
+    await add_sources_to_mongodb(research_id, [source])
+    index_registry.invalidate(research_id)
+    await semantic_cache.invalidate(research_id)
+    await summarize_sources(research_id, [source])
+    return {"reference_id": reference_id, "url": url}
+
+
+async def ingest_batch_link(research_id: str, link_info: dict) -> LinkSource:
+    """Crawl and embed one link of a batch, recording failure instead of raising."""
+    link = LinkSource(
+        url=link_info["url"],
+        research_id=research_id,
+        reference_id=link_info["reference_id"],
+    )
+    try:
+        await crawl_and_embed(research_id, link.url, link.reference_id)
+        link.status = JobStatus.COMPLETED
+    except Exception as e:
+        logger.error(f"Error ingesting {link.url}: {e}")
+        link.status = JobStatus.FAILED
+        link.error = str(e)
+    return link
+
+
+@job_handler("links")
+async def ingest_links(job: dict) -> dict:
+    """Ingest many links concurrently; the crawler pool bounds the concurrency."""
+    research_id = job["research_id"]
+    link_infos = job["payload"]["links"]
+
+    try:
+        links = await asyncio.gather(
+            *(ingest_batch_link(research_id, link_info) for link_info in link_infos)
+        )
+    except BaseException:
+        await discard_embedded_sources(
+            research_id, [link_info["reference_id"] for link_info in link_infos]
+        )
+        raise
+
+    sources = [
+        source_entry(link.reference_id, url=link.url, source_type=SourceType.LINK)
+        for link in links
+        if link.status == JobStatus.COMPLETED
+    ]
+    await add_sources_to_mongodb(research_id, sources)
+    index_registry.invalidate(research_id)
+    await semantic_cache.invalidate(research_id)
+    await summarize_sources(research_id, sources)
+
+    return {"links": [link.model_dump(mode="json") for link in links]}
+
+
+@job_handler("update")
+async def update_source(job: dict) -> dict:
+    research_id = job["research_id"]
+    payload = job["payload"]
+    reference_id = payload["reference_id"]
+
+    failed_pages = set()
+    if payload.get("path"):
+        with open(payload["path"], "rb") as f, track_failed_pages() as failed_pages:
+            documents = await process_files(
+                files=[UploadFile(file=f, filename=payload["filename"])],
+                research_id=research_id,
+                reference_id=reference_id,
+            )
+    else:
+        documents = await process_url(
+            url=payload["url"], research_id=research_id, reference_id=reference_id
+        )
+        await report_progress(pages_processed=1)
+    if not documents:
+        raise ValueError("No content could be extracted from the updated source")
+
+    result = await sync_source_documents(
+        research_id, reference_id, documents, failed_pages
+    )
+    await touch_source_in_mongodb(research_id, reference_id, payload.get("filename"))
+    await summarize_sources(
+        research_id,
+        [
+            {
+                "reference_id": reference_id,
+                "filename": payload.get("filename"),
+                "url": payload.get("url"),
+            }
+        ],
+    )
+    return {"reference_id": reference_id, **result}
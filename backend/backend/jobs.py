@@ -0,0 +1,275 @@
+import asyncio
+import json
+import os
+import shutil
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from backend.config import INGESTION_WORKERS, JOB_WORKER_ID, JOBS_DIR, logger
+from backend.database import redis_client
+from backend.models import JobStatus
+
+JOB_QUEUE_KEY = "aurora:jobs:queue"
+JOB_PROCESSING_PREFIX = "aurora:jobs:processing:"
+JOB_KEY_PREFIX = "aurora:job:"
+JOB_TTL = 7 * 24 * 60 * 60
+JOB_COUNTERS = (
+    "pages_processed",
+    "pages_failed",
+    "documents_embedded",
+    "nodes_embedded",
+    "embedding_cache_hits",
+    "embedding_cache_misses",
+    "sources_summarized",
+)
+
+_current_job: ContextVar[Optional[str]] = ContextVar("current_job", default=None)
+_handlers: Dict[str, Callable[[dict], Awaitable[dict]]] = {}
+
+
+def job_handler(job_type: str):
+    """Register the coroutine that runs jobs of the given type."""
+
+    def decorator(func):
+        _handlers[job_type] = func
+        return func
+
+    return decorator
+
+
+def job_dir(job_id: str) -> str:
+    """Directory holding the inputs of a job until it finishes."""
+    return os.path.join(JOBS_DIR, job_id)
+
+
+def _job_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+async def update_job(job_id: str, **fields) -> None:
+    fields["updated_at"] = datetime.utcnow().isoformat()
+    await redis_client.hset(_job_key(job_id), mapping=fields)
+
+
+async def enqueue_job(job_id: str, job_type: str, research_id: str, payload: dict) -> str:
+    """Store a new job and push it onto the ingestion queue."""
+    now = datetime.utcnow().isoformat()
+    key = _job_key(job_id)
+    pipe = redis_client.pipeline()
+    pipe.hset(
+        key,
+        mapping={
+            "id": job_id,
+            "type": job_type,
+            "research_id": research_id,
+            "status": JobStatus.QUEUED.value,
+            "payload": json.dumps(payload),
+            "created_at": now,
+            "updated_at": now,
+            **{counter: 0 for counter in JOB_COUNTERS},
+        },
+    )
+    pipe.expire(key, JOB_TTL)
+    pipe.rpush(JOB_QUEUE_KEY, job_id)
+    await pipe.execute()
+    logger.info(f"Queued {job_type} job {job_id} for research {research_id}")
+    return job_id
+
+
+async def get_job(job_id: str) -> Optional[dict]:
+    data = await redis_client.hgetall(_job_key(job_id))
+    if not data:
+        return None
+
+    job = {_decode(k): _decode(v) for k, v in data.items()}
+    for counter in JOB_COUNTERS:
+        job[counter] = int(job.get(counter, 0))
+    for field in ("payload", "result"):
+        if field in job:
+            job[field] = json.loads(job[field])
+    return job
+
+
+async def cancel_job(job_id: str) -> Optional[dict]:
+    """Cancel a queued job right away, or ask the worker running it to stop."""
+    job = await get_job(job_id)
+    if job is None:
+        return None
+
+    if job["status"] == JobStatus.QUEUED.value and await redis_client.lrem(
+        JOB_QUEUE_KEY, 0, job_id
+    ):
+        await update_job(job_id, status=JobStatus.CANCELLED.value)
+        shutil.rmtree(job_dir(job_id), ignore_errors=True)
+    elif job["status"] in (JobStatus.QUEUED.value, JobStatus.RUNNING.value):
+        # A worker already took the job off the queue, it stops the job
+        await update_job(job_id, cancel_requested=1)
+
+    return await get_job(job_id)
+
+
+async def report_progress(**counts: int) -> None:
+    """Increment progress counters of the job running in this context, if any."""
+    job_id = _current_job.get()
+    if job_id is None:
+        return
+
+    try:
+        pipe = redis_client.pipeline()
+        for counter, amount in counts.items():
+            pipe.hincrby(_job_key(job_id), counter, amount)
+        pipe.hset(_job_key(job_id), "updated_at", datetime.utcnow().isoformat())
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Error reporting progress for job {job_id}: {e}")
+
+
+class JobWorkerPool:
+    """Local workers consuming the Redis-backed ingestion queue.
+
+    Workers move each job from the queue onto this pool's processing list
+    and remove it once the job finished, so jobs held by a process that
+    crashed are still in its processing list and are queued again when a
+    pool with the same worker id starts.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = INGESTION_WORKERS,
+        poll_interval: float = 1,
+        worker_id: str = JOB_WORKER_ID,
+    ):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.processing_key = f"{JOB_PROCESSING_PREFIX}{worker_id}"
+        self._tasks = []
+
+    async def start(self):
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        await self.recover()
+        for worker_id in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._worker(worker_id)))
+        logger.info(f"Started {self.concurrency} ingestion workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def recover(self) -> int:
+        """Queue again the jobs left unfinished by a previous run of this pool."""
+        recovered = 0
+        while True:
+            job_id = await redis_client.lmove(
+                self.processing_key, JOB_QUEUE_KEY, "RIGHT", "LEFT"
+            )
+            if job_id is None:
+                break
+            job_id = _decode(job_id)
+            job = await get_job(job_id)
+            if job is None or job["status"] not in (
+                JobStatus.QUEUED.value,
+                JobStatus.RUNNING.value,
+            ):
+                await redis_client.lrem(JOB_QUEUE_KEY, 1, job_id)
+                continue
+            await update_job(job_id, status=JobStatus.QUEUED.value)
+            recovered += 1
+            logger.warning(f"Requeued job {job_id} interrupted by a worker restart")
+        return recovered
+
+    async def _worker(self, worker_id: int):
+        while True:
+            try:
+                job_id = await redis_client.blmove(
+                    JOB_QUEUE_KEY, self.processing_key, 5, "LEFT", "RIGHT"
+                )
+                if job_id is None:
+                    continue
+                job_id = _decode(job_id)
+                try:
+                    await self._run(job_id)
+                finally:
+                    await redis_client.lrem(self.processing_key, 1, job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingestion worker {worker_id} error: {e}", exc_info=True)
+                await asyncio.sleep(self.poll_interval)
+
+    async def _cancel_requested(self, job_id: str) -> bool:
+        return bool(await redis_client.hget(_job_key(job_id), "cancel_requested"))
+
+    async def _run(self, job_id: str):
+        job = await get_job(job_id)
+        if job is None or job["status"] != JobStatus.QUEUED.value:
+            return
+
+        if await self._cancel_requested(job_id):
+            await update_job(job_id, status=JobStatus.CANCELLED.value)
+            shutil.rmtree(job_dir(job_id), ignore_errors=True)
+            return
+
+        handler = _handlers.get(job["type"])
+        if handler is None:
+            await update_job(
+                job_id,
+                status=JobStatus.FAILED.value,
+                error=f"Unknown job type: {job['type']}",
+            )
+            return
+
+        logger.info(f"Running {job['type']} job {job_id}")
+        await update_job(job_id, status=JobStatus.RUNNING.value)
+        token = _current_job.set(job_id)
+        task = asyncio.create_task(handler(job))
+        _current_job.reset(token)
+
+        cancelled = False
+        try:
+            while not task.done():
+                await asyncio.wait({task}, timeout=self.poll_interval)
+                # Cancel once, a handler may catch it to finish a committed tail
+                if (
+                    not task.done()
+                    and not cancelled
+                    and await self._cancel_requested(job_id)
+                ):
+                    logger.info(f"Cancelling job {job_id}")
+                    task.cancel()
+                    cancelled = True
+        except asyncio.CancelledError:
+            # The worker is shutting down, hand the job back to the queue
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await update_job(job_id, status=JobStatus.QUEUED.value)
+            pipe = redis_client.pipeline()
+            pipe.lrem(self.processing_key, 1, job_id)
+            pipe.lpush(JOB_QUEUE_KEY, job_id)
+            await pipe.execute()
+            raise
+
+        if task.cancelled():
+            await update_job(job_id, status=JobStatus.CANCELLED.value)
+        elif task.exception() is not None:
+            logger.error(f"Job {job_id} failed: {task.exception()}")
+            await update_job(
+                job_id, status=JobStatus.FAILED.value, error=str(task.exception())
+            )
+        else:
+            await update_job(
+                job_id,
+                status=JobStatus.COMPLETED.value,
+                result=json.dumps(task.result()),
+            )
+            logger.info(f"Completed job {job_id}")
+        shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+job_workers = JobWorkerPool()
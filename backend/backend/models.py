@@ -11,10 +11,22 @@ class SourceType(str, Enum):
     FILE = "file"
 
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
 class URLRequest(BaseModel):
     url: HttpUrl
 
 
+class URLBatchRequest(BaseModel):
+    urls: List[HttpUrl]
+
+
 class UpdateResearch(BaseModel):
     title: str
 
@@ -28,6 +40,8 @@ class Source(BaseModel):
     url: Optional[str] = None
     filename: Optional[str] = None  # Add this field
     file_type: Optional[str] = None  # Add this field
+    summary: Optional[str] = None
+    topics: List[str] = []
     created_at: datetime
 
 
@@ -67,11 +81,46 @@ class FileSource(BaseModel):
     filename: str
     research_id: str
     reference_id: str
+    status: JobStatus = JobStatus.QUEUED
+    error: Optional[str] = None
 
 
 class FileSourcesResponse(BaseModel):
     message: str = "Files processed successfully"
     files: List[FileSource]
+    job_id: Optional[str] = None
+
+
+class LinkSource(BaseModel):
+    url: str
+    research_id: str
+    reference_id: str
+    status: JobStatus = JobStatus.QUEUED
+    error: Optional[str] = None
+
+
+class LinkSourcesResponse(BaseModel):
+    message: str = "Links queued for processing"
+    links: List[LinkSource]
+    job_id: Optional[str] = None
+
+
+class Job(BaseModel):
+    id: str
+    type: str
+    research_id: str
+    status: JobStatus
+    pages_processed: int = 0
+    pages_failed: int = 0
+    documents_embedded: int = 0
+    nodes_embedded: int = 0
+    embedding_cache_hits: int = 0
+    embedding_cache_misses: int = 0
+    sources_summarized: int = 0
+    created_at: str
+    updated_at: str
+    result: Optional[dict] = None
+    error: Optional[str] = None
 
 
 class ChatRequest(BaseModel):
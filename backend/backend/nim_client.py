@@ -0,0 +1,139 @@
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import aiohttp
+
+from backend.config import (
+    NIM_ENDPOINT_CONCURRENCY,
+    NIM_MAX_CONNECTIONS,
+    NIM_MAX_RETRIES,
+    NIM_TIMEOUT,
+    NVIDIA_API_KEY,
+    logger,
+)
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+_call_counter: ContextVar[Optional[dict]] = ContextVar("nim_call_counter", default=None)
+
+
+@contextmanager
+def count_calls():
+    """Count the NIM requests made in this context and the tasks it spawns."""
+    counter = {"calls": 0}
+    token = _call_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _call_counter.reset(token)
+
+
+class NIMError(Exception):
+    """Raised when a NIM endpoint returns an error or cannot be reached."""
+
+
+class NIMClient:
+    """Shared async client for NVIDIA NIM vision and LLM endpoints.
+
+    A single pooled, keep-alive session is reused for every request, each
+    endpoint gets its own concurrency cap, and 429/5xx responses are retried
+    with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        timeout: float = NIM_TIMEOUT,
+        max_retries: int = NIM_MAX_RETRIES,
+        max_connections: int = NIM_MAX_CONNECTIONS,
+        endpoint_concurrency: int = NIM_ENDPOINT_CONCURRENCY,
+        backoff_base: float = 0.5,
+    ):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.endpoint_concurrency = endpoint_concurrency
+        self.backoff_base = backoff_base
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections, keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Accept": "application/json",
+                },
+            )
+        return self._session
+
+    def _get_semaphore(self, url: str) -> asyncio.Semaphore:
+        if url not in self._semaphores:
+            self._semaphores[url] = asyncio.Semaphore(self.endpoint_concurrency)
+        return self._semaphores[url]
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff_base * (2**attempt) + random.uniform(0, self.backoff_base)
+
+    async def post(self, url: str, payload: dict) -> dict:
+        """POST a JSON payload to a NIM endpoint and return the JSON response."""
+        session = self._get_session()
+        counter = _call_counter.get()
+        if counter is not None:
+            counter["calls"] += 1
+        async with self._get_semaphore(url):
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                try:
+                    async with session.post(url, json=payload) as response:
+                        if response.status == 200:
+                            return await response.json()
+
+                        error_text = await response.text()
+                        if response.status not in RETRYABLE_STATUSES:
+                            raise NIMError(
+                                f"NIM API returned status {response.status}: {error_text}"
+                            )
+                        retry_after = response.headers.get("Retry-After")
+                        logger.warning(
+                            f"NIM API returned status {response.status} for {url} "
+                            f"(attempt {attempt + 1}/{self.max_retries + 1})"
+                        )
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(
+                        f"NIM request to {url} failed: {e!r} "
+                        f"(attempt {attempt + 1}/{self.max_retries + 1})"
+                    )
+
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        raise NIMError(f"NIM request to {url} failed after {self.max_retries + 1} attempts")
+
+    async def chat_completion(self, url: str, payload: dict) -> str:
+        """Call a chat completions endpoint and return the first message content."""
+        result = await self.post(url, payload)
+        return result["choices"][0]["message"]["content"]
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._semaphores = {}
+
+
+nim_client = NIMClient(api_key=NVIDIA_API_KEY)
@@ -0,0 +1,165 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from crawl4ai import AsyncWebCrawler
+
+from backend.config import CRAWL_TIMEOUT, CRAWLER_MAX_PAGES, CRAWLER_POOL_SIZE, logger
+
+# Playwright errors meaning the browser itself is gone, not just the page
+BROWSER_ERROR_MARKERS = (
+    "target page, context or browser has been closed",
+    "browser has been closed",
+    "browser closed",
+    "connection closed",
+    "failed to start browser",
+)
+
+
+def is_browser_error(error_message: Optional[str]) -> bool:
+    message = (error_message or "").lower()
+    return any(marker in message for marker in BROWSER_ERROR_MARKERS)
+
+
+class PooledCrawler:
+    def __init__(self, crawler: AsyncWebCrawler):
+        self.crawler = crawler
+        self.pages = 0
+        self.broken = False
+
+    def is_healthy(self) -> bool:
+        browser = getattr(self.crawler.crawler_strategy, "browser", None)
+        return not self.broken and browser is not None and browser.is_connected()
+
+
+class CrawlerPool:
+    """Process-wide pool of warm headless browsers used to crawl links.
+
+    Browsers are started lazily up to `size`, checked before every use and
+    replaced once they are disconnected, have timed out, or have crawled
+    `max_pages` pages.
+    """
+
+    def __init__(
+        self,
+        size: int = CRAWLER_POOL_SIZE,
+        max_pages: int = CRAWLER_MAX_PAGES,
+        timeout: float = CRAWL_TIMEOUT,
+    ):
+        self.size = size
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.crawls = 0
+        self.recycles = 0
+        self._idle: Optional[asyncio.Queue] = None
+        self._created = 0
+        self._warm_task: Optional[asyncio.Task] = None
+
+    def _get_idle(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        return self._idle
+
+    async def _create(self) -> PooledCrawler:
+        crawler = AsyncWebCrawler(verbose=False)
+        await crawler.__aenter__()
+        logger.info("Started a pooled crawler")
+        return PooledCrawler(crawler)
+
+    async def _close(self, pooled: PooledCrawler) -> None:
+        try:
+            await pooled.crawler.__aexit__(None, None, None)
+        except Exception as e:
+            logger.error(f"Error closing crawler: {e}")
+
+    async def _take(self) -> PooledCrawler:
+        idle = self._get_idle()
+        if idle.empty() and self._created < self.size:
+            self._created += 1
+            try:
+                return await self._create()
+            except BaseException:
+                self._created -= 1
+                raise
+        return await idle.get()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a healthy crawler, recycling it first if needed."""
+        pooled = await self._take()
+        try:
+            if not pooled.is_healthy() or pooled.pages >= self.max_pages:
+                self.recycles += 1
+                await self._close(pooled)
+                pooled = await self._create()
+            yield pooled
+        except BaseException:
+            pooled.broken = True
+            raise
+        finally:
+            pooled.pages += 1
+            self._get_idle().put_nowait(pooled)
+
+    async def crawl(self, url: str):
+        """Crawl a URL with a pooled browser, giving up after the timeout.
+
+        crawl4ai's own page cache is bypassed so that updating a link source
+        fetches the page again instead of re-reading the first crawl.
+        arun reports errors as a failed result rather than raising, so a
+        failure caused by a dead browser marks the crawler as broken.
+        """
+        async with self.acquire() as pooled:
+            self.crawls += 1
+            try:
+                result = await asyncio.wait_for(
+                    pooled.crawler.arun(url=url, bypass_cache=True, verbose=False),
+                    self.timeout,
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Crawling {url} timed out after {self.timeout}s")
+
+            if not result.success and is_browser_error(result.error_message):
+                logger.warning(
+                    f"Crawler failed on {url} with a browser error, recycling it: "
+                    f"{result.error_message}"
+                )
+                pooled.broken = True
+            return result
+
+    async def warm(self) -> None:
+        """Start all browsers ahead of the first crawl."""
+        crawlers: List[PooledCrawler] = []
+        try:
+            while self._created < self.size:
+                crawlers.append(await self._take())
+        except Exception as e:
+            logger.warning(f"Could not warm crawler pool: {e}")
+        finally:
+            for pooled in crawlers:
+                self._get_idle().put_nowait(pooled)
+
+    def start(self) -> None:
+        self._warm_task = asyncio.create_task(self.warm())
+
+    async def stop(self) -> None:
+        if self._warm_task is not None:
+            self._warm_task.cancel()
+            await asyncio.gather(self._warm_task, return_exceptions=True)
+            self._warm_task = None
+
+        idle = self._get_idle()
+        while not idle.empty():
+            await self._close(idle.get_nowait())
+        self._created = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "started": self._created,
+            "idle": self._get_idle().qsize(),
+            "crawls": self.crawls,
+            "recycles": self.recycles,
+        }
+
+
+crawler_pool = CrawlerPool()
@@ -0,0 +1,76 @@
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+DECORATION = "decoration"
+PHOTO = "photo"
+CANDIDATE = "candidate"
+
+MIN_IMAGE_SIDE = 32
+DECORATION_MAX_ENTROPY = 1.0
+DECORATION_MAX_EDGE_DENSITY = 0.01
+PHOTO_MIN_ENTROPY = 6.5
+PHOTO_MIN_COLORS = 512
+PHOTO_MAX_DOMINANT_FRACTION = 0.15
+EDGE_THRESHOLD = 64
+
+
+def image_features(image_content):
+    """Compute entropy, color histogram and edge density features of an image."""
+    img = Image.open(BytesIO(image_content))
+    width, height = img.size
+    img = img.convert("RGB")
+    img.thumbnail((256, 256))
+
+    gray = np.asarray(img.convert("L"), dtype=np.uint8)
+    hist = np.bincount(gray.ravel(), minlength=256) / gray.size
+    hist = hist[hist > 0]
+    entropy = float(-(hist * np.log2(hist)).sum())
+
+    # Quantize to 16 levels per channel to build a 4096-bin color histogram
+    quantized = (np.asarray(img, dtype=np.uint8) >> 4).reshape(-1, 3).astype(np.int32)
+    codes = quantized[:, 0] * 256 + quantized[:, 1] * 16 + quantized[:, 2]
+    color_counts = np.bincount(codes, minlength=4096)
+
+    gray = gray.astype(np.int16)
+    gx = np.abs(np.diff(gray, axis=1))[:-1, :]
+    gy = np.abs(np.diff(gray, axis=0))[:, :-1]
+    edge_density = float(((gx + gy) > EDGE_THRESHOLD).mean()) if gx.size else 0.0
+
+    return {
+        "width": width,
+        "height": height,
+        "entropy": entropy,
+        "color_count": int((color_counts > 0).sum()),
+        "dominant_fraction": float(color_counts.max() / codes.size),
+        "edge_density": edge_density,
+    }
+
+
+def preclassify_image(image_content):
+    """Classify an image locally, without any network call.
+
+    Returns DECORATION for blank, tiny or near-uniform images, PHOTO for
+    natural images (high entropy, many colors, no dominant background) and
+    CANDIDATE for everything that may be a graph, chart or table.
+    """
+    try:
+        features = image_features(image_content)
+    except Exception:
+        return CANDIDATE
+
+    if min(features["width"], features["height"]) < MIN_IMAGE_SIDE:
+        return DECORATION
+    if (
+        features["entropy"] < DECORATION_MAX_ENTROPY
+        and features["edge_density"] < DECORATION_MAX_EDGE_DENSITY
+    ):
+        return DECORATION
+    if (
+        features["entropy"] > PHOTO_MIN_ENTROPY
+        and features["color_count"] > PHOTO_MIN_COLORS
+        and features["dominant_fraction"] < PHOTO_MAX_DOMINANT_FRACTION
+    ):
+        return PHOTO
+    return CANDIDATE
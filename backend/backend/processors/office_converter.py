@@ -0,0 +1,297 @@
+import asyncio
+import os
+import shutil
+import signal
+import xmlrpc.client
+from pathlib import Path
+from typing import Dict, Optional
+
+from backend.config import (
+    LIBREOFFICE_BIN,
+    OFFICE_CONVERSION_TIMEOUT,
+    OFFICE_CONVERTER_SLOTS,
+    OFFICE_PROFILE_DIR,
+    UNOSERVER_BASE_PORT,
+    UNOSERVER_BIN,
+    logger,
+)
+
+OFFICE_EXTENSIONS = (".doc", ".docx", ".odt", ".rtf", ".xls", ".xlsx", ".ods")
+
+
+class OfficeConversionError(Exception):
+    """Raised when LibreOffice fails or times out converting a document."""
+
+
+class TimeoutTransport(xmlrpc.client.Transport):
+    """XML-RPC transport whose connections give up after a timeout."""
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class OfficeConverter:
+    """Pool of headless LibreOffice slots converting office files to PDF.
+
+    When unoserver is installed, each slot keeps a LibreOffice instance
+    running behind its own unoserver, so a conversion is an XML-RPC call to
+    a warm instance instead of a cold start. Otherwise each conversion starts
+    soffice as an async subprocess. Either way each slot has its own user
+    profile, so concurrent conversions never contend for the profile lock.
+    A conversion that exceeds the timeout has the slot's process group
+    killed and its profile reset before the slot is reused.
+    """
+
+    def __init__(
+        self,
+        slots: int = OFFICE_CONVERTER_SLOTS,
+        timeout: float = OFFICE_CONVERSION_TIMEOUT,
+        binary: str = LIBREOFFICE_BIN,
+        profile_root: str = OFFICE_PROFILE_DIR,
+        unoserver: str = UNOSERVER_BIN,
+        base_port: int = UNOSERVER_BASE_PORT,
+    ):
+        self.slots = slots
+        self.timeout = timeout
+        self.binary = binary
+        self.profile_root = profile_root
+        self.unoserver = unoserver
+        self.base_port = base_port
+        self.conversions = 0
+        self.failures = 0
+        self.recycles = 0
+        self._free_slots: Optional[asyncio.Queue] = None
+        self._warm_task: Optional[asyncio.Task] = None
+        self._use_servers = False
+        self._servers: Dict[int, asyncio.subprocess.Process] = {}
+
+    def _get_free_slots(self) -> asyncio.Queue:
+        if self._free_slots is None:
+            self._free_slots = asyncio.Queue()
+            for slot in range(self.slots):
+                self._free_slots.put_nowait(slot)
+        return self._free_slots
+
+    def _profile_dir(self, slot: int) -> str:
+        return os.path.join(self.profile_root, f"slot{slot}")
+
+    def _command(self, slot: int, *args: str) -> list:
+        profile_uri = Path(self._profile_dir(slot)).absolute().as_uri()
+        return [
+            self.binary,
+            f"-env:UserInstallation={profile_uri}",
+            "--headless",
+            "--norestore",
+            "--nologo",
+            *args,
+        ]
+
+    async def _run(self, slot: int, *args: str) -> None:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self._command(slot, *args),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+        except FileNotFoundError:
+            raise OfficeConversionError(f"{self.binary} is not installed")
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+        except BaseException as e:
+            # soffice forks soffice.bin, so kill the whole process group
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            self._recycle(slot)
+            if isinstance(e, asyncio.TimeoutError):
+                raise OfficeConversionError(
+                    f"LibreOffice timed out after {self.timeout}s"
+                )
+            raise
+
+        if process.returncode != 0:
+            error = stderr.decode(errors="ignore")
+            raise OfficeConversionError(
+                f"LibreOffice exited with {process.returncode}: {error}"
+            )
+
+    def _port(self, slot: int) -> int:
+        return self.base_port + 2 * slot
+
+    async def _start_server(self, slot: int) -> None:
+        """Start the slot's unoserver and wait until it accepts requests."""
+        port = self._port(slot)
+        process = await asyncio.create_subprocess_exec(
+            self.unoserver,
+            "--interface",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--uno-port",
+            str(port + 1),
+            "--executable",
+            self.binary,
+            "--user-installation",
+            self._profile_dir(slot),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        self._servers[slot] = process
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+            except OSError:
+                if process.returncode is not None or loop.time() > deadline:
+                    await self._stop_server(slot)
+                    raise OfficeConversionError(
+                        f"unoserver for slot {slot} did not start"
+                    )
+                await asyncio.sleep(0.2)
+                continue
+            writer.close()
+            await writer.wait_closed()
+            logger.info(f"Started LibreOffice instance for slot {slot} on {port}")
+            return
+
+    async def _stop_server(self, slot: int) -> None:
+        process = self._servers.pop(slot, None)
+        if process is None:
+            return
+        # unoserver forks soffice.bin, so kill the whole process group
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+    def _server_convert(
+        self, slot: int, input_path: str, output_path: str, target: str
+    ) -> None:
+        with xmlrpc.client.ServerProxy(
+            f"http://127.0.0.1:{self._port(slot)}",
+            transport=TimeoutTransport(self.timeout),
+            allow_none=True,
+        ) as proxy:
+            proxy.convert(input_path, None, output_path, target)
+
+    async def _convert_on_server(
+        self, slot: int, input_path: str, output_path: str, target: str
+    ) -> None:
+        if slot not in self._servers:
+            await self._start_server(slot)
+        try:
+            await asyncio.wait_for(
+                asyncio.to_thread(
+                    self._server_convert, slot, input_path, output_path, target
+                ),
+                self.timeout,
+            )
+        except xmlrpc.client.Fault as e:
+            # The instance is fine, the document could not be converted
+            raise OfficeConversionError(f"LibreOffice failed: {e.faultString}")
+        except BaseException as e:
+            # The instance may still be busy with the document, replace it
+            await self._stop_server(slot)
+            self._recycle(slot)
+            if isinstance(e, asyncio.TimeoutError):
+                raise OfficeConversionError(
+                    f"LibreOffice timed out after {self.timeout}s"
+                )
+            if isinstance(e, (OSError, xmlrpc.client.Error)):
+                raise OfficeConversionError(f"unoserver request failed: {e}")
+            raise
+
+    def _recycle(self, slot: int) -> None:
+        """Reset a slot's profile, which a killed instance may leave locked."""
+        self.recycles += 1
+        shutil.rmtree(self._profile_dir(slot), ignore_errors=True)
+        logger.warning(f"Recycled LibreOffice slot {slot}")
+
+    async def convert(self, input_path: str, output_dir: str, target: str = "pdf") -> str:
+        """Convert a file with a free slot and return the converted file's path."""
+        name = os.path.splitext(os.path.basename(input_path))[0]
+        output_path = os.path.join(output_dir, f"{name}.{target}")
+        free_slots = self._get_free_slots()
+        slot = await free_slots.get()
+        try:
+            if self._use_servers:
+                await self._convert_on_server(slot, input_path, output_path, target)
+            else:
+                await self._run(
+                    slot, "--convert-to", target, "--outdir", output_dir, input_path
+                )
+        except OfficeConversionError:
+            self.failures += 1
+            raise
+        finally:
+            free_slots.put_nowait(slot)
+
+        if not os.path.exists(output_path):
+            self.failures += 1
+            raise OfficeConversionError(
+                f"LibreOffice produced no output for {input_path}"
+            )
+        self.conversions += 1
+        return output_path
+
+    async def warm(self) -> None:
+        """Start or initialize every slot ahead of the first conversion."""
+        free_slots = self._get_free_slots()
+        for _ in range(self.slots):
+            slot = await free_slots.get()
+            try:
+                if self._use_servers:
+                    await self._start_server(slot)
+                elif not os.path.isdir(self._profile_dir(slot)):
+                    await self._run(slot, "--terminate_after_init")
+            except Exception as e:
+                logger.warning(f"Could not warm LibreOffice slot {slot}: {e}")
+            finally:
+                free_slots.put_nowait(slot)
+        logger.info(f"Warmed {self.slots} LibreOffice slots")
+
+    def start(self) -> None:
+        if shutil.which(self.binary) is None:
+            logger.warning(f"{self.binary} not found, office conversion is unavailable")
+            return
+        self._use_servers = shutil.which(self.unoserver) is not None
+        if not self._use_servers:
+            logger.warning(
+                f"{self.unoserver} not found, every office conversion starts "
+                f"{self.binary} from cold"
+            )
+        self._warm_task = asyncio.create_task(self.warm())
+
+    async def stop(self) -> None:
+        if self._warm_task is not None:
+            self._warm_task.cancel()
+            await asyncio.gather(self._warm_task, return_exceptions=True)
+            self._warm_task = None
+        for slot in list(self._servers):
+            await self._stop_server(slot)
+
+    def stats(self) -> dict:
+        return {
+            "slots": self.slots,
+            "free_slots": self._get_free_slots().qsize(),
+            "warm_instances": len(self._servers),
+            "conversions": self.conversions,
+            "failures": self.failures,
+            "recycles": self.recycles,
+        }
+
+
+office_converter = OfficeConverter()
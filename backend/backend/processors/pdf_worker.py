@@ -0,0 +1,159 @@
+"""CPU-bound PyMuPDF extraction that runs inside worker processes.
+
+This module is imported by spawned workers, so it must stay free of
+``backend.config`` (and the model clients it creates).
+"""
+
+import io
+import logging
+import os
+from collections import OrderedDict
+
+import fitz
+
+logger = logging.getLogger(__name__)
+
+MAX_OPEN_DOCUMENTS = 8
+
+_documents: "OrderedDict[tuple, fitz.Document]" = OrderedDict()
+
+
+def open_document(pdf_path: str) -> fitz.Document:
+    """Return this worker's handle for a PDF, opening it on first use.
+
+    Handles are cached per worker keyed by path and modification time, so
+    pages of the same file reuse one handle. Opening from the path lets
+    MuPDF read pages on demand instead of holding the file in memory.
+    """
+    key = (pdf_path, os.path.getmtime(pdf_path))
+    document = _documents.get(key)
+    if document is None:
+        document = fitz.open(pdf_path)
+        _documents[key] = document
+        while len(_documents) > MAX_OPEN_DOCUMENTS:
+            _, evicted = _documents.popitem(last=False)
+            evicted.close()
+    _documents.move_to_end(key)
+    return document
+
+
+def get_page_count(pdf_path: str) -> int:
+    return len(open_document(pdf_path))
+
+
+def extract_text_blocks(page, crop_margins: bool = True):
+    """Return the text blocks of a page.
+
+    With crop_margins, blocks in the top and bottom 10% of the page are
+    skipped as headers and footers.
+    """
+    height = page.rect.height
+    return [
+        tuple(block)
+        for block in page.get_text("blocks", sort=True)
+        if block[-1] == 0
+        and not (crop_margins and (block[1] < height * 0.1 or block[3] > height * 0.9))
+    ]
+
+
+def dataframe_to_parquet(df) -> bytes:
+    """Serialize a table to Parquet, making its column names unique strings."""
+    columns = []
+    for col in df.columns:
+        name = str(col)
+        while name in columns:
+            name += "_"
+        columns.append(name)
+    df.columns = columns
+
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def extract_tables(page, pagenum):
+    """Extract tables, their dataframes and cropped images from a page.
+
+    Tables are returned as Parquet bytes and crops as PNG bytes; the caller
+    stores them in the artifact store.
+    """
+    tables = []
+    try:
+        found = page.find_tables(
+            horizontal_strategy="lines_strict", vertical_strategy="lines_strict"
+        )
+    except Exception as e:
+        logger.error(f"Error during table extraction on page {pagenum+1}: {e}")
+        return tables
+
+    for table_ctr, tab in enumerate(found.tables, 1):
+        try:
+            if tab.header.external:
+                continue
+            pandas_df = tab.to_pandas()
+            bbox = fitz.Rect(tab.bbox)
+            table_img = page.get_pixmap(clip=bbox)
+
+            tables.append(
+                {
+                    "index": table_ctr,
+                    "bbox": tuple(bbox),
+                    "columns": [str(col) for col in pandas_df.columns.values],
+                    "header_names": [str(name) for name in tab.header.names],
+                    "dataframe_bytes": dataframe_to_parquet(pandas_df),
+                    "image_bytes": table_img.tobytes("png"),
+                }
+            )
+        except Exception as e:
+            logger.error(f"Error extracting table {table_ctr} on page {pagenum+1}: {e}")
+    return tables
+
+
+def extract_images(page, pagenum):
+    """Extract embedded images large enough to be worth describing."""
+    images = []
+    for image_info in page.get_image_info(xrefs=True):
+        xref = image_info["xref"]
+        if xref == 0:
+            continue
+
+        img_bbox = fitz.Rect(image_info["bbox"])
+        if (
+            img_bbox.width < page.rect.width / 20
+            or img_bbox.height < page.rect.height / 20
+        ):
+            continue
+
+        try:
+            extracted = page.parent.extract_image(xref)
+            images.append(
+                {
+                    "xref": xref,
+                    "bbox": tuple(img_bbox),
+                    "extension": extracted["ext"],
+                    "image_bytes": extracted["image"],
+                }
+            )
+        except Exception as e:
+            logger.error(f"Error extracting image {xref} on page {pagenum+1}: {e}")
+    return images
+
+
+def extract_page(pdf_path: str, pagenum: int, crop_margins: bool = True) -> dict:
+    """Extract everything needed to build the Documents of a single page.
+
+    Returns plain picklable data so it can cross the process boundary.
+    """
+    page = open_document(pdf_path)[pagenum]
+    return {
+        "pagenum": pagenum,
+        "page_height": page.rect.height,
+        "text_blocks": extract_text_blocks(page, crop_margins),
+        "tables": extract_tables(page, pagenum),
+        "images": extract_images(page, pagenum),
+    }
+
+
+def render_page(pdf_path: str, pagenum: int, dpi: int = 72) -> bytes:
+    """Render a page to PNG bytes at the given resolution."""
+    return open_document(pdf_path)[pagenum].get_pixmap(dpi=dpi).tobytes("png")
@@ -1,215 +1,288 @@
+import asyncio
 import os
-import shutil
-import subprocess
-import tempfile
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Set
 
 import fitz
 from fastapi import UploadFile
 from llama_index.core import Document, SimpleDirectoryReader
 from pptx import Presentation
-
-from backend.config import logger
-
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.shapes.placeholder import PlaceholderPicture
+
+from backend.artifacts import artifact_store
+from backend.config import (
+    PDF_PAGE_CONCURRENCY,
+    PDF_PAGE_TIMEOUT,
+    SLIDE_CONCURRENCY,
+    SLIDE_RENDER_DPI,
+    VISION_CONCURRENCY,
+    logger,
+)
+from backend.cpu_executor import cpu_executor
+from backend.jobs import report_progress
+from backend.nim_client import count_calls
+from backend.workspace import Workspace
+
+from .office_converter import (
+    OFFICE_EXTENSIONS,
+    OfficeConversionError,
+    office_converter,
+)
+from .pdf_worker import extract_page, get_page_count, render_page
 from .utils import (
-    async_timeout,
-    describe_image,
+    analyze_image,
     extract_text_around_item,
-    is_graph,
     process_graph,
     process_text_blocks,
-    save_uploaded_file,
+    spool_uploaded_file,
 )
 
 # TODO: Split into separate files
 
+_failed_pages: ContextVar[Optional[Set[int]]] = ContextVar("failed_pages", default=None)
+
+
+@contextmanager
+def track_failed_pages():
+    """Collect the numbers of the PDF pages that fail to parse in this context.
+
+    Nested calls share the set of the outermost one.
+    """
+    failed_pages = _failed_pages.get()
+    if failed_pages is None:
+        failed_pages = set()
+    token = _failed_pages.set(failed_pages)
+    try:
+        yield failed_pages
+    finally:
+        _failed_pages.reset(token)
+
 
 async def get_pdf_documents(
-    pdf_file: UploadFile, research_id: str, reference_id: str
+    pdf_file: UploadFile, research_id: str, reference_id: str, workspace: Workspace
 ) -> List[Document]:
-    """Process a PDF file and extract text, tables, and images."""
-    all_pdf_documents = []
-    ongoing_tables = {}
+    """Process an uploaded PDF file and extract text, tables, and images."""
+    logger.info(f"Reading PDF file: {pdf_file.filename}")
+    pdf_path = await spool_uploaded_file(pdf_file, workspace.subdir("uploads"))
+    return await get_pdf_path_documents(
+        pdf_path, pdf_file.filename, research_id, reference_id
+    )
+
+
+async def get_pdf_path_documents(
+    pdf_path: str,
+    filename: str,
+    research_id: str,
+    reference_id: str,
+    crop_margins: bool = True,
+) -> List[Document]:
+    """Process a PDF on disk and extract text, tables, and images.
 
+    Pages are extracted in parallel in the shared CPU pool while their vision calls
+    run concurrently on the event loop. Documents are returned in page order.
+    crop_margins drops text in the top and bottom 10% of each page as headers
+    and footers; PDFs rendered from office documents have none to drop.
+    """
     try:
-        logger.info(f"Reading PDF file: {pdf_file.filename}")
-        pdf_content = await pdf_file.read()  # Await the read coroutine
-        f = fitz.open(stream=pdf_content, filetype="pdf")
-        logger.info(f"Successfully opened PDF file: {pdf_file.filename}")
+        page_count = await cpu_executor.run(get_page_count, pdf_path)
+        logger.info(f"Successfully opened PDF file: {filename}")
     except Exception as e:
         logger.error(f"Error opening or processing the PDF file: {e}")
         return []
 
-    for i in range(len(f)):
-        page = f[i]
-        logger.info(f"Processing page {i+1} of {len(f)}")
-        text_blocks = [
-            block
-            for block in page.get_text("blocks", sort=True)
-            if block[-1] == 0
-            and not (
-                block[1] < page.rect.height * 0.1 or block[3] > page.rect.height * 0.9
-            )
-        ]
-        grouped_text_blocks = process_text_blocks(text_blocks)
-
-        table_docs, table_bboxes, ongoing_tables = await parse_all_tables(
-            pdf_file.filename, page, i, text_blocks, ongoing_tables
-        )
-        all_pdf_documents.extend(table_docs)
-        logger.info(f"Extracted {len(table_docs)} tables from page {i+1}")
+    page_semaphore = asyncio.Semaphore(PDF_PAGE_CONCURRENCY)
+    vision_semaphore = asyncio.Semaphore(VISION_CONCURRENCY)
+    start_time = time.perf_counter()
 
-        image_docs = await parse_all_images(pdf_file.filename, page, i, text_blocks)
-        all_pdf_documents.extend(image_docs)
-        logger.info(f"Extracted {len(image_docs)} images from page {i+1}")
+    with count_calls() as remote_calls:
 
-        for text_block_ctr, (heading_block, content) in enumerate(
-            grouped_text_blocks, 1
-        ):
-            heading_bbox = fitz.Rect(heading_block[:4])
-            if not any(
-                heading_bbox.intersects(table_bbox) for table_bbox in table_bboxes
-            ):
-                bbox = {
-                    "x1": heading_block[0],
-                    "y1": heading_block[1],
-                    "x2": heading_block[2],
-                    "x3": heading_block[3],
-                }
-                text_doc = Document(
-                    text=f"{heading_block[4]}\n{content}",
-                    metadata={
-                        **bbox,
-                        "type": "text",
-                        "page_num": i,
-                        "source": f"{pdf_file.filename[:-4]}-page{i}-block{text_block_ctr}",
-                        "research_id": research_id,
-                        "reference_id": reference_id,
-                        "filename": pdf_file.filename,
-                        "created_at": datetime.utcnow().isoformat(),
-                    },
-                )
-                all_pdf_documents.append(text_doc)
-        logger.info(f"Extracted {len(grouped_text_blocks)} text blocks from page {i+1}")
+        async def process_page(pagenum):
+            async with page_semaphore:
+                logger.info(f"Processing page {pagenum+1} of {page_count}")
+                try:
+                    page_data = await cpu_executor.run(
+                        extract_page,
+                        pdf_path,
+                        pagenum,
+                        crop_margins,
+                        timeout=PDF_PAGE_TIMEOUT,
+                    )
+                    page_documents = await get_page_documents(
+                        page_data,
+                        filename,
+                        research_id,
+                        reference_id,
+                        vision_semaphore,
+                    )
+                except Exception:
+                    # Shown in the job status, so a partial ingest is not
+                    # mistaken for a complete one
+                    await report_progress(pages_failed=1)
+                    raise
+                await report_progress(pages_processed=1)
+                return page_documents
+
+        page_results = await asyncio.gather(
+            *(process_page(i) for i in range(page_count)), return_exceptions=True
+        )
 
-    f.close()
-    logger.info(f"Completed processing PDF file: {pdf_file.filename}")
+    all_pdf_documents = []
+    failed_pages = _failed_pages.get()
+    pages_failed = 0
+    for pagenum, page_documents in enumerate(page_results):
+        if isinstance(page_documents, BaseException):
+            logger.error(f"Error processing page {pagenum+1}: {page_documents}")
+            pages_failed += 1
+            if failed_pages is not None:
+                failed_pages.add(pagenum)
+            continue
+        all_pdf_documents.extend(page_documents)
+
+    elapsed = time.perf_counter() - start_time
+    logger.info(
+        f"Completed processing PDF file: {filename} "
+        f"({page_count} pages in {elapsed:.2f}s, {pages_failed} failed, "
+        f"{page_count / elapsed if elapsed else 0:.2f} pages/sec, "
+        f"{remote_calls['calls']} remote model calls)"
+    )
     return all_pdf_documents
 
 
-@async_timeout(20)
-async def process_single_table(tab, text_blocks, page, pagenum, filename, table_docs):
-    """Process a single table with timeout"""
-    try:
-        if not tab.header.external:
-            pandas_df = tab.to_pandas()
-            # ...existing table processing code...
-            tablerefdir = os.path.join(os.getcwd(), "vectorstore/table_references")
-            os.makedirs(tablerefdir, exist_ok=True)
-
-            df_xlsx_path = os.path.join(
-                tablerefdir, f"table{len(table_docs)+1}-page{pagenum}.xlsx"
-            )
-            pandas_df.to_excel(df_xlsx_path)
-            bbox = fitz.Rect(tab.bbox)
-
-            before_text, after_text = extract_text_around_item(
-                text_blocks, bbox, page.rect.height
-            )
-            table_img = page.get_pixmap(clip=bbox)
-            table_img_path = os.path.join(
-                tablerefdir, f"table{len(table_docs)+1}-page{pagenum}.jpg"
-            )
-            table_img.save(table_img_path)
-            description = process_graph(table_img.tobytes())
-
-            caption = (
-                before_text.replace("\n", " ")
-                + description
-                + after_text.replace("\n", " ")
-            )
-            if before_text == "" and after_text == "":
-                caption = " ".join(tab.header.names)
-
-            table_metadata = {
-                "source": f"{filename[:-4]}-page{pagenum}-table{len(table_docs)+1}",
-                "dataframe": df_xlsx_path,
-                "image": table_img_path,
-                "caption": caption,
-                "type": "table",
-                "page_num": pagenum,
+async def get_page_documents(
+    page_data, filename, research_id, reference_id, vision_semaphore
+) -> List[Document]:
+    """Build the Documents of a single extracted PDF page."""
+    pagenum = page_data["pagenum"]
+    text_blocks = page_data["text_blocks"]
+    page_metadata = {
+        "research_id": research_id,
+        "reference_id": reference_id,
+        "filename": filename,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    page_documents = []
+
+    (table_docs, table_bboxes), image_docs = await asyncio.gather(
+        parse_all_tables(filename, page_data, vision_semaphore),
+        parse_all_images(filename, page_data, vision_semaphore),
+    )
+    page_documents.extend(table_docs)
+    logger.info(f"Extracted {len(table_docs)} tables from page {pagenum+1}")
+    page_documents.extend(image_docs)
+    logger.info(f"Extracted {len(image_docs)} images from page {pagenum+1}")
+
+    grouped_text_blocks = process_text_blocks(text_blocks)
+    for text_block_ctr, (heading_block, content) in enumerate(grouped_text_blocks, 1):
+        heading_bbox = fitz.Rect(heading_block[:4])
+        if not any(heading_bbox.intersects(table_bbox) for table_bbox in table_bboxes):
+            bbox = {
+                "x1": heading_block[0],
+                "y1": heading_block[1],
+                "x2": heading_block[2],
+                "x3": heading_block[3],
             }
-
-            all_cols = ", ".join(list(pandas_df.columns.values))
-            return Document(
-                text=f"This is a table with the caption: {caption}\nThe columns are {all_cols}",
-                metadata=table_metadata,
+            text_doc = Document(
+                text=f"{heading_block[4]}\n{content}",
+                metadata={
+                    **bbox,
+                    "type": "text",
+                    "page_num": pagenum,
+                    "source": f"{filename[:-4]}-page{pagenum}-block{text_block_ctr}",
+                    **page_metadata,
+                },
             )
-    except Exception as e:
-        logger.error(f"Error processing table: {e}")
-        return None
+            page_documents.append(text_doc)
+    logger.info(
+        f"Extracted {len(grouped_text_blocks)} text blocks from page {pagenum+1}"
+    )
 
+    for doc in table_docs + image_docs:
+        doc.metadata.update(page_metadata)
+    return page_documents
 
-async def parse_all_tables(filename, page, pagenum, text_blocks, ongoing_tables):
-    """Extract tables from a PDF page."""
-    table_docs = []
-    table_bboxes = []
 
+async def process_single_table(table, text_blocks, page_height, pagenum, filename):
+    """Process a single table"""
     try:
-        logger.info(f"Finding tables on page {pagenum+1}")
-        tables = page.find_tables(
-            horizontal_strategy="lines_strict", vertical_strategy="lines_strict"
+        bbox = fitz.Rect(table["bbox"])
+        before_text, after_text = extract_text_around_item(
+            text_blocks, bbox, page_height
         )
-        logger.info(f"Found {len(tables.tables)} tables on page {pagenum+1}")
+        description = await process_graph(table["image_bytes"])
 
-        for tab in tables.tables:
-            doc = await process_single_table(
-                tab, text_blocks, page, pagenum, filename, table_docs
-            )
-            if doc:
-                table_docs.append(doc)
-                table_bboxes.append(fitz.Rect(tab.bbox))
+        caption = (
+            before_text.replace("\n", " ")
+            + description
+            + after_text.replace("\n", " ")
+        )
+        if before_text == "" and after_text == "":
+            caption = " ".join(table["header_names"])
 
-    except Exception as e:
-        logger.error(f"Error during table extraction: {e}")
+        table_metadata = {
+            "source": f"{filename[:-4]}-page{pagenum}-table{table['index']}",
+            "dataframe": await artifact_store.put(table["dataframe_bytes"], "parquet"),
+            "image": await artifact_store.put(table["image_bytes"], "png"),
+            "caption": caption,
+            "type": "table",
+            "page_num": pagenum,
+        }
 
-    return table_docs, table_bboxes, ongoing_tables
+        all_cols = ", ".join(table["columns"])
+        return Document(
+            text=f"This is a table with the caption: {caption}\nThe columns are {all_cols}",
+            metadata=table_metadata,
+        )
+    except Exception as e:
+        logger.error(f"Error processing table: {e}")
+        return None
 
 
-@async_timeout(20)
-async def process_single_image(image_info, page, pagenum, text_blocks, filename):
-    """Process a single image with timeout"""
-    xref = image_info["xref"]
-    if xref == 0:
-        return None
+async def parse_all_tables(filename, page_data, vision_semaphore):
+    """Build documents for the tables extracted from a PDF page."""
+    pagenum = page_data["pagenum"]
+    tables = page_data["tables"]
+    logger.info(f"Found {len(tables)} tables on page {pagenum+1}")
+
+    async def process_table(table):
+        async with vision_semaphore:
+            return await process_single_table(
+                table,
+                page_data["text_blocks"],
+                page_data["page_height"],
+                pagenum,
+                filename,
+            )
 
-    # ...existing image processing code...
-    img_bbox = fitz.Rect(image_info["bbox"])
-    if img_bbox.width < page.rect.width / 20 or img_bbox.height < page.rect.height / 20:
-        return None
+    docs = await asyncio.gather(*(process_table(table) for table in tables))
 
-    try:
-        extracted_image = page.parent.extract_image(xref)
-        image_data = extracted_image["image"]
+    table_docs = []
+    table_bboxes = []
+    for table, doc in zip(tables, docs):
+        if doc:
+            table_docs.append(doc)
+            table_bboxes.append(fitz.Rect(table["bbox"]))
 
-        # Process image and create metadata
-        imgrefpath = os.path.join(os.getcwd(), "vectorstore/image_references")
-        os.makedirs(imgrefpath, exist_ok=True)
-        image_path = os.path.join(imgrefpath, f"image{xref}-page{pagenum}.png")
+    return table_docs, table_bboxes
 
-        with open(image_path, "wb") as img_file:
-            img_file.write(image_data)
 
+async def process_single_image(image, page_height, pagenum, text_blocks, filename):
+    """Process a single image"""
+    try:
+        img_bbox = fitz.Rect(image["bbox"])
         before_text, after_text = extract_text_around_item(
-            text_blocks, img_bbox, page.rect.height
+            text_blocks, img_bbox, page_height
         )
         if before_text == "" and after_text == "":
             return None
 
+        image_data = image["image_bytes"]
         image_description = " "
-        if is_graph(image_data):
-            image_description = process_graph(image_data)
+        if (await analyze_image(image_data))["is_graph"]:
+            image_description = await process_graph(image_data)
 
         caption = (
             before_text.replace("\n", " ")
@@ -218,8 +291,8 @@ async def process_single_image(image_info, page, pagenum, text_blocks, filename)
         )
 
         image_metadata = {
-            "source": f"{filename[:-4]}-page{pagenum}-image{xref}",
-            "image": image_path,
+            "source": f"{filename[:-4]}-page{pagenum}-image{image['xref']}",
+            "image": await artifact_store.put(image_data, image["extension"]),
             "caption": caption,
             "type": "image",
             "page_num": pagenum,
@@ -234,107 +307,127 @@ async def process_single_image(image_info, page, pagenum, text_blocks, filename)
         return None
 
 
-async def parse_all_images(filename, page, pagenum, text_blocks):
-    """Extract images from a PDF page."""
-    image_docs = []
-    image_info_list = page.get_image_info(xrefs=True)
-
+async def parse_all_images(filename, page_data, vision_semaphore):
+    """Build documents for the images extracted from a PDF page."""
+    pagenum = page_data["pagenum"]
     logger.info(f"Finding images on page {pagenum+1}")
-    for image_info in image_info_list:
-        doc = await process_single_image(
-            image_info, page, pagenum, text_blocks, filename
-        )
-        if doc:
-            image_docs.append(doc)
+
+    async def process_image(image):
+        async with vision_semaphore:
+            return await process_single_image(
+                image,
+                page_data["page_height"],
+                pagenum,
+                page_data["text_blocks"],
+                filename,
+            )
+
+    docs = await asyncio.gather(
+        *(process_image(image) for image in page_data["images"])
+    )
+    image_docs = [doc for doc in docs if doc]
 
     logger.info(f"Found {len(image_docs)} images on page {pagenum+1}")
     return image_docs
 
 
-def process_ppt_file(
-    ppt_path: str, research_id: str, reference_id: str, filename: str
+async def process_ppt_file(
+    ppt_path: str,
+    research_id: str,
+    reference_id: str,
+    filename: str,
+    workspace: Workspace,
 ) -> List[Document]:
-    """Process a PowerPoint file."""
-    pdf_path = convert_ppt_to_pdf(ppt_path)
-    images_data = convert_pdf_to_images(pdf_path)
-    slide_texts = extract_text_and_notes_from_ppt(ppt_path)
-    processed_data = []
-
-    for (image_path, page_num), (slide_text, notes) in zip(images_data, slide_texts):
-        if notes:
-            notes = "\n\nThe speaker notes for this slide are: " + notes
-
-        with open(image_path, "rb") as image_file:
-            image_content = image_file.read()
-
-        image_description = " "
-        if is_graph(image_content):
-            image_description = process_graph(image_content)
-
-        image_metadata = {
-            "source": f"{os.path.basename(ppt_path)}",
-            "image": image_path,
-            "caption": slide_text + image_description + notes,
-            "type": "image",
-            "page_num": page_num,
-            "research_id": research_id,
-            "reference_id": reference_id,
-            "filename": filename,
-            "created_at": datetime.utcnow().isoformat(),
-        }
-        processed_data.append(
-            Document(
+    """Process a PowerPoint file.
+
+    Only slides with pictures, charts or tables are rendered and sent to the
+    vision model; text-only slides are indexed from their text alone.
+    Slides are analyzed concurrently, at most SLIDE_CONCURRENCY at a time.
+    """
+    pdf_path = await office_converter.convert(
+        ppt_path, workspace.subdir("ppt_references")
+    )
+    slides = await asyncio.to_thread(extract_text_and_notes_from_ppt, ppt_path)
+    page_count = await cpu_executor.run(get_page_count, pdf_path)
+    slide_semaphore = asyncio.Semaphore(SLIDE_CONCURRENCY)
+
+    async def process_slide(page_num, slide_text, notes, has_visuals):
+        async with slide_semaphore:
+            if notes:
+                notes = "\n\nThe speaker notes for this slide are: " + notes
+
+            image_metadata = {}
+            image_description = " "
+            if has_visuals:
+                image_content = await cpu_executor.run(
+                    render_page, pdf_path, page_num, SLIDE_RENDER_DPI
+                )
+                image_metadata["image"] = await artifact_store.put(image_content, "png")
+                if (await analyze_image(image_content))["is_graph"]:
+                    image_description = await process_graph(image_content)
+
+            image_metadata.update(
+                {
+                    "source": filename,
+                    "caption": slide_text + image_description + notes,
+                    "type": "image",
+                    "page_num": page_num,
+                    "research_id": research_id,
+                    "reference_id": reference_id,
+                    "filename": filename,
+                    "created_at": datetime.utcnow().isoformat(),
+                }
+            )
+            await report_progress(pages_processed=1)
+            return Document(
                 text="This is a slide with the text: " + slide_text + image_description,
                 metadata=image_metadata,
             )
-        )
 
-    return processed_data
-
-
-def convert_ppt_to_pdf(ppt_path):
-    """Convert a PowerPoint file to PDF using LibreOffice."""
-    base_name = os.path.basename(ppt_path)
-    ppt_name_without_ext = os.path.splitext(base_name)[0].replace(" ", "_")
-    new_dir_path = os.path.abspath("vectorstore/ppt_references")
-    os.makedirs(new_dir_path, exist_ok=True)
-    pdf_path = os.path.join(new_dir_path, f"{ppt_name_without_ext}.pdf")
-    command = [
-        "libreoffice",
-        "--headless",
-        "--convert-to",
-        "pdf",
-        "--outdir",
-        new_dir_path,
-        ppt_path,
-    ]
-    subprocess.run(command, check=True)
-    return pdf_path
-
-
-def convert_pdf_to_images(pdf_path):
-    """Convert a PDF file to a series of images using PyMuPDF."""
-    doc = fitz.open(pdf_path)
-    base_name = os.path.basename(pdf_path)
-    pdf_name_without_ext = os.path.splitext(base_name)[0].replace(" ", "_")
-    new_dir_path = os.path.join(os.getcwd(), "vectorstore/ppt_references")
-    os.makedirs(new_dir_path, exist_ok=True)
-    image_paths = []
-
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        pix = page.get_pixmap()
-        output_image_path = os.path.join(
-            new_dir_path, f"{pdf_name_without_ext}_{page_num:04d}.png"
+    slides = slides[:page_count]
+    processed_data = await asyncio.gather(
+        *(
+            process_slide(page_num, slide_text, notes, has_visuals)
+            for page_num, (slide_text, notes, has_visuals) in enumerate(slides)
         )
-        pix.save(output_image_path)
-        image_paths.append((output_image_path, page_num))
-    doc.close()
-    return image_paths
+    )
+    logger.info(
+        f"Processed {len(processed_data)} slides of {filename}, "
+        f"{sum(has_visuals for _, _, has_visuals in slides)} sent to vision"
+    )
+    return list(processed_data)
+
+
+VISUAL_SHAPE_TYPES = {
+    MSO_SHAPE_TYPE.PICTURE,
+    MSO_SHAPE_TYPE.LINKED_PICTURE,
+    MSO_SHAPE_TYPE.CHART,
+    MSO_SHAPE_TYPE.TABLE,
+    MSO_SHAPE_TYPE.DIAGRAM,
+    MSO_SHAPE_TYPE.EMBEDDED_OLE_OBJECT,
+    MSO_SHAPE_TYPE.LINKED_OLE_OBJECT,
+    MSO_SHAPE_TYPE.MEDIA,
+}
+
+
+def has_visual_shapes(shapes) -> bool:
+    """Whether any shape, including those in groups, is more than text."""
+    for shape in shapes:
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            if has_visual_shapes(shape.shapes):
+                return True
+        elif (
+            shape.shape_type in VISUAL_SHAPE_TYPES
+            or getattr(shape, "has_chart", False)
+            or getattr(shape, "has_table", False)
+            or isinstance(shape, PlaceholderPicture)
+        ):
+            return True
+    return False
 
 
 def extract_text_and_notes_from_ppt(ppt_path):
-    """Extract text and notes from a PowerPoint file."""
+    """Extract text, notes and whether it has visual content for each slide."""
     prs = Presentation(ppt_path)
     text_and_notes = []
     for slide in prs.slides:
@@ -345,29 +438,87 @@ def extract_text_and_notes_from_ppt(ppt_path):
             notes = slide.notes_slide.notes_text_frame.text if slide.notes_slide else ""
         except:
             notes = ""
-        text_and_notes.append((slide_text, notes))
+        text_and_notes.append((slide_text, notes, has_visual_shapes(slide.shapes)))
     return text_and_notes
 
 
+async def process_office_file(
+    file_path: str,
+    research_id: str,
+    reference_id: str,
+    filename: str,
+    workspace: Workspace,
+) -> List[Document]:
+    """Process an office document through its PDF rendering.
+
+    Falls back to plain text extraction if LibreOffice cannot convert it.
+    """
+    try:
+        pdf_path = await office_converter.convert(
+            file_path, workspace.subdir("office_references")
+        )
+    except OfficeConversionError as e:
+        logger.warning(f"Falling back to text extraction for {filename}: {e}")
+        return await load_with_reader(file_path, filename, research_id, reference_id)
+
+    return await get_pdf_path_documents(
+        pdf_path, filename, research_id, reference_id, crop_margins=False
+    )
+
+
+async def load_with_reader(
+    file_path: str, filename: str, research_id: str, reference_id: str
+) -> List[Document]:
+    """Load a file with SimpleDirectoryReader."""
+    reader = SimpleDirectoryReader(input_files=[file_path])
+    docs = await reader.aload_data(show_progress=True)
+    for doc in docs:
+        if not hasattr(doc, "metadata"):
+            doc.metadata = {}
+
+        doc.metadata.update(
+            {
+                # Replace the temporary path the reader saw with the upload's name
+                "file_path": filename,
+                "file_name": filename,
+                "source": filename,
+                "research_id": research_id,
+                "reference_id": reference_id,
+                "filename": filename,
+                "created_at": datetime.utcnow().isoformat(),
+            }
+        )
+
+    await report_progress(pages_processed=len(docs))
+    return docs
+
+
 async def process_files(
     files: List[UploadFile], research_id: str, reference_id: str
 ) -> List[Document]:
-    """Load and process multiple file types."""
+    """Load and process multiple file types.
+
+    Intermediate files go to a scratch workspace private to this call, which
+    is marked as failed if a file or a PDF page fails to parse.
+    """
     documents = []
-    vectorstore_dir = os.path.join(os.getcwd(), "vectorstore")
-    try:
+    with Workspace() as workspace, track_failed_pages() as failed_pages:
         for file in files:
 
             file_extension = os.path.splitext(file.filename.lower())[1]
             if file_extension in (".png", ".jpg", ".jpeg"):
                 image_content = await file.read()  # Await the read coroutine
-                image_text = describe_image(image_content)
+                analysis = await analyze_image(image_content, describe=True)
+                image_text = analysis["description"]
                 doc = Document(
                     text=f"This is an image({file.filename}) with the following description: \n{image_text}",
                     metadata={
                         "source": file.filename,
                         "type": "image",
                         "caption": image_text,
+                        "image": await artifact_store.put(
+                            image_content, file_extension
+                        ),
                         "research_id": research_id,
                         "reference_id": reference_id,
                         "filename": file.filename,
@@ -375,61 +526,66 @@ async def process_files(
                     },
                 )
                 documents.append(doc)
+                await report_progress(pages_processed=1)
             elif file_extension == ".pdf":
                 try:
                     pdf_documents = await get_pdf_documents(
                         pdf_file=file,
                         research_id=research_id,
                         reference_id=reference_id,
+                        workspace=workspace,
                     )
                     documents.extend(pdf_documents)
                 except Exception as e:
                     logger.error(f"Error processing PDF {file.filename}: {e}")
+                    workspace.mark_failed()
             elif file_extension in (".ppt", ".pptx"):
                 try:
-                    ppt_documents = process_ppt_file(
-                        ppt_path=save_uploaded_file(
-                            uploaded_file=file, directory_name="ppt_references"
+                    ppt_documents = await process_ppt_file(
+                        ppt_path=await spool_uploaded_file(
+                            uploaded_file=file,
+                            directory=workspace.subdir("uploads"),
                         ),
                         research_id=research_id,
                         reference_id=reference_id,
                         filename=file.filename,
+                        workspace=workspace,
                     )
                     documents.extend(ppt_documents)
                 except Exception as e:
                     logger.error(f"Error processing PPT {file.filename}: {e}")
+                    workspace.mark_failed()
+            elif file_extension in OFFICE_EXTENSIONS:
+                try:
+                    office_documents = await process_office_file(
+                        file_path=await spool_uploaded_file(
+                            file, workspace.subdir("uploads")
+                        ),
+                        research_id=research_id,
+                        reference_id=reference_id,
+                        filename=file.filename,
+                        workspace=workspace,
+                    )
+                    documents.extend(office_documents)
+                except Exception as e:
+                    logger.error(f"Error processing {file.filename}: {e}")
+                    workspace.mark_failed()
             else:
                 try:
-                    with tempfile.NamedTemporaryFile(
-                        delete=True, suffix=f"{file_extension}"
-                    ) as temp_file:
-                        shutil.copyfileobj(file.file, temp_file)
-                        temp_file_path = temp_file.name
-                        reader = SimpleDirectoryReader(input_files=[temp_file_path])
-                        docs = await reader.aload_data(show_progress=True)
-                        for doc in docs:
-                            if not hasattr(doc, "metadata"):
-                                doc.metadata = {}
-
-                            doc.metadata.update(
-                                {
-                                    "source": file.filename,
-                                    "research_id": research_id,
-                                    "reference_id": reference_id,
-                                    "filename": file.filename,
-                                    "created_at": datetime.utcnow().isoformat(),
-                                }
-                            )
-
-                        documents.extend(docs)
+                    file_path = await spool_uploaded_file(
+                        file, workspace.subdir("uploads")
+                    )
+                    documents.extend(
+                        await load_with_reader(
+                            file_path, file.filename, research_id, reference_id
+                        )
+                    )
                 except Exception as e:
                     logger.error(
                         f"Error processing {file.filename} using SimpleDirectoryReader: {e}"
                     )
+                    workspace.mark_failed()
+        if failed_pages:
+            workspace.mark_failed()
 
-    finally:
-        # Delete the vectorstore directory after processing
-        if os.path.exists(vectorstore_dir):
-            shutil.rmtree(vectorstore_dir)
-            logger.info(f"Deleted temporary directory: {vectorstore_dir}")
     return documents
@@ -1,20 +1,32 @@
+import asyncio
 import base64
-import os
+import hashlib
 from datetime import datetime
+from io import BytesIO
 from typing import List, Optional
 
 import aiohttp
-import requests
-from crawl4ai import AsyncWebCrawler
 from llama_index.core import Document
-
-from backend.config import logger
+from PIL import Image
+
+from backend.cache import content_key
+from backend.config import (
+    LINK_IMAGE_CONCURRENCY,
+    LINK_IMAGE_MAX_BYTES,
+    LINK_IMAGE_MAX_DIMENSION,
+    LINK_IMAGE_TIMEOUT,
+    logger,
+)
 from backend.models import SourceType
+from backend.nim_client import nim_client
+
+from .crawler_pool import crawler_pool
+from .utils import hash_image, vision_cache
 
 # NVIDIA API Configuration
 INVOKE_URL = "https://ai.api.nvidia.com/v1/gr/meta/llama-3.2-11b-vision-instruct/chat/completions"
-
-API_KEY = os.getenv("NVIDIA_API_KEY")
+VISION_MODEL = "meta/llama-3.2-11b-vision-instruct"
+DESCRIBE_IMAGE_PROMPT = "What is in this image?"
 
 
 def is_valid_base64(s: str) -> bool:
@@ -33,47 +45,79 @@ def is_valid_base64(s: str) -> bool:
         return False
 
 
-async def url_to_base64(url: str) -> Optional[str]:
-    """Convert an image URL to base64 encoding."""
+_image_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_image_session() -> aiohttp.ClientSession:
+    """Pooled session shared by every image download."""
+    global _image_session
+    if _image_session is None or _image_session.closed:
+        _image_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=LINK_IMAGE_CONCURRENCY * 2),
+            timeout=aiohttp.ClientTimeout(total=LINK_IMAGE_TIMEOUT),
+        )
+    return _image_session
+
+
+async def close_image_session():
+    global _image_session
+    if _image_session is not None and not _image_session.closed:
+        await _image_session.close()
+    _image_session = None
+
+
+async def download_image(url: str) -> Optional[bytes]:
+    """Download an image, giving up on anything over LINK_IMAGE_MAX_BYTES."""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=30) as response:
-                if response.status == 200:
-                    image_data = await response.read()
-                    if not isinstance(image_data, bytes):
-                        logger.error(
-                            f"Expected bytes from {url}, got {type(image_data)}"
-                        )
-                        return None
-                    return base64.b64encode(image_data).decode("utf-8")
+        async with get_image_session().get(url) as response:
+            if response.status != 200:
+                logger.error(f"Failed to fetch image from {url}: {response.status}")
+                return None
+            if (response.content_length or 0) > LINK_IMAGE_MAX_BYTES:
+                logger.info(f"Skipping image over the size limit: {url}")
+                return None
+
+            image_data = bytearray()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                image_data.extend(chunk)
+                if len(image_data) > LINK_IMAGE_MAX_BYTES:
+                    logger.info(f"Skipping image over the size limit: {url}")
+                    return None
+            return bytes(image_data)
     except Exception as e:
         logger.error(f"Failed to fetch image from {url}: {str(e)}")
     return None
 
 
-async def process_image(
-    src: str, reference_id: str, url: str, research_id: str
-) -> Optional[Document]:
-    # Updated to use module-level API config
-    try:
-        # If it's already base64, use it directly
-        if is_valid_base64(src):
-            image_data = src
-        else:
-            # Otherwise fetch and convert to base64
-            image_data = await url_to_base64(src)
+def decode_base64_image(src: str) -> bytes:
+    if src.startswith("data:image"):
+        src = src.split(",")[1]
+    return base64.b64decode(src)
+
+
+def downscaled_b64(image_content: bytes) -> str:
+    """Shrink an image to LINK_IMAGE_MAX_DIMENSION and base64 encode it as JPEG."""
+    img = Image.open(BytesIO(image_content))
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    img.thumbnail((LINK_IMAGE_MAX_DIMENSION, LINK_IMAGE_MAX_DIMENSION))
+    buffered = BytesIO()
+    img.save(buffered, format="JPEG", quality=85)
+    return base64.b64encode(buffered.getvalue()).decode("utf-8")
 
-        if not image_data:
-            return None
 
-        headers = {"Authorization": f"Bearer {API_KEY}", "Accept": "application/json"}
+async def describe_image(image_content: bytes) -> str:
+    """Describe an image with the vision model, reusing cached descriptions."""
+    key = content_key(hash_image(image_content), VISION_MODEL, DESCRIBE_IMAGE_PROMPT)
 
+    async def describe():
+        image_b64 = await asyncio.to_thread(downscaled_b64, image_content)
         payload = {
-            "model": "meta/llama-3.2-11b-vision-instruct",
+            "model": VISION_MODEL,
             "messages": [
                 {
                     "role": "user",
-                    "content": f'What is in this image? <img src="data:image/png;base64,{image_data}" />',
+                    "content": f'{DESCRIBE_IMAGE_PROMPT} <img src="data:image/jpeg;base64,{image_b64}" />',
                 }
             ],
             "max_tokens": 1024,
@@ -81,10 +125,53 @@ async def process_image(
             "top_p": 1.00,
             "stream": False,
         }
-        response = requests.post(INVOKE_URL, headers=headers, json=payload)
-        image_description = response.json()["choices"][0]["message"]["content"]
+        return await nim_client.chat_completion(INVOKE_URL, payload)
+
+    return await vision_cache.get_or_compute(key, describe)
+
+
+async def process_images(
+    images: List[dict], reference_id: str, url: str, research_id: str
+) -> List[Document]:
+    """Describe the relevant images of a crawled page.
+
+    Images are deduplicated by URL and then by content, downloaded over one
+    pooled session and described at most LINK_IMAGE_CONCURRENCY at a time.
+    """
+    sources = []
+    for image in images:
+        src = image.get("src", "")
+        if image.get("score", 0) < 4 or not src:
+            continue
+        if src.startswith("https://") or is_valid_base64(src):
+            sources.append(src)
+        else:
+            logger.info(f"Skipping invalid image source: {src[:50]}...")
+    sources = list(dict.fromkeys(sources))
+
+    semaphore = asyncio.Semaphore(LINK_IMAGE_CONCURRENCY)
+    seen_hashes = set()
 
-        logger.info(f"Image description: {image_description}")
+    async def process_image(src: str) -> Optional[Document]:
+        async with semaphore:
+            try:
+                if src.startswith("https://"):
+                    image_content = await download_image(src)
+                else:
+                    image_content = decode_base64_image(src)
+                if not image_content:
+                    return None
+
+                digest = hashlib.sha256(image_content).hexdigest()
+                if digest in seen_hashes:
+                    return None
+                seen_hashes.add(digest)
+
+                image_description = await describe_image(image_content)
+                logger.info(f"Image description: {image_description}")
+            except Exception as e:
+                logger.error(f"Failed to process image {src[:50]}...: {str(e)}")
+                return None
 
         return Document(
             text=f"This is an image from url - {url}, with the following description: \n{image_description}",
@@ -97,9 +184,13 @@ async def process_image(
                 "created_at": datetime.utcnow().isoformat(),
             },
         )
-    except Exception as e:
-        logger.error(f"Failed to process image {src[:50]}...: {str(e)}")
-        return None
+
+    docs = await asyncio.gather(*(process_image(src) for src in sources))
+    image_docs = [doc for doc in docs if doc]
+    logger.info(
+        f"Described {len(image_docs)} of {len(sources)} unique images from {url}"
+    )
+    return image_docs
 
 
 async def process_url(url: str, research_id: str, reference_id: str) -> List[Document]:
@@ -110,42 +201,32 @@ async def process_url(url: str, research_id: str, reference_id: str) -> List[Doc
         raise ValueError("Research ID and Reference ID must be provided")
 
     documents = []
-    async with AsyncWebCrawler(verbose=True) as crawler:
-        result = await crawler.arun(url=url)
-        if not result.success:
-            logger.error(f"Failed to crawl {url}: {result.error_message}")
-            raise Exception(f"Could not parse {url}: {result.error_message}")
-
-        # Add main content document
-        documents.append(
-            Document(
-                text=result.markdown,
-                metadata={
-                    "reference_id": reference_id,
-                    "url": url,
-                    "research_id": research_id,
-                    "source_type": SourceType.LINK.value,
-                    "created_at": datetime.utcnow().isoformat(),
-                },
+    result = await crawler_pool.crawl(url)
+    if not result.success:
+        logger.error(f"Failed to crawl {url}: {result.error_message}")
+        raise Exception(f"Could not parse {url}: {result.error_message}")
+
+    # Add main content document
+    documents.append(
+        Document(
+            text=result.markdown,
+            metadata={
+                "reference_id": reference_id,
+                "url": url,
+                "research_id": research_id,
+                "source_type": SourceType.LINK.value,
+                "created_at": datetime.utcnow().isoformat(),
+            },
+        )
+    )
+
+    # Process images
+    if result.media.get("images", None):
+        logger.info(f"Processing {len(result.media['images'])} images")
+        documents.extend(
+            await process_images(
+                result.media["images"], reference_id, url, research_id
             )
         )
 
-        # Process images
-        if result.media.get("images", None):
-            logger.info(f"Processing {len(result.media['images'])} images")
-            for image in result.media["images"]:
-                if image.get("score", 0) < 4:
-                    continue
-
-                src = image.get("src", "")
-                if not src:
-                    continue
-
-                if src.startswith("https://"):
-                    doc = await process_image(src, reference_id, url, research_id)
-                    if doc:
-                        documents.append(doc)
-                else:
-                    logger.info(f"Skipping invalid image source: {src[:50]}...")
-
-        return documents
+    return documents
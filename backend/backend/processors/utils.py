@@ -1,21 +1,43 @@
 import asyncio
 import base64
-import logging
+import hashlib
 import os
-from functools import wraps
 from io import BytesIO
 
 import fitz
-import requests
 from fastapi import UploadFile
-from llama_index.llms.nvidia import NVIDIA
 from PIL import Image
 
-from backend.config import logger
+from backend.cache import content_key, create_cache
+from backend.config import (
+    LLM_MODEL,
+    NIM_LLM_INVOKE_URL,
+    NIM_VISION_INVOKE_URL,
+    NIM_VISION_MODEL,
+    UPLOAD_CHUNK_SIZE,
+    VISION_CACHE_MAX_ENTRIES,
+    logger,
+)
+from backend.cpu_executor import cpu_executor
+from backend.nim_client import nim_client
+
+from .image_analysis import CANDIDATE, DECORATION, preclassify_image
+
+DEPLOT_URL = "https://ai.api.nvidia.com/v1/vlm/google/deplot"
+ANALYZE_IMAGE_PROMPT = (
+    "On the first line, answer only GRAPH if this image is a graph, plot, chart "
+    "or table, otherwise answer only IMAGE. "
+    "Then, starting on the next line, describe what you see in this image."
+)
+GRAPH_KEYWORDS = ["graph", "plot", "chart", "table"]
+DEPLOT_PROMPT = "Generate underlying data table of the figure below:"
+EXPLAIN_GRAPH_PROMPT = "Your responsibility is to explain charts. You are an expert in describing the responses of linearized tables into plain English text for LLMs to use. Explain the following linearized table. "
+
+vision_cache = create_cache("vision", VISION_CACHE_MAX_ENTRIES)
 
 
 def get_b64_image_from_content(image_content):
-    """Convert image content to base64 encoded string."""
+    """Convert image content to base64 encoded JPEG; blocking, run in a thread."""
     img = Image.open(BytesIO(image_content))
     if img.mode != "RGB":
         img = img.convert("RGB")
@@ -24,84 +46,100 @@ def get_b64_image_from_content(image_content):
     return base64.b64encode(buffered.getvalue()).decode("utf-8")
 
 
-def is_graph(image_content):
-    """Determine if an image is a graph, plot, chart, or table."""
-    res = describe_image(image_content)
-    return any(
-        keyword in res.lower() for keyword in ["graph", "plot", "chart", "table"]
-    )
-
-
-def process_graph(image_content):
-    """Process a graph image and generate a description."""
-    deplot_description = process_graph_deplot(image_content)
-    mixtral = NVIDIA(model_name="meta/llama-3.1-70b-instruct")
-    response = mixtral.complete(
-        "Your responsibility is to explain charts. You are an expert in describing the responses of linearized tables into plain English text for LLMs to use. Explain the following linearized table. "
-        + deplot_description
-    )
-    return response.text
+def hash_image(image_content):
+    """Hash the raw image bytes, cheap enough to run on the event loop."""
+    return hashlib.sha256(image_content).hexdigest()
 
 
-def describe_image(image_content):
-    """Generate a description of an image using NVIDIA API."""
-    image_b64 = get_b64_image_from_content(image_content)
-    invoke_url = "https://ai.api.nvidia.com/v1/vlm/nvidia/neva-22b"
-    api_key = os.getenv("NVIDIA_API_KEY")
+async def analyze_image(image_content, describe=False):
+    """Classify and describe an image with as few remote calls as possible.
 
-    if not api_key:
-        raise ValueError(
-            "NVIDIA API Key is not set. Please set the NVIDIA_API_KEY environment variable."
-        )
-
-    headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/json"}
-
-    payload = {
-        "messages": [
-            {
-                "role": "user",
-                "content": f'Describe what you see in this image. <img src="data:image/png;base64,{image_b64}" />',
-            }
-        ],
-        "max_tokens": 1024,
-        "temperature": 0.20,
-        "top_p": 0.70,
-        "seed": 0,
-        "stream": False,
-    }
-
-    response = requests.post(invoke_url, headers=headers, json=payload)
-    return response.json()["choices"][0]["message"]["content"]
+    A local pre-classifier rules out decorations and (unless a description
+    is required) photos. Everything else gets one combined vision request
+    that returns both the classification and the description.
+    """
+    kind = await cpu_executor.run(preclassify_image, image_content)
+    if not describe and kind != CANDIDATE:
+        return {"is_graph": False, "description": ""}
+    if kind == DECORATION:
+        logger.info("Describing an image the pre-classifier marked as decoration")
 
+    key = content_key(
+        hash_image(image_content), NIM_VISION_MODEL, ANALYZE_IMAGE_PROMPT
+    )
 
-def process_graph_deplot(image_content):
+    async def analyze():
+        image_b64 = await asyncio.to_thread(get_b64_image_from_content, image_content)
+        payload = {
+            "model": NIM_VISION_MODEL,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f'{ANALYZE_IMAGE_PROMPT} <img src="data:image/jpeg;base64,{image_b64}" />',
+                }
+            ],
+            "max_tokens": 1024,
+            "temperature": 0.20,
+            "top_p": 0.70,
+            "stream": False,
+        }
+        return await nim_client.chat_completion(NIM_VISION_INVOKE_URL, payload)
+
+    response = await vision_cache.get_or_compute(key, analyze)
+    label, _, description = response.strip().partition("\n")
+    if label.strip().strip("*.:").upper() in ("GRAPH", "IMAGE"):
+        graph = label.strip().strip("*.:").upper() == "GRAPH"
+    else:
+        # The model ignored the format, fall back to keyword matching
+        description = response
+        graph = any(keyword in response.lower() for keyword in GRAPH_KEYWORDS)
+
+    return {"is_graph": graph, "description": description.strip()}
+
+
+async def process_graph(image_content):
+    """Process a graph image and generate a description."""
+    key = content_key(hash_image(image_content), LLM_MODEL, EXPLAIN_GRAPH_PROMPT)
+
+    async def explain_graph():
+        deplot_description = await process_graph_deplot(image_content)
+        payload = {
+            "model": LLM_MODEL,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": EXPLAIN_GRAPH_PROMPT + deplot_description,
+                }
+            ],
+            "max_tokens": 1024,
+            "stream": False,
+        }
+        return await nim_client.chat_completion(NIM_LLM_INVOKE_URL, payload)
+
+    return await vision_cache.get_or_compute(key, explain_graph)
+
+
+async def process_graph_deplot(image_content):
     """Process a graph image using NVIDIA's Deplot API."""
-    invoke_url = "https://ai.api.nvidia.com/v1/vlm/google/deplot"
-    image_b64 = get_b64_image_from_content(image_content)
-    api_key = os.getenv("NVIDIA_API_KEY")
-
-    if not api_key:
-        raise ValueError(
-            "NVIDIA API Key is not set. Please set the NVIDIA_API_KEY environment variable."
-        )
-
-    headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/json"}
-
-    payload = {
-        "messages": [
-            {
-                "role": "user",
-                "content": f'Generate underlying data table of the figure below: <img src="data:image/png;base64,{image_b64}" />',
-            }
-        ],
-        "max_tokens": 1024,
-        "temperature": 0.20,
-        "top_p": 0.20,
-        "stream": False,
-    }
-
-    response = requests.post(invoke_url, headers=headers, json=payload)
-    return response.json()["choices"][0]["message"]["content"]
+    key = content_key(hash_image(image_content), DEPLOT_URL, DEPLOT_PROMPT)
+
+    async def deplot():
+        image_b64 = await asyncio.to_thread(get_b64_image_from_content, image_content)
+        payload = {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f'{DEPLOT_PROMPT} <img src="data:image/png;base64,{image_b64}" />',
+                }
+            ],
+            "max_tokens": 1024,
+            "temperature": 0.20,
+            "top_p": 0.20,
+            "stream": False,
+        }
+        return await nim_client.chat_completion(DEPLOT_URL, payload)
+
+    return await vision_cache.get_or_compute(key, deplot)
 
 
 def extract_text_around_item(text_blocks, bbox, page_height, threshold_percentage=0.1):
@@ -161,30 +199,25 @@ def process_text_blocks(text_blocks, char_count_threshold=500):
     return grouped_blocks
 
 
-def save_uploaded_file(uploaded_file: UploadFile, directory_name: str) -> str:
-    """Save an uploaded file to a temporary directory."""
-    temp_dir = os.path.join(os.getcwd(), "vectorstore", directory_name, "tmp")
-    os.makedirs(temp_dir, exist_ok=True)
-    temp_file_path = os.path.join(temp_dir, uploaded_file.filename)
-
-    with open(temp_file_path, "wb") as temp_file:
-        temp_file.write(uploaded_file.read())
+def copy_in_chunks(source, destination_path: str) -> None:
+    """Stream a file object to disk without holding it in memory."""
+    with open(destination_path, "wb") as destination:
+        while chunk := source.read(UPLOAD_CHUNK_SIZE):
+            destination.write(chunk)
 
-    return temp_file_path
 
+async def spool_uploaded_file(uploaded_file: UploadFile, directory: str) -> str:
+    """Return a path on disk holding the upload.
 
-def async_timeout(seconds):
-    def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            try:
-                return await asyncio.wait_for(func(*args, **kwargs), timeout=seconds)
-            except asyncio.TimeoutError:
-                logger.warning(
-                    f"Function {func.__name__} timed out after {seconds} seconds"
-                )
-                return None
+    Uploads already backed by a named file are used in place; anything else
+    is streamed into the directory in chunks. Processors share the returned
+    path instead of each reading their own copy into memory.
+    """
+    path = getattr(uploaded_file.file, "name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        return path
 
-        return wrapper
+    temp_file_path = os.path.join(directory, os.path.basename(uploaded_file.filename))
+    await asyncio.to_thread(copy_in_chunks, uploaded_file.file, temp_file_path)
+    return temp_file_path
 
-    return decorator
@@ -118,3 +118,33 @@ Format Guidelines:
 
 Length: Comprehensive coverage of the material
 Format: Clear question-answer pairs with proper spacing and organization"""
+
+MAP_SUMMARY_PROMPT = """Summarize the following excerpts from the source "{source}".
+Keep every key finding, argument, definition, number and named entity.
+Do not add information that is not in the excerpts.
+
+Excerpts:
+{text}
+
+Summary:"""
+
+REDUCE_SUMMARY_PROMPT = """Merge the following partial summaries of "{source}" into a single summary.
+Keep every key finding, argument, definition, number and named entity, and remove repetition.
+
+Partial summaries:
+{text}
+
+Summary:"""
+
+KEY_TOPICS_PROMPT = """List the key topics covered by the source "{source}", based on its summary below.
+Respond with at most {max_topics} topics, one per line, each a few words long, with no numbering and nothing else.
+
+Summary:
+{summary}
+
+Topics:"""
+
+SOURCE_SUMMARIES_CONTEXT = """Summaries of every source in this research:
+
+{summaries}
+"""
@@ -0,0 +1,228 @@
+import asyncio
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from llama_index.core.vector_stores.types import (
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+from llama_index.vector_stores.qdrant.utils import (
+    HybridFusionCallable,
+    SparseEncoderCallable,
+    relative_score_fusion,
+)
+
+from backend.config import (
+    HYBRID_ALPHA,
+    HYBRID_FUSION,
+    RERANK_CANDIDATES,
+    RERANK_MODEL,
+    RETRIEVAL_MODE,
+    RETRIEVAL_TOP_K,
+    SPARSE_MODEL,
+    SPARSE_TOP_K,
+    logger,
+)
+
+RRF_K = 60
+
+# QdrantVectorStore fuses with `query.alpha or 0.5`, so an alpha of 0 would
+# silently become 0.5. Sparse-only retrieval is approximated with a tiny
+# dense weight instead.
+MIN_HYBRID_ALPHA = 1e-6
+
+
+def reciprocal_rank_fusion(
+    dense_result: VectorStoreQueryResult,
+    sparse_result: VectorStoreQueryResult,
+    alpha: float = 0.5,
+    top_k: int = 2,
+) -> VectorStoreQueryResult:
+    """Fuse dense and sparse results by rank, ignoring their score scales.
+
+    alpha weighs the dense ranking against the sparse one, as in
+    relative_score_fusion.
+    """
+    scores: Dict[str, float] = {}
+    nodes = {}
+    for result, weight in ((dense_result, alpha), (sparse_result, 1 - alpha)):
+        for rank, node in enumerate(result.nodes or []):
+            nodes.setdefault(node.node_id, node)
+            scores[node.node_id] = scores.get(node.node_id, 0.0) + weight / (
+                RRF_K + rank + 1
+            )
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return VectorStoreQueryResult(
+        nodes=[nodes[node_id] for node_id in ranked],
+        similarities=[scores[node_id] for node_id in ranked],
+        ids=ranked,
+    )
+
+
+def get_fusion_fn(fusion: str = HYBRID_FUSION) -> HybridFusionCallable:
+    return relative_score_fusion if fusion == "relative" else reciprocal_rank_fusion
+
+
+@functools.lru_cache(maxsize=None)
+def get_sparse_encoders(
+    model_name: str = SPARSE_MODEL,
+) -> Tuple[SparseEncoderCallable, SparseEncoderCallable]:
+    """Document and query encoders of a FastEmbed sparse model, loaded once.
+
+    BM25 weighs document terms by frequency but query terms equally, so the
+    two sides use different encodings.
+    """
+    from fastembed import SparseTextEmbedding
+
+    model = SparseTextEmbedding(model_name)
+    logger.info(f"Loaded sparse model {model_name}")
+
+    def encode(embeddings) -> Tuple[List[List[int]], List[List[float]]]:
+        indices, values = [], []
+        for embedding in embeddings:
+            indices.append(embedding.indices.tolist())
+            values.append(embedding.values.tolist())
+        return indices, values
+
+    def encode_documents(texts: List[str]):
+        return encode(model.embed(texts))
+
+    def encode_queries(texts: List[str]):
+        return encode(model.query_embed(texts))
+
+    return encode_documents, encode_queries
+
+
+class PreparedSparseEncoder:
+    """Sparse encoder whose results can be computed ahead, in a thread.
+
+    QdrantVectorStore calls its sparse encoders synchronously on the event
+    loop. `prepare` encodes texts in a worker thread and keeps the results
+    until the store's own call takes them; texts that were not prepared are
+    encoded on the spot. At most `max_prepared` results are kept.
+    """
+
+    def __init__(self, encode: SparseEncoderCallable, max_prepared: int = 4096):
+        self.encode = encode
+        self.max_prepared = max_prepared
+        self._prepared: "OrderedDict[str, Tuple[List[int], List[float]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    async def prepare(self, texts: List[str]) -> None:
+        with self._lock:
+            missing = list(dict.fromkeys(t for t in texts if t not in self._prepared))
+        if not missing:
+            return
+        indices, values = await asyncio.to_thread(self.encode, missing)
+        with self._lock:
+            self._prepared.update(zip(missing, zip(indices, values)))
+            while len(self._prepared) > self.max_prepared:
+                self._prepared.popitem(last=False)
+
+    def __call__(self, texts: List[str]) -> Tuple[List[List[int]], List[List[float]]]:
+        with self._lock:
+            prepared = [self._prepared.pop(text, None) for text in texts]
+        missing = [text for text, result in zip(texts, prepared) if result is None]
+        if missing:
+            encoded = iter(zip(*self.encode(missing)))
+            prepared = [result or next(encoded) for result in prepared]
+        return [result[0] for result in prepared], [result[1] for result in prepared]
+
+
+def collection_supports_hybrid(client, collection_name: str) -> bool:
+    """Whether a collection has sparse vectors, or can be created with them.
+
+    Collections created before hybrid mode was enabled only hold dense
+    vectors and keep being searched that way until they are re-ingested.
+    """
+    if not client.collection_exists(collection_name):
+        return True
+    collection = client.get_collection(collection_name)
+    return bool(collection.config.params.sparse_vectors)
+
+
+def use_hybrid(client, collection_name: str, mode: str = RETRIEVAL_MODE) -> bool:
+    if mode != "hybrid":
+        return False
+    if not collection_supports_hybrid(client, collection_name):
+        logger.info(f"Collection {collection_name} has no sparse vectors, using dense")
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def get_reranker(model_name: Optional[str] = RERANK_MODEL, top_n: int = RETRIEVAL_TOP_K):
+    """Local cross-encoder reranking retrieved candidates, or None if disabled."""
+    if not model_name:
+        return None
+    try:
+        from llama_index.core.postprocessor import SentenceTransformerRerank
+
+        return SentenceTransformerRerank(model=model_name, top_n=top_n)
+    except ImportError:
+        raise ImportError("sentence-transformers is required for reranking")
+
+
+async def warm_reranker() -> None:
+    """Load the reranker ahead of the first chat, off the event loop."""
+    try:
+        await asyncio.to_thread(get_reranker, top_n=RETRIEVAL_TOP_K)
+    except Exception as e:
+        logger.error(f"Could not load reranker {RERANK_MODEL}: {e}")
+
+
+class RerankingRetriever(BaseRetriever):
+    """Retriever reranking the candidates of another retriever.
+
+    Engines run node postprocessors synchronously, so a cross-encoder
+    passed as one would score every chat's candidates on the event loop.
+    Async retrieval runs the reranker in a thread instead.
+    """
+
+    def __init__(self, retriever: BaseRetriever, reranker):
+        self._retriever = retriever
+        self._reranker = reranker
+        super().__init__(callback_manager=retriever.callback_manager)
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        nodes = self._retriever.retrieve(query_bundle)
+        return self._reranker.postprocess_nodes(nodes, query_bundle=query_bundle)
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        nodes = await self._retriever.aretrieve(query_bundle)
+        return await asyncio.to_thread(
+            self._reranker.postprocess_nodes, nodes, query_bundle=query_bundle
+        )
+
+
+def retrieval_kwargs(hybrid: bool, top_k: int = RETRIEVAL_TOP_K) -> Dict[str, Any]:
+    """Retriever arguments for as_retriever.
+
+    With a reranker, a larger candidate set is retrieved for the reranker
+    to keep the best top_k of.
+    """
+    reranker = get_reranker(top_n=top_k)
+    kwargs: Dict[str, Any] = {
+        "similarity_top_k": max(RERANK_CANDIDATES, top_k) if reranker else top_k
+    }
+    if hybrid:
+        kwargs.update(
+            vector_store_query_mode=VectorStoreQueryMode.HYBRID,
+            sparse_top_k=SPARSE_TOP_K,
+            alpha=max(HYBRID_ALPHA, MIN_HYBRID_ALPHA),
+        )
+    return kwargs
+
+
+def build_retriever(index, hybrid: bool, top_k: int = RETRIEVAL_TOP_K) -> BaseRetriever:
+    """Retriever of an index, reranking its candidates if a reranker is set."""
+    retriever = index.as_retriever(**retrieval_kwargs(hybrid, top_k))
+    reranker = get_reranker(top_n=top_k)
+    return RerankingRetriever(retriever, reranker) if reranker else retriever
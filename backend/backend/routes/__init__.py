@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 
+from .artifacts import router as artifacts_router
 from .chat import router as chat_router
+from .jobs import router as jobs_router
 from .notes import router as notes_router
 from .research import router as research_router
 from .source import router as source_router
@@ -10,3 +12,5 @@ router.include_router(research_router, tags=["research"])
 router.include_router(source_router, tags=["sources"])
 router.include_router(chat_router, tags=["chat"])
 router.include_router(notes_router, tags=["notes"])
+router.include_router(jobs_router, tags=["jobs"])
+router.include_router(artifacts_router, tags=["artifacts"])
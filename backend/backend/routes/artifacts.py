@@ -0,0 +1,62 @@
+import mimetypes
+
+from fastapi import APIRouter, Header, HTTPException, Path, Response
+
+from backend.artifacts import artifact_store, is_artifact_id, parse_range
+from backend.config import logger
+
+router = APIRouter()
+
+mimetypes.add_type("application/vnd.apache.parquet", ".parquet")
+
+
+@router.get("/artifacts/{artifact_id}")
+async def get_artifact(
+    artifact_id: str = Path(...),
+    range_header: str = Header(None, alias="Range"),
+    if_none_match: str = Header(None),
+):
+    """Serve a stored artifact, supporting single byte ranges.
+
+    Artifacts are content-addressed and never change, so they are cached
+    as immutable and revalidated with their id as the ETag.
+    """
+    if not is_artifact_id(artifact_id):
+        raise HTTPException(status_code=400, detail="Invalid artifact ID format")
+
+    try:
+        size = await artifact_store.size(artifact_id)
+        if size is None:
+            raise HTTPException(status_code=404, detail="Artifact not found")
+
+        headers = {
+            "ETag": f'"{artifact_id}"',
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "Accept-Ranges": "bytes",
+        }
+        if if_none_match and artifact_id in if_none_match:
+            return Response(status_code=304, headers=headers)
+
+        media_type = (
+            mimetypes.guess_type(artifact_id)[0] or "application/octet-stream"
+        )
+        if range_header:
+            byte_range = parse_range(range_header, size)
+            if byte_range is None:
+                raise HTTPException(
+                    status_code=416, headers={"Content-Range": f"bytes */{size}"}
+                )
+            start, end = byte_range
+            content = await artifact_store.read(artifact_id, start, end)
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            return Response(
+                content=content, status_code=206, media_type=media_type, headers=headers
+            )
+
+        content = await artifact_store.read(artifact_id)
+        return Response(content=content, media_type=media_type, headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error serving artifact {artifact_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,22 @@
+import json
 import logging
-from typing import List
+import time
+from typing import Any, Awaitable, Callable, List, Tuple
 
 from bson import ObjectId
 from fastapi import APIRouter, HTTPException, Path
-from llama_index.core import StorageContext, VectorStoreIndex
-from llama_index.core.chat_engine.types import ChatMode
+from fastapi.responses import StreamingResponse
+from llama_index.core import Settings
+from llama_index.core.base.llms.types import ChatMessage, MessageRole
+from llama_index.core.chat_engine import ContextChatEngine
 from llama_index.core.memory import ChatMemoryBuffer
-from llama_index.vector_stores.qdrant import QdrantVectorStore
+from llama_index.core.query_engine import RetrieverQueryEngine
+from starlette.background import BackgroundTask
 
-from backend.config import logger
-from backend.database import qdrant_client, redis_chat_store, research_collection
+from backend.admission import AdmissionRejected, admission_controller
+from backend.config import CHAT_MEMORY_TOKEN_LIMIT, logger
+from backend.database import redis_chat_store, redis_client, research_collection
+from backend.index_registry import index_registry
 from backend.models import ChatRequest
 from backend.prompts import (
     CONTEXT_PROMPT_TEMPLATE,
@@ -18,6 +25,8 @@ from backend.prompts import (
     SUMMARY_FORMAT,
     SYSTEM_PROMPT,
 )
+from backend.semantic_cache import semantic_cache
+from backend.summary import source_name, summary_engine
 
 DEFAULT_SUMMARY_QUERY = "Summarize al sources"
 DEFAULT_STUDY_GUIDE_QUERY = "Create a study guide based on all sources"
@@ -54,7 +63,7 @@ async def get_qa_query(research_id: str) -> str:
     )
 
 
-async def get_sources_list(research_id: str) -> List[str] | None:
+async def get_sources(research_id: str) -> List[dict] | None:
     if not research_id or not ObjectId.is_valid(research_id):
         return None
 
@@ -63,11 +72,14 @@ async def get_sources_list(research_id: str) -> List[str] | None:
 
     if not research or not research.get("sources"):
         return None
+    return research["sources"]
 
-    def extract_source_name(source: dict) -> str:
-        return source.get("filename") or source.get("url", "")
 
-    return [extract_source_name(source) for source in research["sources"]]
+async def get_sources_list(research_id: str) -> List[str] | None:
+    sources = await get_sources(research_id)
+    if not sources:
+        return None
+    return [source_name(source) for source in sources]
 
 
 async def generate_query(
@@ -89,53 +101,240 @@ async def generate_query(
     return query
 
 
+async def resolve_query(research_id: str, query: str) -> str:
+    if query.strip().lower() == "summarize sources":
+        query = await get_summarization_query(research_id=research_id)
+    elif query.strip().lower() == "create a study guide":
+        query = await get_study_guide_query(research_id=research_id)
+    elif query.strip().lower() == "create q&a":  # Add this condition
+        query = await get_qa_query(research_id=research_id)
+    return query
+
+
+SUMMARY_QUERIES = {
+    "summarize sources": get_summarization_query,
+    "create a study guide": get_study_guide_query,
+    "create q&a": get_qa_query,
+}
+
+
+async def build_summary_messages(
+    research_id: str, query: str
+) -> Tuple[List[ChatMessage], dict] | None:
+    """Messages answering a summary command from the summaries of all sources.
+
+    Returns None for other queries, which go through the chat engine.
+    """
+    query_builder = SUMMARY_QUERIES.get(query.strip().lower())
+    if query_builder is None:
+        return None
+    sources = await get_sources(research_id)
+    if not sources:
+        return None
+
+    context, stats = await summary_engine.summarize_research(research_id, sources)
+    instruction = await query_builder(research_id=research_id)
+    messages = [
+        ChatMessage(role=MessageRole.SYSTEM, content=SYSTEM_PROMPT),
+        ChatMessage(role=MessageRole.USER, content=f"{context}\n{instruction}"),
+    ]
+    return messages, stats
+
+
+async def save_chat_messages(research_id: str, query: str, response: str) -> None:
+    """Record a summary exchange in the chat history like engine answers."""
+    await redis_chat_store.async_add_message(
+        research_id, ChatMessage(role=MessageRole.USER, content=query)
+    )
+    await redis_chat_store.async_add_message(
+        research_id, ChatMessage(role=MessageRole.ASSISTANT, content=response)
+    )
+
+
+async def get_chat_engine(research_id: str) -> ContextChatEngine:
+    """Context chat engine over a research, with its history read from Redis.
+
+    The engine keeps the history in memory, so reading it never blocks the
+    event loop; callers persist the new messages with save_chat_messages.
+    The retriever is cached on the index handle.
+    """
+    handle = await index_registry.get(research_id)
+    retriever = handle.retriever()
+
+    chat_history = await redis_chat_store.aget_messages(research_id)
+    chat_memory = ChatMemoryBuffer.from_defaults(
+        chat_history=chat_history, token_limit=CHAT_MEMORY_TOKEN_LIMIT
+    )
+    return ContextChatEngine.from_defaults(
+        retriever=retriever,
+        memory=chat_memory,
+        system_prompt=SYSTEM_PROMPT,
+        context_template=CONTEXT_PROMPT_TEMPLATE,
+    )
+
+
+def rejected_response(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many chat requests, please retry shortly",
+        headers={"Retry-After": str(int(e.retry_after))},
+    )
+
+
+def format_sse(data: dict, event: str = None) -> str:
+    message = f"data: {json.dumps(data)}\n\n"
+    if event:
+        message = f"event: {event}\n{message}"
+    return message
+
+
+async def answer_chat(research_id: str, query: str) -> dict:
+    summary_request = await build_summary_messages(research_id, query)
+    if summary_request is not None:
+        messages, stats = summary_request
+        response = await Settings.llm.achat(messages)
+        stats["llm_calls"] += 1
+        answer = response.message.content
+        await save_chat_messages(research_id, query, answer)
+        return {"response": answer, "stats": stats}
+
+    resolved_query = await resolve_query(research_id, query)
+
+    logging.info(f"Chat query: {resolved_query}")
+
+    chat_engine = await get_chat_engine(research_id)
+    response = await chat_engine.achat(resolved_query)
+    await save_chat_messages(research_id, resolved_query, response.response)
+
+    return {"response": response.response}
+
+
+async def admitted(compute: Callable[[], Awaitable[Any]]) -> Any:
+    async with await admission_controller.acquire():
+        return await compute()
+
+
+async def answer_depends_on_history(research_id: str, query: str) -> bool:
+    """Whether the answer reads the conversation, which cache keys do not cover.
+
+    Summary commands are answered from the sources alone; other queries go
+    through the chat engine's memory once the research has a history.
+    """
+    if query.strip().lower() in SUMMARY_QUERIES:
+        return False
+    # RedisChatStore keeps each conversation as a list at its key
+    return bool(await redis_client.llen(research_id))
+
+
 # TODO: Use agent
 # TODO: Transform query
-# TODO: Use proper summary index and Improve summary generation
 @router.post("/chat")
 async def chat(request: ChatRequest):
     try:
         research_id = request.research_id
-        query = request.query
-
-        vector_store = QdrantVectorStore(
-            client=qdrant_client, collection_name=research_id
-        )
-
-        if query.strip().lower() == "summarize sources":
-            query = await get_summarization_query(research_id=research_id)
-        elif query.strip().lower() == "create a study guide":
-            query = await get_study_guide_query(research_id=research_id)
-        elif query.strip().lower() == "create q&a":  # Add this condition
-            query = await get_qa_query(research_id=research_id)
 
-        logging.info(f"Chat query: {query}")
+        async def compute() -> dict:
+            return await admitted(lambda: answer_chat(research_id, request.query))
 
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
-        index = VectorStoreIndex.from_vector_store(
-            vector_store, storage_context=storage_context
+        if await answer_depends_on_history(research_id, request.query):
+            return await compute()
+        result, cached = await semantic_cache.get_or_compute(
+            research_id, "chat", request.query, compute
         )
+        if cached:
+            # Keep the history complete even though no engine saw the query
+            await save_chat_messages(research_id, request.query, result["response"])
+        return result
+    except AdmissionRejected as e:
+        raise rejected_response(e)
+    except Exception as e:
+        logger.error(f"Error processing chat query: {e}")
+        raise HTTPException(status_code=500, detail="Error processing chat query")
 
-        chat_memory = ChatMemoryBuffer.from_defaults(
-            token_limit=512,
-            chat_store=redis_chat_store,
-            chat_store_key=research_id,
-        )
 
-        chat_engine = index.as_chat_engine(
-            memory=chat_memory,
-            chat_mode=ChatMode.CONTEXT,
-            system_prompt=SYSTEM_PROMPT,
-            context_template=CONTEXT_PROMPT_TEMPLATE,
-        )
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Stream the answer as Server-Sent Events.
 
-        response = chat_engine.chat(query)
+    Each token is sent as a `data` event, followed by a final `done` event.
+    Both messages are persisted to the chat store once the stream completes.
+    The generation slot is held until the stream ends.
+    """
+    start_time = time.perf_counter()
+    try:
+        ticket = await admission_controller.acquire()
+    except AdmissionRejected as e:
+        raise rejected_response(e)
 
-        return {"response": response.response}
+    try:
+        research_id = request.research_id
+        summary_request = await build_summary_messages(research_id, request.query)
+        if summary_request is not None:
+            messages, _ = summary_request
+            summary_stream = await Settings.llm.astream_chat(messages)
+
+            async def token_gen():
+                answer = ""
+                async for chunk in summary_stream:
+                    answer += chunk.delta or ""
+                    yield chunk.delta or ""
+                await save_chat_messages(research_id, request.query, answer)
+
+            tokens = token_gen()
+        else:
+            query = await resolve_query(research_id, request.query)
+
+            logging.info(f"Chat stream query: {query}")
+
+            chat_engine = await get_chat_engine(research_id)
+            response = await chat_engine.astream_chat(query)
+
+            async def token_gen():
+                answer = ""
+                async for token in response.async_response_gen():
+                    answer += token
+                    yield token
+                await save_chat_messages(research_id, query, answer)
+
+            tokens = token_gen()
     except Exception as e:
+        ticket.release()
         logger.error(f"Error processing chat query: {e}")
         raise HTTPException(status_code=500, detail="Error processing chat query")
 
+    async def event_stream():
+        first_token_time = None
+        token_count = 0
+        try:
+            async for token in tokens:
+                if first_token_time is None:
+                    first_token_time = time.perf_counter()
+                token_count += 1
+                yield format_sse({"token": token})
+            yield format_sse({}, event="done")
+        except Exception as e:
+            logger.error(f"Error streaming chat response: {e}")
+            yield format_sse({"detail": "Error processing chat query"}, event="error")
+        finally:
+            ticket.release()
+            end_time = time.perf_counter()
+            if first_token_time is not None:
+                generation_time = end_time - first_token_time
+                logger.info(
+                    f"Chat stream for {research_id}: "
+                    f"time to first token {first_token_time - start_time:.2f}s, "
+                    f"{token_count} tokens in {end_time - start_time:.2f}s "
+                    f"({token_count / generation_time if generation_time else 0:.1f} tokens/sec)"
+                )
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Frees the slot if the client is gone before the stream starts
+        background=BackgroundTask(ticket.release),
+    )
+
 
 @router.get("/chat/{research_id}")
 async def get_all_chat(research_id: str = Path(...)):
@@ -150,17 +349,8 @@ async def get_all_chat(research_id: str = Path(...)):
 @router.get("/chat/suggestions/{research_id}")
 async def generate_suggestions(research_id: str = Path(...)):
     try:
-        vector_store = QdrantVectorStore(
-            client=qdrant_client, collection_name=research_id
-        )
-
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
-        index = VectorStoreIndex.from_vector_store(
-            vector_store, storage_context=storage_context
-        )
-
-        sources_list = await get_sources_list(research_id=research_id)
-        sources = "\n- ".join(sources_list)
+        research_sources = await get_sources(research_id=research_id) or []
+        sources = "\n- ".join(source_name(source) for source in research_sources)
 
         messages = await redis_chat_store.aget_messages(key=research_id)
         token_count = 0
@@ -175,8 +365,6 @@ async def generate_suggestions(research_id: str = Path(...)):
 
         messages = limited_messages
 
-        query_engine = index.as_query_engine()
-
         chat_history = "\n".join([f"- {message.content}" for message in messages])
 
         query = (
@@ -188,11 +376,39 @@ async def generate_suggestions(research_id: str = Path(...)):
             "Strictly only respond with questions and nothing else. Don't mention question number."
         )
 
-        logger.info(f"Generating questions: {query}")
-
-        response = query_engine.query(query)
+        async def generate() -> str:
+            logger.info(f"Generating questions: {query}")
+
+            if any(source.get("topics") for source in research_sources):
+                # Topics precomputed at ingestion stand in for retrieved chunks
+                topics = "\n".join(
+                    f"- {source_name(source)}: {', '.join(source.get('topics', []))}"
+                    for source in research_sources
+                )
+                response = await Settings.llm.acomplete(
+                    f"Key topics of the sources:\n{topics}\n\n{query}"
+                )
+                return response.text
+
+            handle = await index_registry.get(research_id)
+            retriever = handle.retriever()
+            query_engine = handle.get_engine(
+                "query", lambda index: RetrieverQueryEngine.from_args(retriever)
+            )
+            response = await query_engine.aquery(query)
+            return response.response
+
+        # Sources are fixed within a cache version, so the history is the key
+        response, _ = await semantic_cache.get_or_compute(
+            research_id,
+            "suggestions",
+            f"Follow up questions for:\n{chat_history or 'no chat history'}",
+            lambda: admitted(generate),
+        )
+        return {"response": response}
 
-        return {"response": response.response}
+    except AdmissionRejected as e:
+        raise rejected_response(e)
 
     except Exception as e:
         logger.error(f"Error generating questions: {e}")
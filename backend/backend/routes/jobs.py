@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Path
+
+from backend.config import logger
+from backend.jobs import cancel_job, get_job
+from backend.models import Job
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}", response_model=Job)
+async def get_job_status(job_id: str = Path(...)):
+    try:
+        job = await get_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return Job(**job)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=Job)
+async def cancel_job_request(job_id: str = Path(...)):
+    try:
+        job = await cancel_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return Job(**job)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error cancelling job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
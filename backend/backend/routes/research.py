@@ -4,8 +4,14 @@ from bson import ObjectId
 from fastapi import APIRouter, HTTPException, Path, Query
 
 from backend.config import logger
-from backend.database import qdrant_client, redis_chat_store, research_collection
+from backend.database import (
+    async_qdrant_client,
+    redis_chat_store,
+    research_collection,
+)
+from backend.index_registry import index_registry
 from backend.models import PaginatedResearch, Research, UpdateResearch
+from backend.semantic_cache import semantic_cache
 
 router = APIRouter()
 
@@ -135,10 +141,12 @@ async def delete_research(research_id: str = Path(...)):
 
         # Delete Qdrant collection
         try:
-            qdrant_client.delete_collection(research_id)
+            await async_qdrant_client.delete_collection(research_id)
+            index_registry.invalidate(research_id)
         except Exception as e:
             logger.error(f"Error deleting Qdrant collection: {e}")
             # Continue even if Qdrant deletion fails
+        await semantic_cache.invalidate(research_id)
 
         # Delete Redis chat history
         try:
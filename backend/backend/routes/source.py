@@ -1,49 +1,28 @@
-from datetime import datetime
-from typing import Dict, List
+import asyncio
+import os
+from typing import Dict, List, Optional
 
 from bson import ObjectId
 from fastapi import APIRouter, File, HTTPException, Path, UploadFile
-from llama_index.core import StorageContext, VectorStoreIndex
-from llama_index.core.vector_stores.types import (
-    FilterOperator,
-    MetadataFilter,
-    MetadataFilters,
-)
-from llama_index.vector_stores.qdrant import QdrantVectorStore
-from pydantic import HttpUrl
 
 from backend.config import logger
-from backend.database import qdrant_client, research_collection
-from backend.models import FileSource, FileSourcesResponse, SourceType, URLRequest
-from backend.processors.process_files import process_files
-from backend.processors.process_url import process_url
+from backend.database import research_collection
+from backend.ingestion import delete_source_vectors
+from backend.jobs import enqueue_job, job_dir
+from backend.models import (
+    FileSource,
+    FileSourcesResponse,
+    LinkSource,
+    LinkSourcesResponse,
+    SourceType,
+    URLBatchRequest,
+    URLRequest,
+)
+from backend.processors.utils import copy_in_chunks
 
 router = APIRouter()
 
 
-async def add_source_to_mongodb(
-    research_id: str,
-    reference_id: str,
-    url: str = None,
-    filename: str = None,
-    source_type: SourceType = None,
-) -> None:
-    source_data = {
-        "reference_id": reference_id,
-        "type": source_type.value,
-        "created_at": datetime.utcnow().isoformat(),
-    }
-    if url:
-        source_data["url"] = url
-    if filename:
-        source_data["filename"] = filename
-
-    await research_collection.update_one(
-        {"_id": ObjectId(research_id)},
-        {"$push": {"sources": source_data}},
-    )
-
-
 async def remove_source_from_mongodb(research_id: str, reference_id: str) -> bool:
     try:
         research_id_obj = ObjectId(research_id)
@@ -57,41 +36,25 @@ async def remove_source_from_mongodb(research_id: str, reference_id: str) -> boo
         return False
 
 
-async def process_link_source(research_id: str, url: HttpUrl) -> Dict[str, str]:
-    url_str = str(url)
-    reference_id = str(ObjectId())
-
-    try:
-        research = await research_collection.find_one({"_id": ObjectId(research_id)})
-        if not research:
-            raise HTTPException(status_code=404, detail="Research not found")
-
-        documents = await process_url(
-            url=url_str, research_id=research_id, reference_id=reference_id
-        )
-        if not documents:
-            raise ValueError("No content could be extracted from URL")
-
-        vector_store = QdrantVectorStore(
-            client=qdrant_client, collection_name=research_id
-        )
-
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
-
-        VectorStoreIndex.from_documents(
-            documents=documents,
-            storage_context=storage_context,
-        )
+async def save_job_file(job_id: str, index: int, file: UploadFile) -> str:
+    """Copy an uploaded file into the job directory so a worker can read it."""
+    directory = job_dir(job_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{index}-{os.path.basename(file.filename)}")
+    await asyncio.to_thread(copy_in_chunks, file.file, path)
+    return path
 
-        await add_source_to_mongodb(
-            research_id, reference_id, url_str, source_type=SourceType.LINK
-        )
 
-        return {"reference_id": reference_id}
+async def get_research_or_404(research_id: str) -> dict:
+    try:
+        research_id_obj = ObjectId(research_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid research ID format")
 
-    except Exception as e:
-        logger.error(f"Error processing URL {url_str}: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error processing URL: {str(e)}")
+    research = await research_collection.find_one({"_id": research_id_obj})
+    if not research:
+        raise HTTPException(status_code=404, detail="Research not found")
+    return research
 
 
 @router.post("/research/{research_id}/sources/link")
@@ -99,53 +62,89 @@ async def add_source(
     research_id: str = Path(...), url_request: URLRequest = None
 ) -> Dict[str, str]:
     try:
-        result = await process_link_source(research_id, url_request.url)
+        await get_research_or_404(research_id)
+
+        job_id = str(ObjectId())
+        reference_id = str(ObjectId())
+        await enqueue_job(
+            job_id,
+            "link",
+            research_id,
+            {"url": str(url_request.url), "reference_id": reference_id},
+        )
         return {
-            "message": "URL processed successfully",
-            "reference_id": result["reference_id"],
+            "message": "URL queued for processing",
+            "reference_id": reference_id,
+            "job_id": job_id,
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error adding source: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post(
-    "/research/{research_id}/sources/files", response_model=FileSourcesResponse
+    "/research/{research_id}/sources/links", response_model=LinkSourcesResponse
 )
-async def add_file_sources(
-    research_id: str = Path(...), files: List[UploadFile] = File(...)
-) -> FileSourcesResponse:
+async def add_link_sources(
+    research_id: str = Path(...), batch_request: URLBatchRequest = None
+) -> LinkSourcesResponse:
     try:
-        processed_files = []
-        for file in files:
-            reference_id = str(ObjectId())
-            documents = await process_files(
-                files=[file], research_id=research_id, reference_id=reference_id
+        await get_research_or_404(research_id)
+        if not batch_request or not batch_request.urls:
+            raise HTTPException(status_code=400, detail="At least one URL is required")
+
+        job_id = str(ObjectId())
+        queued_links = [
+            LinkSource(
+                url=str(url), research_id=research_id, reference_id=str(ObjectId())
             )
+            for url in dict.fromkeys(batch_request.urls)
+        ]
+        await enqueue_job(
+            job_id,
+            "links",
+            research_id,
+            {
+                "links": [
+                    {"url": link.url, "reference_id": link.reference_id}
+                    for link in queued_links
+                ]
+            },
+        )
 
-            if not documents:
-                logger.error("No content could be extracted from files")
-                continue
-
-            vector_store = QdrantVectorStore(
-                client=qdrant_client, collection_name=research_id
-            )
+        return {
+            "message": "Links queued for processing",
+            "links": queued_links,
+            "job_id": job_id,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error adding link sources: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-            storage_context = StorageContext.from_defaults(vector_store=vector_store)
 
-            VectorStoreIndex.from_documents(
-                documents=documents,
-                storage_context=storage_context,
-            )
+@router.post(
+    "/research/{research_id}/sources/files", response_model=FileSourcesResponse
+)
+async def add_file_sources(
+    research_id: str = Path(...), files: List[UploadFile] = File(...)
+) -> FileSourcesResponse:
+    try:
+        await get_research_or_404(research_id)
 
-            await add_source_to_mongodb(
-                research_id,
-                reference_id,
-                filename=file.filename,
-                source_type=SourceType.FILE,
+        job_id = str(ObjectId())
+        queued_files = []
+        payload_files = []
+        for index, file in enumerate(files):
+            reference_id = str(ObjectId())
+            path = await save_job_file(job_id, index, file)
+            payload_files.append(
+                {"filename": file.filename, "path": path, "reference_id": reference_id}
             )
-
-            processed_files.append(
+            queued_files.append(
                 FileSource(
                     filename=file.filename,
                     research_id=research_id,
@@ -153,13 +152,70 @@ async def add_file_sources(
                 )
             )
 
-        return {"message": "Files processed successfully", "files": processed_files}
+        await enqueue_job(job_id, "files", research_id, {"files": payload_files})
+
+        return {
+            "message": "Files queued for processing",
+            "files": queued_files,
+            "job_id": job_id,
+        }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error adding file sources: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.put("/research/{research_id}/sources/{reference_id}")
+async def update_source(
+    research_id: str = Path(...),
+    reference_id: str = Path(...),
+    file: Optional[UploadFile] = File(None),
+) -> Dict[str, str]:
+    """Re-ingest a changed source, re-embedding only the chunks that changed.
+
+    File sources take the new version as an upload, link sources are crawled
+    again. The job result reports how many chunks were reused and recomputed.
+    """
+    try:
+        research = await get_research_or_404(research_id)
+        source = next(
+            (
+                source
+                for source in research.get("sources", [])
+                if source.get("reference_id") == reference_id
+            ),
+            None,
+        )
+        if source is None:
+            raise HTTPException(status_code=404, detail="Source not found")
+
+        job_id = str(ObjectId())
+        payload = {"reference_id": reference_id}
+        if source["type"] == SourceType.FILE.value:
+            if file is None:
+                raise HTTPException(
+                    status_code=400, detail="A file is required to update a file source"
+                )
+            payload["filename"] = file.filename
+            payload["path"] = await save_job_file(job_id, 0, file)
+        else:
+            payload["url"] = source["url"]
+
+        await enqueue_job(job_id, "update", research_id, payload)
+        return {
+            "message": "Source update queued for processing",
+            "reference_id": reference_id,
+            "job_id": job_id,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating source: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/research/{research_id}/sources")
 async def get_sources(research_id: str = Path(...)):
     try:
@@ -203,33 +259,13 @@ async def delete_source(research_id: str = Path(...), reference_id: str = Path(.
             logger.error(f"Source not found in MongoDB: {reference_id}")
             raise HTTPException(status_code=404, detail="Source not found")
 
-        # Delete from Qdrant if collection exists
-        if qdrant_client.collection_exists(research_id):
-            try:
-                vector_store = QdrantVectorStore(
-                    client=qdrant_client, collection_name=research_id
-                )
-
-                filters = MetadataFilters(
-                    filters=[
-                        MetadataFilter(
-                            key="reference_id",
-                            operator=FilterOperator.EQ,
-                            value=reference_id,
-                        ),
-                    ]
-                )
-
-                vector_store.delete_nodes(filters=filters)
-
-                logger.info(
-                    f"Successfully deleted vectors for reference_id: {reference_id}"
-                )
-            except Exception as e:
-                logger.error(f"Error deleting from Qdrant: {e}", exc_info=True)
-                # Don't raise here since MongoDB deletion was successful
-        else:
-            logger.warning(f"Qdrant collection not found: {research_id}")
+        # Delete from Qdrant
+        try:
+            await delete_source_vectors(research_id, reference_id)
+            logger.info(f"Successfully deleted vectors for reference_id: {reference_id}")
+        except Exception as e:
+            logger.error(f"Error deleting from Qdrant: {e}", exc_info=True)
+            # Don't raise here since MongoDB deletion was successful
 
         return {"message": "Source deleted successfully"}
 
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from llama_index.core import Settings
+
+from backend.config import (
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_MAX_SCOPES,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+    logger,
+)
+from backend.database import redis_client
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def stack_vectors(vectors: Dict[Any, bytes]) -> Tuple[List[str], np.ndarray]:
+    """Entry ids and a row-normalized matrix of their float32 embeddings."""
+    if not vectors:
+        return [], np.empty((0, 0), dtype=np.float32)
+    ids = [k.decode() if isinstance(k, bytes) else k for k in vectors]
+    matrix = np.frombuffer(b"".join(vectors.values()), dtype=np.float32)
+    matrix = matrix.reshape(len(ids), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return ids, matrix / np.where(norms == 0, 1, norms)
+
+
+def best_match(
+    embedding: List[float], matrix: np.ndarray
+) -> Tuple[Optional[int], float]:
+    """Row of a row-normalized matrix most cosine-similar to embedding."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    if not len(matrix) or matrix.shape[1] != len(vector):
+        return None, 0.0
+    norm = np.linalg.norm(vector)
+    similarities = matrix @ (vector / (norm or 1))
+    best = int(np.argmax(similarities))
+    return best, float(similarities[best])
+
+
+class SemanticCache:
+    """Responses cached in Redis and looked up by query embedding.
+
+    Entries are scoped to a research, a namespace ("chat", "suggestions")
+    and the research's source-set version, which is bumped whenever its
+    sources change so answers built on old sources are never returned.
+    Scopes of old versions are not deleted but expire with their TTL.
+    Each scope is a Redis hash of entries, a hash of their float32
+    embeddings and a sorted set tracking recency; scopes expire after `ttl`
+    and keep at most `max_entries`. The embeddings of the last `max_scopes`
+    scopes are kept in memory as a matrix, reloaded only after the scope's
+    generation counter changes. Redis errors are logged and treated as
+    misses.
+    """
+
+    def __init__(
+        self,
+        client,
+        prefix: str = "aurora:semantic",
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl: int = SEMANTIC_CACHE_TTL,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        max_scopes: int = SEMANTIC_CACHE_MAX_SCOPES,
+        enabled: bool = SEMANTIC_CACHE_ENABLED,
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.lookup_seconds = 0.0
+        self.saved_seconds = 0.0
+        self.matrix_loads = 0
+        self._matrices: "OrderedDict[str, Tuple[Any, List[str], np.ndarray]]" = (
+            OrderedDict()
+        )
+
+    def _version_key(self, research_id: str) -> str:
+        return f"{self.prefix}:{research_id}:version"
+
+    async def _scope_key(self, research_id: str, namespace: str) -> str:
+        version = await self.client.get(self._version_key(research_id))
+        return f"{self.prefix}:{research_id}:{int(version or 0)}:{namespace}"
+
+    async def _matrix(self, scope_key: str) -> Tuple[List[str], np.ndarray]:
+        """Entry ids and embedding matrix of a scope, reloaded once it changes."""
+        generation = await self.client.get(f"{scope_key}:generation")
+        cached = self._matrices.get(scope_key)
+        if cached is not None and cached[0] == generation:
+            self._matrices.move_to_end(scope_key)
+            return cached[1], cached[2]
+
+        vectors = await self.client.hgetall(f"{scope_key}:vectors")
+        ids, matrix = await asyncio.to_thread(stack_vectors, vectors)
+        self.matrix_loads += 1
+        self._matrices[scope_key] = (generation, ids, matrix)
+        self._matrices.move_to_end(scope_key)
+        while len(self._matrices) > self.max_scopes:
+            self._matrices.popitem(last=False)
+        return ids, matrix
+
+    async def lookup(
+        self, scope_key: str, query: str
+    ) -> Tuple[Optional[Any], Optional[List[float]]]:
+        """Cached response of the most similar query, plus the query embedding.
+
+        The embedding is returned so a miss can be stored without embedding
+        the query again; it is None if the query could not be embedded.
+        """
+        start_time = time.perf_counter()
+        embedding = None
+        try:
+            embedding = await Settings.embed_model.aget_query_embedding(
+                normalize_query(query)
+            )
+            ids, matrix = await self._matrix(scope_key)
+            index, similarity = await asyncio.to_thread(best_match, embedding, matrix)
+            value = None
+            if index is not None and similarity >= self.threshold:
+                value = await self.client.hget(scope_key, ids[index])
+            if value is not None:
+                entry = json.loads(value)
+                await self.client.zadd(f"{scope_key}:lru", {entry["id"]: time.time()})
+                self.hits += 1
+                self.saved_seconds += entry["compute_seconds"]
+                logger.info(
+                    f"Semantic cache hit for {scope_key} (similarity {similarity:.3f})"
+                )
+                return entry["response"], embedding
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error reading from semantic cache: {e}")
+        finally:
+            self.lookup_seconds += time.perf_counter() - start_time
+        self.misses += 1
+        return None, embedding
+
+    async def store(
+        self,
+        scope_key: str,
+        query: str,
+        embedding: List[float],
+        response: Any,
+        compute_seconds: float,
+    ) -> None:
+        entry_id = uuid.uuid4().hex
+        entry = {
+            "id": entry_id,
+            "query": query,
+            "response": response,
+            "compute_seconds": compute_seconds,
+        }
+        vector = np.asarray(embedding, dtype=np.float32).tobytes()
+        lru_key = f"{scope_key}:lru"
+        vectors_key = f"{scope_key}:vectors"
+        generation_key = f"{scope_key}:generation"
+        try:
+            pipe = self.client.pipeline()
+            pipe.hset(scope_key, entry_id, json.dumps(entry))
+            pipe.hset(vectors_key, entry_id, vector)
+            pipe.zadd(lru_key, {entry_id: time.time()})
+            pipe.incr(generation_key)
+            for key in (scope_key, vectors_key, lru_key, generation_key):
+                pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+            excess = await self.client.zcard(lru_key) - self.max_entries
+            if excess > 0:
+                evicted = await self.client.zpopmin(lru_key, excess)
+                ids = [k.decode() if isinstance(k, bytes) else k for k, _ in evicted]
+                if ids:
+                    pipe = self.client.pipeline()
+                    pipe.hdel(scope_key, *ids)
+                    pipe.hdel(vectors_key, *ids)
+                    pipe.incr(generation_key)
+                    await pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error writing to semantic cache: {e}")
+
+    async def get_or_compute(
+        self,
+        research_id: str,
+        namespace: str,
+        query: str,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, bool]:
+        """Return (response, cached), computing and storing it on a miss.
+
+        The scope is resolved before computing, so a response computed while
+        the sources change is stored under the old version and never served.
+        """
+        if not self.enabled:
+            return await compute(), False
+        try:
+            scope_key = await self._scope_key(research_id, namespace)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error reading from semantic cache: {e}")
+            return await compute(), False
+
+        response, embedding = await self.lookup(scope_key, query)
+        if response is not None:
+            return response, True
+
+        start_time = time.perf_counter()
+        response = await compute()
+        if embedding is None:
+            return response, False
+        await self.store(
+            scope_key,
+            query,
+            embedding,
+            response,
+            time.perf_counter() - start_time,
+        )
+        return response, False
+
+    async def invalidate(self, research_id: str) -> None:
+        """Drop the cached responses of a research after its sources change.
+
+        Bumping the version moves lookups to fresh scopes; the old scopes are
+        left to expire after `ttl`.
+        """
+        try:
+            await self.client.incr(self._version_key(research_id))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error invalidating semantic cache of {research_id}: {e}")
+        scope_prefix = f"{self.prefix}:{research_id}:"
+        for scope_key in list(self._matrices):
+            if scope_key.startswith(scope_prefix):
+                del self._matrices[scope_key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_lookup_seconds": self.lookup_seconds / lookups if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "matrix_loads": self.matrix_loads,
+        }
+
+
+semantic_cache = SemanticCache(redis_client)
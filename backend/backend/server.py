@@ -1,6 +1,19 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from backend.admission import admission_controller
+from backend.artifacts import artifact_store
+from backend.cache import cache_stats
+from backend.cpu_executor import cpu_executor
+from backend.index_registry import index_registry
+from backend.jobs import job_workers
+from backend.nim_client import nim_client
+from backend.processors.crawler_pool import crawler_pool
+from backend.processors.office_converter import office_converter
+from backend.processors.process_url import close_image_session
+from backend.retrieval import warm_reranker
 from backend.routes import router
+from backend.semantic_cache import semantic_cache
 from fastapi.encoders import jsonable_encoder
 from datetime import datetime
 
@@ -12,7 +25,22 @@ class CustomJSONEncoder:
         return jsonable_encoder(obj)
 
 
-app = FastAPI(json_encoder=CustomJSONEncoder)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await job_workers.start()
+    office_converter.start()
+    crawler_pool.start()
+    await warm_reranker()
+    yield
+    await crawler_pool.stop()
+    await office_converter.stop()
+    await job_workers.stop()
+    await nim_client.close()
+    await close_image_session()
+    cpu_executor.shutdown()
+
+
+app = FastAPI(json_encoder=CustomJSONEncoder, lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -31,7 +59,50 @@ app.include_router(router)
 async def health_check():
     return {"status": "healthy"}
 
+
+@app.get("/metrics/cache")
+async def get_cache_metrics():
+    return cache_stats()
+
+
+@app.get("/metrics/chat")
+async def get_chat_metrics():
+    return admission_controller.stats()
+
+
+@app.get("/metrics/semantic-cache")
+async def get_semantic_cache_metrics():
+    return semantic_cache.stats()
+
+
+@app.get("/metrics/artifacts")
+async def get_artifact_metrics():
+    return artifact_store.stats()
+
+
+@app.get("/metrics/cpu")
+async def get_cpu_metrics():
+    return cpu_executor.stats()
+
+
+@app.get("/metrics/office")
+async def get_office_metrics():
+    return office_converter.stats()
+
+
+@app.get("/metrics/crawler")
+async def get_crawler_metrics():
+    return crawler_pool.stats()
+
+
+@app.get("/metrics/indexes")
+async def get_index_metrics():
+    return index_registry.stats()
+
+
 if __name__ == "__main__":
+    # For local runs only: every CPU worker re-imports this script, deploy
+    # with `uvicorn backend.server:app` instead
     import uvicorn
 
     uvicorn.run(app, host="0.0.0.0", port=8000)
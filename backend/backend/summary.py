@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import re
+import time
+from typing import Dict, List, Tuple
+
+from llama_index.core import Settings
+from llama_index.core.schema import BaseNode
+
+from backend.cache import content_key, create_cache
+from backend.config import (
+    SUMMARY_BATCH_TOKENS,
+    SUMMARY_CACHE_MAX_ENTRIES,
+    SUMMARY_CONCURRENCY,
+    SUMMARY_MAX_TOPICS,
+    SUMMARY_TOKEN_BUDGET,
+    logger,
+)
+from backend.index_registry import scroll_source_nodes
+from backend.prompts import (
+    KEY_TOPICS_PROMPT,
+    MAP_SUMMARY_PROMPT,
+    REDUCE_SUMMARY_PROMPT,
+    SOURCE_SUMMARIES_CONTEXT,
+)
+
+summary_cache = create_cache("summaries", SUMMARY_CACHE_MAX_ENTRIES)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, good enough for budgeting prompts."""
+    return len(text) // 4 + 1
+
+
+def source_name(source: dict) -> str:
+    return source.get("filename") or source.get("url", "")
+
+
+def parse_topics(text: str, max_topics: int = SUMMARY_MAX_TOPICS) -> List[str]:
+    """Topics from an LLM answer listing one per line, bullets and numbers removed."""
+    topics = []
+    for line in text.splitlines():
+        topic = line.strip().lstrip("-*•0123456789.) ").strip()
+        if topic and topic not in topics:
+            topics.append(topic)
+    return topics[:max_topics]
+
+
+def batch_texts(texts: List[str], max_tokens: int) -> List[List[str]]:
+    """Group consecutive texts into batches of at most max_tokens.
+
+    A text larger than max_tokens gets a batch of its own.
+    """
+    batches, batch, batch_tokens = [], [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if batch and batch_tokens + tokens > max_tokens:
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# Suffix of the "source" metadata of PDF chunks, e.g. "report-page3-block12"
+SOURCE_PART = re.compile(r"-(block|image|table)(\d+)$")
+
+
+def document_order(node: BaseNode) -> Tuple[int, str, int, int]:
+    """Sort key putting the chunks of a source in page and block order."""
+    match = SOURCE_PART.search(node.metadata.get("source", ""))
+    kind, number = (match.group(1), int(match.group(2))) if match else ("", 0)
+    return (
+        node.metadata.get("page_num") or 0,
+        kind,
+        number,
+        node.start_char_idx or 0,
+    )
+
+
+async def get_source_nodes(research_id: str, reference_id: str) -> List[BaseNode]:
+    """Chunks of a source in document order."""
+    nodes = await scroll_source_nodes(research_id, reference_id)
+    nodes.sort(key=document_order)
+    return nodes
+
+
+class SummaryEngine:
+    """Map-reduce summaries of sources, cached per source content.
+
+    Each source's chunks are summarized in parallel batches (map), and the
+    partial summaries are merged level by level until one remains (reduce).
+    Source summaries are cached by content, so adding a source only
+    summarizes that source. Summaries of all sources are merged the same way
+    until they fit in the token budget of the final prompt.
+    """
+
+    def __init__(
+        self,
+        batch_tokens: int = SUMMARY_BATCH_TOKENS,
+        token_budget: int = SUMMARY_TOKEN_BUDGET,
+        concurrency: int = SUMMARY_CONCURRENCY,
+    ):
+        self.batch_tokens = batch_tokens
+        self.token_budget = token_budget
+        self.concurrency = concurrency
+
+    async def _complete(
+        self, prompt: str, semaphore: asyncio.Semaphore, stats: dict
+    ) -> str:
+        async with semaphore:
+            stats["llm_calls"] += 1
+            response = await Settings.llm.acomplete(prompt)
+            return response.text.strip()
+
+    async def _merge(
+        self, name: str, texts: List[str], semaphore: asyncio.Semaphore, stats: dict
+    ) -> List[str]:
+        """Merge one level: each batch of texts becomes one summary."""
+        batches = batch_texts(texts, self.batch_tokens)
+        if len(batches) == len(texts) and len(texts) > 1:
+            # Every text fills a batch on its own, merge pairs to make progress
+            batches = [texts[i : i + 2] for i in range(0, len(texts), 2)]
+        return await asyncio.gather(
+            *(
+                self._complete(
+                    REDUCE_SUMMARY_PROMPT.format(source=name, text="\n\n".join(batch)),
+                    semaphore,
+                    stats,
+                )
+                for batch in batches
+            )
+        )
+
+    async def summarize_texts(
+        self, name: str, texts: List[str], semaphore: asyncio.Semaphore, stats: dict
+    ) -> str:
+        """Summarize the chunks of one source into a single summary."""
+        summaries = await asyncio.gather(
+            *(
+                self._complete(
+                    MAP_SUMMARY_PROMPT.format(source=name, text="\n\n".join(batch)),
+                    semaphore,
+                    stats,
+                )
+                for batch in batch_texts(texts, self.batch_tokens)
+            )
+        )
+        while len(summaries) > 1:
+            summaries = await self._merge(name, summaries, semaphore, stats)
+        return summaries[0] if summaries else ""
+
+    def cache_key(self, texts: List[str]) -> str:
+        text_hashes = sorted(hashlib.sha256(t.encode()).hexdigest() for t in texts)
+        content_hash = hashlib.sha256("".join(text_hashes).encode()).hexdigest()
+        return content_key(
+            getattr(Settings.llm, "model", ""), MAP_SUMMARY_PROMPT, content_hash
+        )
+
+    async def summarize_source(
+        self, research_id: str, source: dict, semaphore: asyncio.Semaphore, stats: dict
+    ) -> str:
+        nodes = await get_source_nodes(research_id, source["reference_id"])
+        texts = [node.get_content() for node in nodes]
+        if not texts:
+            return ""
+
+        async def summarize():
+            stats["summarized_sources"] += 1
+            return await self.summarize_texts(
+                source_name(source), texts, semaphore, stats
+            )
+
+        return await summary_cache.get_or_compute(self.cache_key(texts), summarize)
+
+    async def build_source_summary(self, research_id: str, source: dict) -> dict:
+        """Summary and key topics of a source, precomputed at ingestion."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats = {"llm_calls": 0, "summarized_sources": 0}
+        summary = await self.summarize_source(research_id, source, semaphore, stats)
+        if not summary:
+            return {"summary": "", "topics": []}
+
+        topics = await self._complete(
+            KEY_TOPICS_PROMPT.format(
+                source=source_name(source),
+                summary=summary,
+                max_topics=SUMMARY_MAX_TOPICS,
+            ),
+            semaphore,
+            stats,
+        )
+        return {"summary": summary, "topics": parse_topics(topics)}
+
+    async def summarize_research(
+        self, research_id: str, sources: List[dict]
+    ) -> Tuple[str, Dict]:
+        """Build a context holding the summaries of all sources.
+
+        Summaries precomputed at ingestion are used as they are; only sources
+        without one are summarized from their chunks. Returns the context and
+        stats with the number of LLM calls made and the wall time.
+        """
+        start_time = time.perf_counter()
+        stats = {
+            "llm_calls": 0,
+            "sources": len(sources),
+            "precomputed_sources": 0,
+            "summarized_sources": 0,
+        }
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def get_summary(source: dict) -> str:
+            if source.get("summary"):
+                stats["precomputed_sources"] += 1
+                return source["summary"]
+            return await self.summarize_source(research_id, source, semaphore, stats)
+
+        summaries = await asyncio.gather(*(get_summary(source) for source in sources))
+        sections = [
+            f"### {source_name(source)}\n{summary}"
+            for source, summary in zip(sources, summaries)
+            if summary
+        ]
+        while (
+            len(sections) > 1
+            and sum(map(estimate_tokens, sections)) > self.token_budget
+        ):
+            sections = await self._merge("these sources", sections, semaphore, stats)
+
+        stats["wall_time"] = round(time.perf_counter() - start_time, 3)
+        logger.info(
+            f"Summarized {len(sources)} sources of {research_id} "
+            f"({stats['summarized_sources']} not cached) with "
+            f"{stats['llm_calls']} LLM calls in {stats['wall_time']:.2f}s"
+        )
+        return SOURCE_SUMMARIES_CONTEXT.format(summaries="\n\n".join(sections)), stats
+
+
+summary_engine = SummaryEngine()
@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+
+from backend.config import WORKSPACE_RETENTION, WORKSPACE_ROOT, logger
+
+
+class Workspace:
+    """Scratch directory private to one ingestion run.
+
+    Every run gets a unique directory, so concurrent runs in one process or
+    across processes never share or delete each other's files. The directory
+    is removed on exit unless WORKSPACE_RETENTION asks to keep it. With
+    "on_error" it is kept if the run raised or marked a file as failed.
+    """
+
+    def __init__(self, prefix: str = "ingest-", retention: str = WORKSPACE_RETENTION):
+        os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix=prefix, dir=WORKSPACE_ROOT)
+        self.retention = retention
+        self.failed = False
+
+    def subdir(self, name: str) -> str:
+        """Return a subdirectory of the workspace, creating it if needed."""
+        path = os.path.join(self.path, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def mark_failed(self) -> None:
+        """Record that a file of this run failed, for "on_error" retention."""
+        self.failed = True
+
+    def cleanup(self, failed: bool = False) -> None:
+        failed = failed or self.failed
+        if self.retention == "always" or (self.retention == "on_error" and failed):
+            logger.info(f"Keeping workspace {self.path}")
+            return
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self) -> "Workspace":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.cleanup(failed=exc_type is not None)
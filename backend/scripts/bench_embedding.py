@@ -0,0 +1,115 @@
+"""Benchmark ingestion embedding throughput with a local fake embedding model.
+
+Usage: python -m scripts.bench_embedding [--nodes 2000] [--batch-latency 0.05]
+
+The fake model answers each batch request after a fixed latency, like a
+remote endpoint would. Nodes are upserted into an in-memory Qdrant
+collection. The baseline embeds batches of 10 (the LlamaIndex default)
+one request at a time and writes every node at the end, as
+VectorStoreIndex.from_documents did. The pipeline uses EMBED_BATCH_SIZE,
+EMBED_CONCURRENCY and UPSERT_BATCH_SIZE. Each run uses an empty
+in-memory embedding cache.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from unittest import mock
+
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.schema import TextNode
+from llama_index.vector_stores.qdrant import QdrantVectorStore
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from backend import embedding
+from backend.cache import ContentCache
+from backend.config import EMBED_BATCH_SIZE, EMBED_CONCURRENCY, UPSERT_BATCH_SIZE
+
+EMBED_DIM = 256
+
+
+class MemoryCacheBackend:
+    """Dict-backed cache, so the benchmark measures embedding and upserts only."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value):
+        self.values[key] = value
+
+    async def get_many(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    async def set_many(self, items):
+        self.values.update(items)
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+
+class FakeEmbedding(MockEmbedding):
+    """Constant vectors returned after a fixed latency per batch request."""
+
+    batch_latency: float = 0.05
+
+    async def _aget_text_embeddings(self, texts):
+        await asyncio.sleep(self.batch_latency)
+        return [[0.1] * self.embed_dim for _ in texts]
+
+
+async def run(name, nodes, latency, **pipeline_kwargs) -> float:
+    vector_store = QdrantVectorStore(
+        client=QdrantClient(":memory:"),
+        aclient=AsyncQdrantClient(":memory:"),
+        collection_name=name,
+    )
+    embed_model = FakeEmbedding(embed_dim=EMBED_DIM, batch_latency=latency)
+    cache = ContentCache(f"bench-{name}", MemoryCacheBackend())
+    with mock.patch.object(embedding, "embedding_cache", cache):
+        start_time = time.perf_counter()
+        await embedding.embed_and_upsert(
+            nodes, vector_store, embed_model, **pipeline_kwargs
+        )
+        return time.perf_counter() - start_time
+
+
+async def main(node_count: int, latency: float) -> dict:
+    def make_nodes():
+        return [TextNode(text=f"chunk {i} of the benchmark") for i in range(node_count)]
+
+    baseline = await run(
+        "baseline",
+        make_nodes(),
+        latency,
+        batch_size=10,
+        concurrency=1,
+        upsert_batch_size=node_count,
+    )
+    pipelined = await run(
+        "pipelined",
+        make_nodes(),
+        latency,
+        batch_size=EMBED_BATCH_SIZE,
+        concurrency=EMBED_CONCURRENCY,
+        upsert_batch_size=UPSERT_BATCH_SIZE,
+    )
+
+    return {
+        "nodes": node_count,
+        "batch_latency": latency,
+        "baseline_nodes_per_sec": round(node_count / baseline, 1),
+        "pipelined_nodes_per_sec": round(node_count / pipelined, 1),
+        "speedup": round(baseline / pipelined, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--batch-latency", type=float, default=0.05)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.nodes, args.batch_latency)), indent=2))
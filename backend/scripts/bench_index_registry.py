@@ -0,0 +1,93 @@
+"""Micro-benchmark of per-request chat engine setup with and without the registry.
+
+Usage: python -m scripts.bench_index_registry [--requests 200] [--memory]
+
+"before" rebuilds the vector store, storage context, index, memory and
+chat engine for every request, as /chat used to. "after" goes through
+get_chat_engine, which looks the handle up in index_registry and reuses
+its cached retriever. Uses the configured Qdrant unless --memory is
+given; the collection does not need to hold any points.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from unittest import mock
+
+import numpy as np
+from llama_index.core import Settings
+from llama_index.core.chat_engine.types import ChatMode
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.llms import MockLLM
+from llama_index.core.memory import ChatMemoryBuffer
+from llama_index.core.storage.chat_store import SimpleChatStore
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from backend import index_registry as registry_module
+from backend.index_registry import IndexHandle, index_registry
+from backend.routes import chat
+
+COLLECTION = "bench_index_registry"
+
+
+def summarize(latencies) -> dict:
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+    }
+
+
+def build_uncached() -> None:
+    handle = IndexHandle(COLLECTION)
+    handle.index.as_chat_engine(
+        chat_mode=ChatMode.CONTEXT,
+        memory=ChatMemoryBuffer.from_defaults(),
+        **handle.retrieval_kwargs(),
+    )
+
+
+async def main(requests: int) -> dict:
+    before = []
+    for _ in range(requests):
+        start_time = time.perf_counter()
+        build_uncached()
+        before.append(time.perf_counter() - start_time)
+
+    index_registry.clear()
+    after = []
+    for _ in range(requests):
+        start_time = time.perf_counter()
+        await chat.get_chat_engine(COLLECTION)
+        after.append(time.perf_counter() - start_time)
+
+    return {
+        "requests": requests,
+        "before": summarize(before),
+        "after": summarize(after),
+        "registry": index_registry.stats(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--memory", action="store_true", help="use in-memory Qdrant")
+    args = parser.parse_args()
+
+    Settings.llm = MockLLM()
+    Settings.embed_model = MockEmbedding(embed_dim=8)
+    patches = [mock.patch.object(chat, "redis_chat_store", SimpleChatStore())]
+    if args.memory:
+        patches += [
+            mock.patch.object(
+                registry_module, "qdrant_client", QdrantClient(":memory:")
+            ),
+            mock.patch.object(
+                registry_module, "async_qdrant_client", AsyncQdrantClient(":memory:")
+            ),
+        ]
+    for patch in patches:
+        patch.start()
+    print(json.dumps(asyncio.run(main(args.requests)), indent=2))
@@ -0,0 +1,134 @@
+"""Benchmark page-parallel PDF ingestion against the serial path.
+
+Usage: python -m scripts.bench_pdf_ingestion [--pages 40] [--vision-latency 0.3]
+
+Builds a synthetic PDF whose pages each hold text blocks, a ruled table
+and a chart-like image, and ingests it twice with a fake NIM endpoint
+answering after a fixed latency: once with pages and vision calls
+processed one at a time, as get_pdf_documents used to, and once with the
+configured PDF_PAGE_CONCURRENCY and VISION_CONCURRENCY. Each run gets an
+empty vision cache. Reports pages/sec and checks both runs produce the
+same documents in the same order.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+import fitz
+import numpy as np
+from PIL import Image, ImageDraw
+
+from backend.cache import ContentCache, DiskCacheBackend
+from backend.config import PDF_PAGE_CONCURRENCY, VISION_CONCURRENCY
+from backend.cpu_executor import cpu_executor
+from backend.nim_client import nim_client
+from backend.processors import process_files, utils
+
+
+def chart_png(seed: int) -> bytes:
+    """A noisy line chart, busy enough to pass the local pre-classifier."""
+    rng = np.random.default_rng(seed)
+    image = Image.new("RGB", (480, 320), "white")
+    draw = ImageDraw.Draw(image)
+    for x in range(40, 480, 40):
+        draw.line([(x, 20), (x, 300)], fill=(200, 200, 200))
+    points = [(40 + i * 8, 160 + int(v)) for i, v in enumerate(rng.normal(0, 60, 55))]
+    draw.line(points, fill=(30, 90, 200), width=3)
+    draw.line([(40, 20), (40, 300), (470, 300)], fill="black", width=2)
+    with tempfile.SpooledTemporaryFile() as f:
+        image.save(f, format="PNG")
+        f.seek(0)
+        return f.read()
+
+
+def build_pdf(path: str, pages: int) -> None:
+    document = fitz.open()
+    for pagenum in range(pages):
+        page = document.new_page()
+        page.insert_text((50, 60), f"Section {pagenum + 1}", fontsize=16)
+        for line in range(6):
+            page.insert_text(
+                (50, 90 + line * 14),
+                f"Paragraph {line} of page {pagenum + 1} on quarterly results.",
+                fontsize=10,
+            )
+        # A 4x3 ruled table
+        for row in range(5):
+            page.draw_line((50, 200 + row * 20), (350, 200 + row * 20))
+        for col in range(4):
+            page.draw_line((50 + col * 100, 200), (50 + col * 100, 280))
+        for row in range(4):
+            for col in range(3):
+                page.insert_text(
+                    (55 + col * 100, 215 + row * 20), f"r{row}c{col}", fontsize=9
+                )
+        page.insert_image(fitz.Rect(50, 320, 410, 560), stream=chart_png(pagenum))
+        page.insert_text((50, 590), "Figure: revenue by month.", fontsize=10)
+    document.save(path)
+
+
+def fake_nim(latency: float):
+    async def post(url, payload):
+        await asyncio.sleep(latency)
+        content = "GRAPH\nA line chart." if "vision" in url else "Month | Revenue"
+        return {"choices": [{"message": {"content": content}}]}
+
+    return post
+
+
+async def ingest(
+    pdf_path: str, cache_dir: str, page_concurrency: int, vision_concurrency: int
+):
+    cache_path = os.path.join(cache_dir, f"vision-{page_concurrency}.sqlite3")
+    cache = ContentCache(
+        f"bench-vision-{page_concurrency}", DiskCacheBackend(cache_path, 3600, 100000)
+    )
+    with mock.patch.object(utils, "vision_cache", cache), mock.patch.object(
+        process_files, "PDF_PAGE_CONCURRENCY", page_concurrency
+    ), mock.patch.object(process_files, "VISION_CONCURRENCY", vision_concurrency):
+        start_time = time.perf_counter()
+        documents = await process_files.get_pdf_path_documents(
+            pdf_path, "bench.pdf", "bench", "bench"
+        )
+        return documents, time.perf_counter() - start_time
+
+
+async def main(pages: int, latency: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.object(
+        nim_client, "post", fake_nim(latency)
+    ):
+        pdf_path = os.path.join(tmp, "bench.pdf")
+        build_pdf(pdf_path, pages)
+        # Start the pool outside the timed runs
+        await cpu_executor.run(process_files.get_page_count, pdf_path)
+
+        serial_docs, serial_time = await ingest(pdf_path, tmp, 1, 1)
+        parallel_docs, parallel_time = await ingest(
+            pdf_path, tmp, PDF_PAGE_CONCURRENCY, VISION_CONCURRENCY
+        )
+        cpu_executor.shutdown()
+
+    assert [d.metadata["source"] for d in serial_docs] == [
+        d.metadata["source"] for d in parallel_docs
+    ], "document order differs between runs"
+    return {
+        "pages": pages,
+        "documents": len(parallel_docs),
+        "vision_latency": latency,
+        "serial_pages_per_sec": round(pages / serial_time, 2),
+        "parallel_pages_per_sec": round(pages / parallel_time, 2),
+        "speedup": round(serial_time / parallel_time, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--vision-latency", type=float, default=0.3)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.pages, args.vision_latency)), indent=2))
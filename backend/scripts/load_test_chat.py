@@ -0,0 +1,245 @@
+"""Load test of concurrent /chat requests against a fake LLM.
+
+Usage: python -m scripts.load_test_chat [--chats 8 20] [--memory]
+                                        [--generation-seconds 2]
+
+Serves the chat routes with uvicorn on a local port. The LLM answers after
+a fixed async delay and the query embedding is a local bag-of-words, so
+only the retrieval path talks to a real service: the configured Qdrant,
+or an in-memory one with --memory. Set RERANK_MODEL to include reranking.
+A collection is seeded with chunks and removed at the end. For each batch
+size, all chats are sent at once and the wall time is compared with the
+time the same chats would take one after another. Meanwhile /health is
+polled, and its p50/p99 latency is reported next to the idle latency; a
+responsive event loop keeps the two close. Chats rejected by admission
+control show up as 429 status codes.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from unittest import mock
+
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from llama_index.core import Settings
+from llama_index.core.embeddings import BaseEmbedding
+from llama_index.core.llms import (
+    ChatMessage,
+    ChatResponse,
+    CompletionResponse,
+    CustomLLM,
+    LLMMetadata,
+    MessageRole,
+)
+from llama_index.core.llms.callbacks import llm_chat_callback, llm_completion_callback
+from llama_index.core.schema import TextNode
+from llama_index.core.storage.chat_store import SimpleChatStore
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from backend import index_registry as registry_module
+from backend.index_registry import index_registry
+from backend.routes import chat
+from backend.semantic_cache import semantic_cache
+
+COLLECTION = "load_test_chat"
+PORT = 8765
+EMBED_DIM = 16
+HEALTH_INTERVAL = 0.02
+IDLE_SECONDS = 1.0
+
+
+class FakeEmbedding(BaseEmbedding):
+    """Hashed bag-of-words vectors."""
+
+    def _vector(self, text: str):
+        vector = np.zeros(EMBED_DIM)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % EMBED_DIM] += 1
+        return vector.tolist()
+
+    def _get_text_embedding(self, text):
+        return self._vector(text)
+
+    def _get_query_embedding(self, query):
+        return self._vector(query)
+
+    async def _aget_query_embedding(self, query):
+        return self._vector(query)
+
+
+class FakeLLM(CustomLLM):
+    """Answers after a fixed delay without blocking the event loop."""
+
+    generation_seconds: float = 2.0
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata()
+
+    @llm_completion_callback()
+    def complete(self, prompt, formatted=False, **kwargs):
+        time.sleep(self.generation_seconds)
+        return CompletionResponse(text="answer")
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt, formatted=False, **kwargs):
+        raise NotImplementedError
+
+    @llm_completion_callback()
+    async def acomplete(self, prompt, formatted=False, **kwargs):
+        await asyncio.sleep(self.generation_seconds)
+        return CompletionResponse(text="answer")
+
+    @llm_chat_callback()
+    async def achat(self, messages, **kwargs):
+        await asyncio.sleep(self.generation_seconds)
+        return ChatResponse(
+            message=ChatMessage(role=MessageRole.ASSISTANT, content="answer")
+        )
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(chat.router)
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    return app
+
+
+async def seed_collection() -> None:
+    handle = await index_registry.get(COLLECTION)
+    nodes = [
+        TextNode(
+            text=f"chunk {i} about topic {i % 7}",
+            metadata={"research_id": COLLECTION},
+        )
+        for i in range(50)
+    ]
+    for node in nodes:
+        node.embedding = Settings.embed_model.get_text_embedding(node.text)
+    await handle.vector_store.async_add(nodes)
+    index_registry.invalidate(COLLECTION)
+
+
+def start_server(app: FastAPI) -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=PORT, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def percentile_ms(values, q):
+    if not values:
+        return None
+    return round(float(np.percentile(np.array(values) * 1000, q)), 1)
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event) -> list:
+    """Latencies of /health requests sent until stop is set."""
+    latencies = []
+    while not stop.is_set():
+        start_time = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start_time)
+        await asyncio.sleep(HEALTH_INTERVAL)
+    return latencies
+
+
+async def measure_idle_health(client: httpx.AsyncClient) -> dict:
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe_health(client, stop))
+    await asyncio.sleep(IDLE_SECONDS)
+    stop.set()
+    latencies = await prober
+    return {
+        "health_p50_ms": percentile_ms(latencies, 50),
+        "health_p99_ms": percentile_ms(latencies, 99),
+    }
+
+
+async def run_batch(
+    client: httpx.AsyncClient, health_client: httpx.AsyncClient, chats: int
+) -> dict:
+    async def send(i):
+        start_time = time.perf_counter()
+        query = f"what about topic {i}"
+        response = await client.post(
+            "/chat", json={"research_id": COLLECTION, "query": query}
+        )
+        return response.status_code, time.perf_counter() - start_time
+
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe_health(health_client, stop))
+    start_time = time.perf_counter()
+    results = await asyncio.gather(*(send(i) for i in range(chats)))
+    wall = time.perf_counter() - start_time
+    stop.set()
+    health = await prober
+
+    codes = {}
+    for status, _ in results:
+        codes[status] = codes.get(status, 0) + 1
+    ok = [latency for status, latency in results if status == 200]
+    return {
+        "chats": chats,
+        "status_codes": codes,
+        "wall_seconds": round(wall, 2),
+        "serial_seconds": round(chats * Settings.llm.generation_seconds, 2),
+        "rejected": codes.get(429, 0),
+        "chat_p50_ms": percentile_ms(ok, 50),
+        "health_p50_ms": percentile_ms(health, 50),
+        "health_p99_ms": percentile_ms(health, 99),
+    }
+
+
+async def main(batches) -> dict:
+    await seed_collection()
+    base_url = f"http://127.0.0.1:{PORT}"
+    # /health gets its own connections so it never queues behind chats
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        async with httpx.AsyncClient(base_url=base_url, timeout=120) as health_client:
+            idle = await measure_idle_health(health_client)
+            runs = [await run_batch(client, health_client, chats) for chats in batches]
+    return {"idle": idle, "batches": runs}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, nargs="+", default=[8, 20])
+    parser.add_argument("--generation-seconds", type=float, default=2.0)
+    parser.add_argument("--memory", action="store_true", help="use in-memory Qdrant")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    Settings.embed_model = FakeEmbedding(model_name="fake")
+    Settings.llm = FakeLLM(generation_seconds=args.generation_seconds)
+    semantic_cache.enabled = False
+    mock.patch.object(chat, "redis_chat_store", SimpleChatStore()).start()
+    if args.memory:
+        mock.patch.object(
+            registry_module, "qdrant_client", QdrantClient(":memory:")
+        ).start()
+        mock.patch.object(
+            registry_module, "async_qdrant_client", AsyncQdrantClient(":memory:")
+        ).start()
+
+    server = start_server(create_app())
+    try:
+        print(json.dumps(asyncio.run(main(args.chats)), indent=2))
+    finally:
+        registry_module.qdrant_client.delete_collection(COLLECTION)
+        server.should_exit = True
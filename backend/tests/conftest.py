@@ -0,0 +1,10 @@
+import os
+
+import pytest
+
+os.environ.setdefault("NVIDIA_API_KEY", "test")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,21 @@
+"""Functions run in CPUExecutor workers; spawned workers import them by name."""
+
+import importlib
+import os
+import sys
+import time
+
+
+def sleep_and_return(seconds: float, value=None):
+    time.sleep(seconds)
+    return value
+
+
+def crash():
+    os._exit(1)
+
+
+def backend_modules_after_import(module_name: str):
+    """Import a worker module and list the backend modules the worker holds."""
+    importlib.import_module(module_name)
+    return sorted(name for name in sys.modules if name.startswith("backend"))
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from backend.admission import AdmissionController, AdmissionRejected
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_limits_concurrent_generations():
+    controller = AdmissionController(max_concurrent=2, max_queue=10, queue_timeout=5)
+    running = peak = 0
+
+    async def generate():
+        nonlocal running, peak
+        async with await controller.acquire():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+    await asyncio.gather(*(generate() for _ in range(6)))
+
+    assert peak == 2
+    stats = controller.stats()
+    assert stats["admitted"] == 6 and stats["rejected"] == 0
+    assert stats["active"] == 0 and stats["waiting"] == 0
+
+
+async def test_rejects_when_queue_is_full():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+    ticket = await controller.acquire()
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire()
+    assert rejected.value.retry_after == 5
+
+    ticket.release()
+    (await waiter).release()
+    assert controller.stats()["rejected"] == 1
+    assert controller.stats()["admitted"] == 2
+
+
+async def test_rejects_after_queue_timeout():
+    controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=0.05)
+    ticket = await controller.acquire()
+
+    with pytest.raises(AdmissionRejected):
+        await controller.acquire()
+    assert controller.waiting == 0
+
+    ticket.release()
+    async with await controller.acquire():
+        assert controller.active == 1
+
+
+async def test_release_is_idempotent():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=1)
+    ticket = await controller.acquire()
+    ticket.release()
+    ticket.release()
+
+    assert controller.active == 0
+    (await controller.acquire()).release()
+    # A double release must not have freed a second slot
+    held = await controller.acquire()
+    with pytest.raises(AdmissionRejected):
+        await controller.acquire()
+    held.release()
@@ -0,0 +1,87 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.artifacts import (
+    ArtifactStore,
+    LocalArtifactBackend,
+    artifact_id as make_artifact_id,
+    parse_range,
+)
+from backend.routes import artifacts
+
+DATA = bytes(range(100))
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-9", (0, 9)),
+        ("bytes=90-", (90, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=-500", (0, 99)),
+        ("bytes=50-500", (50, 99)),
+        (" bytes=5-5 ", (5, 5)),
+        ("bytes=100-", None),
+        ("bytes=10-5", None),
+        ("bytes=-0", None),
+        ("bytes=-", None),
+        ("bytes=0-1,5-6", None),
+        ("items=0-1", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, len(DATA)) == expected
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    store = ArtifactStore(LocalArtifactBackend(str(tmp_path)))
+    monkeypatch.setattr(artifacts, "artifact_store", store)
+    app = FastAPI()
+    app.include_router(artifacts.router)
+    return TestClient(app), store
+
+
+@pytest.fixture
+def artifact_id(client):
+    key = make_artifact_id(DATA, "bin")
+    client[1].backend.put(key, DATA)
+    return key
+
+
+def test_full_read(client, artifact_id):
+    response = client[0].get(f"/artifacts/{artifact_id}")
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"] == f'"{artifact_id}"'
+
+
+def test_range_read(client, artifact_id):
+    response = client[0].get(
+        f"/artifacts/{artifact_id}", headers={"Range": "bytes=10-19"}
+    )
+    assert response.status_code == 206
+    assert response.content == DATA[10:20]
+    assert response.headers["content-range"] == "bytes 10-19/100"
+
+
+def test_unsatisfiable_range(client, artifact_id):
+    response = client[0].get(
+        f"/artifacts/{artifact_id}", headers={"Range": "bytes=200-"}
+    )
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */100"
+
+
+def test_not_modified(client, artifact_id):
+    response = client[0].get(
+        f"/artifacts/{artifact_id}", headers={"If-None-Match": f'"{artifact_id}"'}
+    )
+    assert response.status_code == 304
+
+
+def test_missing_and_invalid_ids(client):
+    assert client[0].get(f"/artifacts/{'0' * 64}.bin").status_code == 404
+    assert client[0].get("/artifacts/not-an-id").status_code == 400
@@ -0,0 +1,109 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from backend.cache import ContentCache, DiskCacheBackend, RedisCacheBackend
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def cache(tmp_path):
+    backend = DiskCacheBackend(str(tmp_path / "test.sqlite3"), ttl=60, max_entries=10)
+    return ContentCache("test", backend)
+
+
+def slow_compute(calls, value="value", delay=0.05):
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value
+
+    return compute
+
+
+async def test_concurrent_misses_share_one_computation(cache):
+    calls = []
+    values = await asyncio.gather(
+        *(cache.get_or_compute("key", slow_compute(calls)) for _ in range(10))
+    )
+
+    assert values == ["value"] * 10
+    assert len(calls) == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 9
+
+
+async def test_stored_value_is_reused(cache):
+    calls = []
+    await cache.get_or_compute("key", slow_compute(calls))
+    assert await cache.get_or_compute("key", slow_compute(calls, "other")) == "value"
+    assert len(calls) == 1
+
+
+async def test_cancelled_owner_does_not_cancel_waiters(cache):
+    calls = []
+    owner = asyncio.create_task(cache.get_or_compute("key", slow_compute(calls)))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_compute("key", slow_compute(calls)))
+    await asyncio.sleep(0.01)
+
+    owner.cancel()
+    assert await waiter == "value"
+    assert owner.cancelled()
+    assert len(calls) == 1
+    assert await cache.get("key") == "value"
+
+
+async def test_errors_reach_every_caller_and_are_not_cached(cache):
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute("key", fail) for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert await cache.get_or_compute("key", slow_compute([])) == "value"
+
+
+async def test_disk_backend_evicts_least_recently_used_in_batches(tmp_path):
+    backend = DiskCacheBackend(str(tmp_path / "lru.sqlite3"), ttl=60, max_entries=20)
+    for i in range(20):
+        await backend.set(f"key-{i}", i)
+    # Reading key-0 makes key-1 and key-2 the least recently used
+    assert await backend.get("key-0") == 0
+    await backend.set_many({"key-20": 20, "key-21": 21})
+
+    (count,) = backend._connect().execute("SELECT COUNT(*) FROM cache").fetchone()
+    assert count == 20
+    assert await backend.get_many(["key-0", "key-1", "key-2", "key-3"]) == [
+        0,
+        None,
+        None,
+        3,
+    ]
+    indexes = {
+        row[1] for row in backend._connect().execute("PRAGMA index_list(cache)")
+    }
+    assert "cache_accessed_at" in indexes
+
+
+async def test_redis_backend_reads_renew_ttl_and_lru_tracks_live_keys():
+    client = fakeredis.FakeAsyncRedis()
+    backend = RedisCacheBackend(client, "test", ttl=1, max_entries=2)
+    await backend.set("hot", "value")
+    await backend.set("cold", "value")
+
+    await asyncio.sleep(0.6)
+    assert await backend.get("hot") == "value"
+    await asyncio.sleep(0.6)
+    assert await backend.get_many(["hot", "cold"]) == ["value", None]
+
+    # The expired entry is pruned, so the live one survives the next write
+    await backend.set("new", "value")
+    assert await client.zrange("test:lru", 0, -1) == [b"hot", b"new"]
+    assert await backend.get("hot") == "value"
@@ -0,0 +1,22 @@
+import fakeredis
+import pytest
+
+from backend.routes import chat
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(chat, "redis_client", client)
+    return client
+
+
+async def test_answers_depend_on_history_once_there_is_one(redis):
+    assert not await chat.answer_depends_on_history("research", "What is RAG?")
+
+    await redis.rpush("research", '{"role": "user", "content": "Hi"}')
+
+    assert await chat.answer_depends_on_history("research", "What is RAG?")
+    assert not await chat.answer_depends_on_history("research", "Summarize sources")
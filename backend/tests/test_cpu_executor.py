@@ -0,0 +1,79 @@
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from backend.cpu_executor import CPUExecutor, CPUTaskTimeout
+
+from .cpu_tasks import backend_modules_after_import, crash, sleep_and_return
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def executor():
+    executor = CPUExecutor(max_workers=2, task_timeout=30)
+    # Start the workers outside the timed tasks
+    await asyncio.gather(*(executor.run(sleep_and_return, 0) for _ in range(2)))
+    yield executor
+    executor.shutdown()
+
+
+async def test_timeout_does_not_count_time_waiting_for_a_worker(executor):
+    # Each task takes 0.4s of a 1s budget, but the last ones wait 0.8s for a worker
+    results = await asyncio.gather(
+        *(executor.run(sleep_and_return, 0.4, i, timeout=1) for i in range(6))
+    )
+    assert results == list(range(6))
+    assert executor.stats()["timeouts"] == 0
+
+
+async def test_timeout_recycles_pool_and_resubmits_other_tasks(executor):
+    async def innocent(i):
+        return await executor.run(sleep_and_return, 0.3, i, timeout=10)
+
+    results = await asyncio.gather(
+        executor.run(sleep_and_return, 5, timeout=0.5),
+        *(innocent(i) for i in range(6)),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0], CPUTaskTimeout)
+    # No innocent task sees CancelledError or BrokenProcessPool
+    assert results[1:] == list(range(6))
+    stats = executor.stats()
+    assert stats["timeouts"] == 1
+    assert stats["recycles"] == 1
+
+
+async def test_crashing_task_fails_after_max_attempts(executor):
+    with pytest.raises(BrokenProcessPool):
+        await executor.run(crash)
+
+    assert executor.stats()["resubmits"] == executor.max_attempts - 1
+    # The pool still works afterwards
+    assert await executor.run(sleep_and_return, 0, "ok") == "ok"
+
+
+async def test_cancelled_caller_keeps_worker_until_task_ends(executor):
+    task = asyncio.create_task(executor.run(sleep_and_return, 0.5))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # If the abandoned task's worker were handed out again, one of these
+    # would queue inside the pool behind it and run past its timeout
+    results = await asyncio.gather(
+        *(executor.run(sleep_and_return, 0.25, i, timeout=0.4) for i in range(2))
+    )
+    assert results == [0, 1]
+
+
+async def test_workers_do_not_load_the_app(executor):
+    modules = await executor.run(
+        backend_modules_after_import, "backend.processors.pdf_worker"
+    )
+    assert "backend.processors.pdf_worker" in modules
+    assert "backend.config" not in modules
+    assert "backend.server" not in modules
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+
+from backend.processors.crawler_pool import CrawlerPool, PooledCrawler, is_browser_error
+
+pytestmark = pytest.mark.anyio
+
+CLOSED_ERROR = (
+    "[ERROR] crawl(): Failed to crawl https://example.com: Page.goto: "
+    "Target page, context or browser has been closed"
+)
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+
+class FakeCrawler:
+    """Returns failed results the way crawl4ai's arun does."""
+
+    def __init__(self, error_message=None):
+        self.error_message = error_message
+        self.crawler_strategy = SimpleNamespace(browser=FakeBrowser())
+        self.closed = False
+
+    async def arun(self, url, **kwargs):
+        return SimpleNamespace(
+            url=url,
+            success=self.error_message is None,
+            error_message=self.error_message or "",
+        )
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+
+def make_pool(error_messages):
+    pool = CrawlerPool(size=1, max_pages=100, timeout=5)
+    crawlers = []
+
+    async def create():
+        crawler = FakeCrawler(error_messages[len(crawlers)])
+        crawlers.append(crawler)
+        return PooledCrawler(crawler)
+
+    pool._create = create
+    return pool, crawlers
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        (CLOSED_ERROR, True),
+        ("Browser closed unexpectedly", True),
+        ("Failed to start browser: executable missing", True),
+        ("Page.goto: net::ERR_NAME_NOT_RESOLVED", False),
+        ("", False),
+        (None, False),
+    ],
+)
+def test_is_browser_error(message, expected):
+    assert is_browser_error(message) is expected
+
+
+async def test_browser_error_result_recycles_crawler():
+    pool, crawlers = make_pool([CLOSED_ERROR, None])
+
+    result = await pool.crawl("https://example.com")
+    assert not result.success
+
+    result = await pool.crawl("https://example.com")
+    assert result.success
+    assert pool.recycles == 1
+    assert crawlers[0].closed
+    assert len(crawlers) == 2
+
+
+async def test_page_error_keeps_crawler():
+    pool, crawlers = make_pool(["Page.goto: net::ERR_NAME_NOT_RESOLVED"])
+
+    await pool.crawl("https://nowhere.invalid")
+    await pool.crawl("https://nowhere.invalid")
+
+    assert pool.recycles == 0
+    assert len(crawlers) == 1
@@ -0,0 +1,51 @@
+import threading
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from backend.cache import ContentCache, DiskCacheBackend
+from backend.processors import utils
+from backend.processors.image_analysis import CANDIDATE
+
+pytestmark = pytest.mark.anyio
+
+
+class InlineExecutor:
+    async def run(self, func, *args, timeout=None):
+        return func(*args)
+
+
+def png_bytes() -> bytes:
+    buffered = BytesIO()
+    Image.new("RGBA", (64, 48), (10, 200, 30, 255)).save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+async def test_images_are_encoded_off_the_event_loop(tmp_path, monkeypatch):
+    encode_threads = []
+    encode = utils.get_b64_image_from_content
+
+    def recording_encode(image_content):
+        encode_threads.append(threading.current_thread())
+        return encode(image_content)
+
+    async def chat_completion(url, payload):
+        return "GRAPH\nA bar chart" if url == utils.NIM_VISION_INVOKE_URL else "a | b"
+
+    monkeypatch.setattr(utils, "get_b64_image_from_content", recording_encode)
+    monkeypatch.setattr(utils, "cpu_executor", InlineExecutor())
+    monkeypatch.setattr(utils, "preclassify_image", lambda content: CANDIDATE)
+    monkeypatch.setattr(utils.nim_client, "chat_completion", chat_completion)
+    backend = DiskCacheBackend(str(tmp_path / "vision.db"), ttl=60, max_entries=100)
+    monkeypatch.setattr(utils, "vision_cache", ContentCache("vision", backend))
+
+    image = png_bytes()
+    assert await utils.analyze_image(image) == {
+        "is_graph": True,
+        "description": "A bar chart",
+    }
+    assert await utils.process_graph_deplot(image) == "a | b"
+
+    assert len(encode_threads) == 2
+    assert threading.main_thread() not in encode_threads
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend import index_registry as registry_module
+from backend.index_registry import IndexRegistry
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowHandle:
+    """Stands in for IndexHandle, whose build makes blocking Qdrant calls."""
+
+    builds = []
+    release = threading.Event()
+
+    def __init__(self, collection_name):
+        SlowHandle.builds.append(collection_name)
+        SlowHandle.release.wait(5)
+        self.collection_name = collection_name
+        self.last_used = time.monotonic()
+
+
+@pytest.fixture(autouse=True)
+def slow_handles(monkeypatch):
+    SlowHandle.builds = []
+    SlowHandle.release = threading.Event()
+    monkeypatch.setattr(registry_module, "IndexHandle", SlowHandle)
+
+
+async def test_concurrent_misses_share_one_build():
+    registry = IndexRegistry(max_size=4, idle_ttl=60)
+    gets = [asyncio.create_task(registry.get("research")) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    SlowHandle.release.set()
+
+    handles = await asyncio.gather(*gets)
+
+    assert SlowHandle.builds == ["research"]
+    assert all(handle is handles[0] for handle in handles)
+    assert await registry.get("research") is handles[0]
+    assert registry.stats()["misses"] == 1 and registry.stats()["hits"] == 1
+
+
+async def test_cancelled_caller_does_not_cancel_the_build():
+    registry = IndexRegistry(max_size=4, idle_ttl=60)
+    first = asyncio.create_task(registry.get("research"))
+    second = asyncio.create_task(registry.get("research"))
+    await asyncio.sleep(0.05)
+    first.cancel()
+    SlowHandle.release.set()
+
+    handle = await second
+    assert handle.collection_name == "research"
+    assert SlowHandle.builds == ["research"]
+
+
+async def test_handle_built_across_an_invalidation_is_not_cached():
+    registry = IndexRegistry(max_size=4, idle_ttl=60)
+    stale = asyncio.create_task(registry.get("research"))
+    await asyncio.sleep(0.05)
+    registry.invalidate("research")
+    SlowHandle.release.set()
+    stale_handle = await stale
+
+    fresh_handle = await registry.get("research")
+    assert fresh_handle is not stale_handle
+    assert SlowHandle.builds == ["research", "research"]
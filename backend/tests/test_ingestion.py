@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+from llama_index.core import Document
+from llama_index.vector_stores.qdrant import QdrantVectorStore
+from qdrant_client import AsyncQdrantClient
+
+from backend import index_registry as registry_module
+from backend import ingestion
+from backend.ingestion import build_nodes, chunk_hash, sync_source_documents
+
+pytestmark = pytest.mark.anyio
+
+
+def uploaded_document(job_dir: str, research_id: str) -> Document:
+    return Document(
+        text="Quarterly revenue grew by twelve percent.",
+        metadata={
+            "file_path": f"{job_dir}/0_report.txt",
+            "file_name": "0_report.txt",
+            "filename": "report.txt",
+            "research_id": research_id,
+            "reference_id": "ref",
+            "created_at": job_dir,
+        },
+    )
+
+
+def page_document(pagenum: int, text: str) -> Document:
+    return Document(
+        text=text,
+        metadata={"page_num": pagenum, "reference_id": "ref", "research_id": "r"},
+    )
+
+
+async def test_chunk_hash_ignores_per_upload_metadata():
+    first = await build_nodes([uploaded_document("/tmp/job-a", "research-1")])
+    second = await build_nodes([uploaded_document("/tmp/job-b", "research-2")])
+
+    assert [chunk_hash(node) for node in first] == [chunk_hash(node) for node in second]
+
+
+async def test_chunk_hash_changes_with_text():
+    document = uploaded_document("/tmp/job-a", "research-1")
+    changed = uploaded_document("/tmp/job-a", "research-1")
+    changed.set_content("Quarterly revenue fell by twelve percent.")
+
+    (node,) = await build_nodes([document])
+    (changed_node,) = await build_nodes([changed])
+    assert chunk_hash(node) != chunk_hash(changed_node)
+    assert "report.txt" in node.get_content(metadata_mode="embed")
+
+
+@pytest.fixture
+async def stored_source(monkeypatch):
+    """A source of three pages stored in an in-memory Qdrant collection."""
+    client = AsyncQdrantClient(":memory:")
+    vector_store = QdrantVectorStore(collection_name="r", aclient=client)
+    upserted = []
+    state = {"exists": [True]}
+
+    async def embed_and_upsert(nodes, store):
+        upserted.extend(nodes)
+        for node in nodes:
+            node.embedding = [1.0, 0.0]
+        if nodes:
+            await store.async_add(nodes)
+
+    async def get_handle(research_id):
+        return SimpleNamespace(vector_store=vector_store)
+
+    async def source_exists(research_id, reference_id):
+        exists = state["exists"]
+        return exists.pop(0) if len(exists) > 1 else exists[0]
+
+    async def noop(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(registry_module, "async_qdrant_client", client)
+    monkeypatch.setattr(ingestion, "async_qdrant_client", client)
+    monkeypatch.setattr(ingestion.index_registry, "get", get_handle)
+    monkeypatch.setattr(ingestion.index_registry, "invalidate", lambda name: None)
+    monkeypatch.setattr(ingestion.semantic_cache, "invalidate", noop)
+    monkeypatch.setattr(ingestion, "embed_and_upsert", embed_and_upsert)
+    monkeypatch.setattr(ingestion, "report_progress", noop)
+    monkeypatch.setattr(ingestion, "source_exists", source_exists)
+    monkeypatch.setattr(registry_module, "SCROLL_PAGE_SIZE", 2)
+
+    await embed_and_upsert(
+        await build_nodes(
+            [page_document(pagenum, f"Page {pagenum} text") for pagenum in range(3)]
+        ),
+        vector_store,
+    )
+    upserted.clear()
+    yield SimpleNamespace(upserted=upserted, state=state)
+
+
+async def stored_texts():
+    nodes = await registry_module.scroll_source_nodes("r", "ref")
+    return sorted(node.get_content() for node in nodes)
+
+
+async def test_update_keeps_chunks_of_pages_that_failed_to_parse(stored_source):
+    result = await sync_source_documents(
+        "r",
+        "ref",
+        [page_document(0, "Page 0 text"), page_document(2, "Page 2 revised")],
+        failed_pages={1},
+    )
+
+    assert result == {
+        "chunks_reused": 1,
+        "chunks_recomputed": 1,
+        "chunks_removed": 1,
+    }
+    assert await stored_texts() == ["Page 0 text", "Page 1 text", "Page 2 revised"]
+
+
+async def test_update_racing_a_delete_leaves_no_vectors(stored_source):
+    stored_source.state["exists"] = [True, False]
+
+    with pytest.raises(ValueError, match="was deleted"):
+        await sync_source_documents("r", "ref", [page_document(0, "Page 0 revised")])
+
+    assert len(stored_source.upserted) == 1
+    assert await stored_texts() == []
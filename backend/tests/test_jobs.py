@@ -0,0 +1,200 @@
+import asyncio
+
+import fakeredis
+import pytest
+from bson import ObjectId
+
+from backend import ingestion, jobs
+from backend.models import Job, JobStatus
+
+pytestmark = pytest.mark.anyio
+
+
+class BlockingFakeRedis(fakeredis.FakeAsyncRedis):
+    """fakeredis returns from blocking pops right away, which would spin workers."""
+
+    async def blmove(self, first_list, second_list, timeout, src="LEFT", dest="RIGHT"):
+        deadline = asyncio.get_running_loop().time() + timeout
+        while asyncio.get_running_loop().time() < deadline:
+            value = await self.lmove(first_list, second_list, src, dest)
+            if value is not None:
+                return value
+            await asyncio.sleep(0.01)
+        return None
+
+
+@pytest.fixture
+def redis(monkeypatch, tmp_path):
+    client = BlockingFakeRedis()
+    monkeypatch.setattr(jobs, "redis_client", client)
+    monkeypatch.setattr(jobs, "JOBS_DIR", str(tmp_path))
+    return client
+
+
+@pytest.fixture
+def handler_calls(monkeypatch):
+    calls = []
+
+    async def handler(job):
+        calls.append(job["id"])
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    monkeypatch.setitem(jobs._handlers, "test", handler)
+    return calls
+
+
+async def wait_for_status(job_id, status, timeout=5):
+    async def poll():
+        while (await jobs.get_job(job_id))["status"] != status:
+            await asyncio.sleep(0.02)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def test_worker_runs_job_and_clears_processing_list(redis, handler_calls):
+    pool = jobs.JobWorkerPool(concurrency=1, poll_interval=0.02, worker_id="w1")
+    await jobs.enqueue_job("job-1", "test", "research", {})
+    await pool.start()
+    try:
+        await wait_for_status("job-1", JobStatus.COMPLETED.value)
+    finally:
+        await pool.stop()
+
+    assert handler_calls == ["job-1"]
+    assert (await jobs.get_job("job-1"))["result"] == {"ok": True}
+    assert await redis.llen(pool.processing_key) == 0
+
+
+async def test_recover_requeues_jobs_of_a_crashed_pool(redis, handler_calls):
+    pool = jobs.JobWorkerPool(concurrency=1, poll_interval=0.02, worker_id="w1")
+    await jobs.enqueue_job("job-1", "test", "research", {})
+    await jobs.enqueue_job("job-2", "test", "research", {})
+    # A worker took both jobs and the process died while running the first
+    for _ in range(2):
+        await redis.lmove(jobs.JOB_QUEUE_KEY, pool.processing_key, "LEFT", "RIGHT")
+    await jobs.update_job("job-1", status=JobStatus.RUNNING.value)
+
+    assert await pool.recover() == 2
+    assert await redis.llen(pool.processing_key) == 0
+    assert (await jobs.get_job("job-1"))["status"] == JobStatus.QUEUED.value
+
+    await pool.start()
+    try:
+        await wait_for_status("job-1", JobStatus.COMPLETED.value)
+        await wait_for_status("job-2", JobStatus.COMPLETED.value)
+    finally:
+        await pool.stop()
+    assert sorted(handler_calls) == ["job-1", "job-2"]
+
+
+async def test_recover_leaves_other_pools_alone(redis):
+    await jobs.enqueue_job("job-1", "test", "research", {})
+    other = jobs.JobWorkerPool(worker_id="w2")
+    await redis.lmove(jobs.JOB_QUEUE_KEY, other.processing_key, "LEFT", "RIGHT")
+
+    assert await jobs.JobWorkerPool(worker_id="w1").recover() == 0
+    assert await redis.llen(other.processing_key) == 1
+
+
+async def test_cancel_queued_job(redis, handler_calls):
+    await jobs.enqueue_job("job-1", "test", "research", {})
+
+    job = await jobs.cancel_job("job-1")
+
+    assert job["status"] == JobStatus.CANCELLED.value
+    assert await redis.llen(jobs.JOB_QUEUE_KEY) == 0
+
+
+async def test_cancel_job_already_taken_by_a_worker(redis, handler_calls):
+    pool = jobs.JobWorkerPool(concurrency=1, poll_interval=0.02, worker_id="w1")
+    await jobs.enqueue_job("job-1", "test", "research", {})
+    await redis.lmove(jobs.JOB_QUEUE_KEY, pool.processing_key, "LEFT", "RIGHT")
+
+    job = await jobs.cancel_job("job-1")
+    # Not in the queue any more, so the worker has to stop it
+    assert job["status"] == JobStatus.QUEUED.value
+
+    await pool._run("job-1")
+    assert (await jobs.get_job("job-1"))["status"] == JobStatus.CANCELLED.value
+    assert handler_calls == []
+
+
+async def test_cancel_running_job(redis, monkeypatch):
+    started = asyncio.Event()
+
+    async def handler(job):
+        started.set()
+        await asyncio.sleep(60)
+
+    monkeypatch.setitem(jobs._handlers, "slow", handler)
+    pool = jobs.JobWorkerPool(concurrency=1, poll_interval=0.02, worker_id="w1")
+    await jobs.enqueue_job("job-1", "slow", "research", {})
+    await pool.start()
+    try:
+        await asyncio.wait_for(started.wait(), 5)
+        await jobs.cancel_job("job-1")
+        await wait_for_status("job-1", JobStatus.CANCELLED.value)
+    finally:
+        await pool.stop()
+
+
+async def test_progress_counters_are_reported(redis, monkeypatch):
+    async def handler(job):
+        await jobs.report_progress(pages_processed=3, sources_summarized=2)
+        return {}
+
+    monkeypatch.setitem(jobs._handlers, "test", handler)
+    pool = jobs.JobWorkerPool(concurrency=1, poll_interval=0.02, worker_id="w1")
+    await jobs.enqueue_job("job-1", "test", "research", {})
+    await pool.start()
+    try:
+        await wait_for_status("job-1", JobStatus.COMPLETED.value)
+    finally:
+        await pool.stop()
+
+    job = Job(**await jobs.get_job("job-1"))
+    assert job.pages_processed == 3
+    assert job.sources_summarized == 2
+
+
+async def test_cancel_while_summarizing_completes_with_partial_summaries(
+    redis, monkeypatch
+):
+    stored = []
+    second_started = asyncio.Event()
+
+    async def build_source_summary(research_id, source):
+        if source["reference_id"] == "slow":
+            second_started.set()
+            await asyncio.sleep(60)
+        return {"summary": f"About {source['reference_id']}", "topics": []}
+
+    async def update_one(query, update):
+        stored.append(query["sources.reference_id"])
+
+    async def handler(job):
+        await ingestion.summarize_sources(
+            job["research_id"], [{"reference_id": "fast"}, {"reference_id": "slow"}]
+        )
+        return {"ok": True}
+
+    monkeypatch.setattr(ingestion, "SUMMARIZE_ON_INGEST", True)
+    monkeypatch.setattr(
+        ingestion.summary_engine, "build_source_summary", build_source_summary
+    )
+    monkeypatch.setattr(ingestion.research_collection, "update_one", update_one)
+    monkeypatch.setitem(jobs._handlers, "summarize", handler)
+    pool = jobs.JobWorkerPool(concurrency=1, poll_interval=0.02, worker_id="w1")
+    await jobs.enqueue_job("job-1", "summarize", str(ObjectId()), {})
+    await pool.start()
+    try:
+        await asyncio.wait_for(second_started.wait(), 5)
+        await jobs.cancel_job("job-1")
+        await wait_for_status("job-1", JobStatus.COMPLETED.value)
+    finally:
+        await pool.stop()
+
+    job = Job(**await jobs.get_job("job-1"))
+    assert stored == ["fast"]
+    assert job.sources_summarized == 1
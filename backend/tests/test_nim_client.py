@@ -0,0 +1,89 @@
+import asyncio
+import gc
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from backend.nim_client import NIMClient
+
+pytestmark = pytest.mark.anyio
+
+REQUESTS = 50
+RESPONSE_DELAY = 0.2
+ENDPOINT_CONCURRENCY = 8
+
+
+@pytest.fixture
+async def stub_server():
+    """Slow NIM stand-in that rejects every fifth request once with a 503."""
+    state = {"active": 0, "peak": 0, "requests": 0}
+
+    async def handler(request):
+        payload = await request.json()
+        state["requests"] += 1
+        failed = state.setdefault("failed", set())
+        if payload["id"] % 5 == 0 and payload["id"] not in failed:
+            failed.add(payload["id"])
+            return web.Response(status=503, headers={"Retry-After": "0.05"})
+
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        try:
+            await asyncio.sleep(RESPONSE_DELAY)
+        finally:
+            state["active"] -= 1
+        content = f"description of image {payload['id']}"
+        return web.json_response({"choices": [{"message": {"content": content}}]})
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+    server = TestServer(app)
+    await server.start_server()
+    yield server, state
+    await server.close()
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Largest delay of a periodic wakeup past its deadline."""
+    max_lag = 0.0
+    while not stop.is_set():
+        start_time = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - start_time - interval)
+    return max_lag
+
+
+async def test_event_loop_stays_responsive_with_descriptions_in_flight(stub_server):
+    server, state = stub_server
+    url = str(server.make_url("/v1/chat/completions"))
+    client = NIMClient(
+        api_key="test",
+        timeout=10,
+        endpoint_concurrency=ENDPOINT_CONCURRENCY,
+        backoff_base=0.01,
+    )
+
+    # A full collection of the large heap earlier tests leave behind can
+    # pause the loop for longer than the bound, and is not what is measured
+    gc.collect()
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    try:
+        start_time = time.perf_counter()
+        descriptions = await asyncio.gather(
+            *(client.chat_completion(url, {"id": i}) for i in range(REQUESTS))
+        )
+        elapsed = time.perf_counter() - start_time
+    finally:
+        stop.set()
+        max_lag = await lag_task
+        await client.close()
+
+    assert descriptions == [f"description of image {i}" for i in range(REQUESTS)]
+    assert state["requests"] == REQUESTS + REQUESTS // 5
+    assert state["peak"] <= ENDPOINT_CONCURRENCY
+    # Requests overlap up to the cap instead of running one after another
+    assert elapsed < REQUESTS * RESPONSE_DELAY / 2
+    assert max_lag < 0.05
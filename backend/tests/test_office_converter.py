@@ -0,0 +1,86 @@
+import os
+import socket
+import sys
+import textwrap
+
+import pytest
+
+from backend.processors.office_converter import OfficeConversionError, OfficeConverter
+
+pytestmark = pytest.mark.anyio
+
+# Stands in for unoserver: converts by writing its pid, and hangs on request
+FAKE_UNOSERVER = textwrap.dedent(
+    """
+    import argparse, os, time
+    from xmlrpc.server import SimpleXMLRPCServer
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int)
+    args, _ = parser.parse_known_args()
+
+    def convert(inpath, indata, outpath, convert_to, *rest):
+        if "hang" in inpath:
+            time.sleep(60)
+        with open(outpath, "w") as f:
+            f.write(str(os.getpid()))
+
+    server = SimpleXMLRPCServer(("127.0.0.1", args.port), allow_none=True)
+    server.register_function(convert)
+    server.serve_forever()
+    """
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+async def converter(tmp_path):
+    script = tmp_path / "unoserver"
+    script.write_text(f"#!{sys.executable}\n{FAKE_UNOSERVER}")
+    script.chmod(0o755)
+    converter = OfficeConverter(
+        slots=1,
+        timeout=2,
+        binary=sys.executable,
+        profile_root=str(tmp_path / "profiles"),
+        unoserver=str(script),
+        base_port=free_port(),
+    )
+    converter.start()
+    await converter._warm_task
+    yield converter
+    await converter.stop()
+
+
+async def convert(converter, tmp_path, name):
+    input_path = tmp_path / f"{name}.docx"
+    input_path.write_text("document")
+    output_path = await converter.convert(str(input_path), str(tmp_path))
+    with open(output_path) as f:
+        return f.read()
+
+
+async def test_conversions_reuse_the_warm_instance(converter, tmp_path):
+    first = await convert(converter, tmp_path, "first")
+    second = await convert(converter, tmp_path, "second")
+
+    assert first == second == str(converter._servers[0].pid)
+    assert converter.stats()["warm_instances"] == 1
+    assert converter.stats()["conversions"] == 2
+
+
+async def test_hung_instance_is_replaced(converter, tmp_path):
+    hung_pid = converter._servers[0].pid
+
+    with pytest.raises(OfficeConversionError, match="timed out"):
+        await convert(converter, tmp_path, "hang")
+    assert converter.stats()["recycles"] == 1
+    with pytest.raises(ProcessLookupError):
+        os.kill(hung_pid, 0)
+
+    assert await convert(converter, tmp_path, "next") != str(hung_pid)
@@ -0,0 +1,65 @@
+import fitz
+import pytest
+
+from backend.processors import pdf_worker, process_files
+
+pytestmark = pytest.mark.anyio
+
+
+class InlineExecutor:
+    """Runs CPU tasks in-process instead of in the worker pool."""
+
+    async def run(self, func, *args, timeout=None):
+        return func(*args)
+
+
+def text_pdf(path, pages: int) -> str:
+    document = fitz.open()
+    for pagenum in range(pages):
+        document.new_page().insert_text((72, 300), f"Page {pagenum + 1} body text")
+    document.save(str(path))
+    return str(path)
+
+
+async def test_failed_pages_are_reported(tmp_path, monkeypatch):
+    progress = []
+
+    async def record_progress(**counts):
+        progress.append(counts)
+
+    async def page_documents(page_data, *args):
+        if page_data["pagenum"] == 1:
+            raise RuntimeError("vision call failed")
+        return [page_data["pagenum"]]
+
+    monkeypatch.setattr(process_files, "cpu_executor", InlineExecutor())
+    monkeypatch.setattr(process_files, "report_progress", record_progress)
+    monkeypatch.setattr(process_files, "get_page_documents", page_documents)
+
+    with process_files.track_failed_pages() as failed_pages:
+        documents = await process_files.get_pdf_path_documents(
+            text_pdf(tmp_path / "doc.pdf", 3), "doc.pdf", "research", "reference"
+        )
+
+    assert documents == [0, 2]
+    assert failed_pages == {1}
+    assert progress.count({"pages_processed": 1}) == 2
+    assert progress.count({"pages_failed": 1}) == 1
+
+
+def test_margin_crop_can_be_turned_off(tmp_path):
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_text((72, 30), "Heading near the top")
+    page.insert_text((72, 300), "Body text")
+    document.save(str(tmp_path / "doc.pdf"))
+    pdf_path = str(tmp_path / "doc.pdf")
+
+    cropped = pdf_worker.extract_page(pdf_path, 0)["text_blocks"]
+    uncropped = pdf_worker.extract_page(pdf_path, 0, crop_margins=False)["text_blocks"]
+
+    assert [block[4].strip() for block in cropped] == ["Body text"]
+    assert [block[4].strip() for block in uncropped] == [
+        "Heading near the top",
+        "Body text",
+    ]
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pytest
+from llama_index.core import Settings
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.embeddings import BaseEmbedding
+from llama_index.core.schema import NodeWithScore, TextNode
+from llama_index.core.vector_stores.types import (
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from backend import retrieval
+from backend.index_registry import OffloadedQdrantVectorStore
+from backend.retrieval_eval import evaluate_retrieval
+
+pytestmark = pytest.mark.anyio
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "retrieval_eval.json")
+EMBED_DIM = 64
+
+
+class FakeEmbedding(BaseEmbedding):
+    """Hashed bag-of-words vectors."""
+
+    def _vector(self, text):
+        vector = np.zeros(EMBED_DIM)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % EMBED_DIM] += 1
+        return vector.tolist()
+
+    def _get_text_embedding(self, text):
+        return self._vector(text)
+
+    def _get_query_embedding(self, query):
+        return self._vector(query)
+
+    async def _aget_query_embedding(self, query):
+        return self._vector(query)
+
+
+class ListRetriever(BaseRetriever):
+    def __init__(self, node_ids):
+        self.node_ids = node_ids
+        super().__init__()
+
+    def _retrieve(self, query_bundle):
+        return [
+            NodeWithScore(node=TextNode(id_=node_id, text=node_id), score=1.0)
+            for node_id in self.node_ids
+        ]
+
+
+class ReversingReranker:
+    def __init__(self):
+        self.threads = []
+
+    def postprocess_nodes(self, nodes, query_bundle=None):
+        self.threads.append(threading.current_thread())
+        return list(reversed(nodes))[:2]
+
+
+def result(*node_ids):
+    nodes = [TextNode(id_=node_id, text=node_id) for node_id in node_ids]
+    return VectorStoreQueryResult(
+        nodes=nodes, similarities=[1.0] * len(nodes), ids=list(node_ids)
+    )
+
+
+def test_rrf_sums_ranks_of_both_results():
+    fused = retrieval.reciprocal_rank_fusion(
+        result("a", "b", "c"), result("c", "d"), alpha=0.5, top_k=4
+    )
+    # c is third in one ranking and first in the other; b and d tie
+    assert fused.ids == ["c", "a", "b", "d"]
+    assert fused.similarities[0] == pytest.approx(
+        0.5 / (retrieval.RRF_K + 3) + 0.5 / (retrieval.RRF_K + 1)
+    )
+    assert [node.node_id for node in fused.nodes] == fused.ids
+
+
+def test_rrf_alpha_weighs_dense_against_sparse():
+    dense, sparse = result("a", "b"), result("b", "a")
+    assert retrieval.reciprocal_rank_fusion(dense, sparse, alpha=0.9).ids == [
+        "a",
+        "b",
+    ]
+    assert retrieval.reciprocal_rank_fusion(dense, sparse, alpha=0.1).ids == [
+        "b",
+        "a",
+    ]
+
+
+def test_rrf_keeps_top_k_and_handles_empty_results():
+    fused = retrieval.reciprocal_rank_fusion(result("a", "b", "c"), result(), top_k=2)
+    assert fused.ids == ["a", "b"]
+    assert retrieval.reciprocal_rank_fusion(result(), result()).ids == []
+
+
+def test_zero_alpha_is_not_replaced_by_the_default(monkeypatch):
+    monkeypatch.setattr(retrieval, "HYBRID_ALPHA", 0.0)
+    kwargs = retrieval.retrieval_kwargs(hybrid=True)
+    assert 0 < kwargs["alpha"] <= retrieval.MIN_HYBRID_ALPHA
+
+
+def test_rerank_kwargs_widen_the_candidate_set(monkeypatch):
+    monkeypatch.setattr(retrieval, "get_reranker", lambda **kwargs: object())
+    kwargs = retrieval.retrieval_kwargs(hybrid=False, top_k=2)
+    assert kwargs == {"similarity_top_k": retrieval.RERANK_CANDIDATES}
+
+
+async def test_reranking_runs_off_the_event_loop():
+    reranker = ReversingReranker()
+    retriever = retrieval.RerankingRetriever(ListRetriever(["a", "b", "c"]), reranker)
+
+    nodes = await retriever.aretrieve("query")
+
+    assert [node.node_id for node in nodes] == ["c", "b"]
+    assert reranker.threads and threading.main_thread() not in reranker.threads
+    assert [node.node_id for node in retriever.retrieve("query")] == ["c", "b"]
+
+
+async def test_sparse_vectors_are_encoded_off_the_event_loop():
+    threads = []
+
+    def encode(texts):
+        threads.append(threading.current_thread())
+        return [[0, 1]] * len(texts), [[1.0, 0.5]] * len(texts)
+
+    vector_store = OffloadedQdrantVectorStore(
+        client=QdrantClient(":memory:"),
+        aclient=AsyncQdrantClient(":memory:"),
+        collection_name="sparse_offload",
+        enable_hybrid=True,
+        sparse_doc_fn=encode,
+        sparse_query_fn=encode,
+    )
+    nodes = [TextNode(text=f"chunk {i}", embedding=[1.0, float(i)]) for i in range(3)]
+
+    ids = await vector_store.async_add(nodes)
+
+    assert ids == [node.node_id for node in nodes]
+    assert threads and threading.main_thread() not in threads
+    points, _ = await vector_store._aclient.scroll("sparse_offload", with_vectors=True)
+    assert len(points) == 3
+    assert set(points[0].vector) == {"text-dense", "text-sparse-new"}
+
+
+async def test_sparse_queries_are_encoded_off_the_event_loop():
+    threads = []
+
+    def encode(texts):
+        threads.append(threading.current_thread())
+        return [[0, 1]] * len(texts), [[1.0, 0.5]] * len(texts)
+
+    vector_store = OffloadedQdrantVectorStore(
+        client=QdrantClient(":memory:"),
+        aclient=AsyncQdrantClient(":memory:"),
+        collection_name="sparse_query_offload",
+        enable_hybrid=True,
+        sparse_doc_fn=encode,
+        sparse_query_fn=encode,
+        hybrid_fusion_fn=retrieval.reciprocal_rank_fusion,
+    )
+    await vector_store.async_add([TextNode(text="chunk", embedding=[1.0, 0.0])])
+
+    result = await vector_store.aquery(
+        VectorStoreQuery(
+            query_embedding=[1.0, 0.0],
+            query_str="chunk",
+            similarity_top_k=1,
+            mode=VectorStoreQueryMode.HYBRID,
+        )
+    )
+
+    assert len(result.nodes) == 1
+    assert len(threads) == 2 and threading.main_thread() not in threads
+
+
+def test_prepared_sparse_encoder_encodes_unprepared_texts_in_order():
+    def encode(texts):
+        return [[len(text)] for text in texts], [[1.0] for _ in texts]
+
+    encoder = retrieval.PreparedSparseEncoder(encode)
+    encoder._prepared["bb"] = ([-2], [1.0])
+
+    assert encoder(["a", "bb", "ccc"]) == ([[1], [-2], [3]], [[1.0]] * 3)
+    assert not encoder._prepared
+
+
+def test_fixture_evaluates_in_dense_mode(monkeypatch):
+    monkeypatch.setattr(Settings, "_embed_model", FakeEmbedding(model_name="fake"))
+    with open(FIXTURE) as f:
+        fixture = json.load(f)
+
+    report = evaluate_retrieval(fixture, modes=["dense"], k_values=[1, 5])
+
+    assert set(report["dense"]) == {
+        "recall@1",
+        "recall@5",
+        "latency_p50_ms",
+        "latency_p95_ms",
+    }
+    assert 0 < report["dense"]["recall@1"] <= report["dense"]["recall@5"] <= 1
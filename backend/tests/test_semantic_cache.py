@@ -0,0 +1,169 @@
+import hashlib
+
+import fakeredis
+import numpy as np
+import pytest
+from llama_index.core import Settings
+from llama_index.core.embeddings import BaseEmbedding
+
+from backend.semantic_cache import SemanticCache, best_match, stack_vectors
+
+pytestmark = pytest.mark.anyio
+
+EMBED_DIM = 32
+
+
+class FakeEmbedding(BaseEmbedding):
+    """Hashed bag-of-words vectors."""
+
+    def _vector(self, text):
+        vector = np.zeros(EMBED_DIM)
+        for word in text.split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % EMBED_DIM] += 1
+        return vector.tolist()
+
+    def _get_text_embedding(self, text):
+        return self._vector(text)
+
+    def _get_query_embedding(self, query):
+        return self._vector(query)
+
+    async def _aget_query_embedding(self, query):
+        return self._vector(query)
+
+
+@pytest.fixture(autouse=True)
+def embed_model(monkeypatch):
+    monkeypatch.setattr(Settings, "_embed_model", FakeEmbedding(model_name="fake"))
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(fakeredis.FakeAsyncRedis(), threshold=0.9, enabled=True)
+
+
+def make_compute(response):
+    calls = []
+
+    async def compute():
+        calls.append(response)
+        return response
+
+    return compute, calls
+
+
+def test_best_match_scores_normalized_rows():
+    ids, matrix = stack_vectors(
+        {
+            b"a": np.array([1, 0, 0], dtype=np.float32).tobytes(),
+            b"b": np.array([3, 4, 0], dtype=np.float32).tobytes(),
+        }
+    )
+    assert ids == ["a", "b"]
+    index, similarity = best_match([0, 4, 3], matrix)
+    assert ids[index] == "b"
+    assert similarity == pytest.approx(0.64)
+
+
+def test_best_match_without_usable_rows():
+    _, empty = stack_vectors({})
+    assert best_match([1.0, 0.0], empty) == (None, 0.0)
+    _, matrix = stack_vectors({b"a": np.ones(3, dtype=np.float32).tobytes()})
+    assert best_match([1.0, 0.0], matrix) == (None, 0.0)
+
+
+async def test_similar_query_hits_and_different_query_misses(cache):
+    compute, calls = make_compute("answer")
+    query = "what is retrieval augmented generation"
+
+    assert await cache.get_or_compute("r1", "chat", query, compute) == ("answer", False)
+    assert await cache.get_or_compute(
+        "r1", "chat", "  What is Retrieval augmented generation ", compute
+    ) == ("answer", True)
+    assert calls == ["answer"]
+
+    other, other_calls = make_compute("other")
+    assert await cache.get_or_compute(
+        "r1", "chat", "how do transformers scale", other
+    ) == ("other", False)
+    assert other_calls == ["other"]
+    assert cache.hits == 1 and cache.misses == 2
+
+
+async def test_threshold_decides_hits(cache):
+    compute, _ = make_compute("answer")
+    await cache.get_or_compute("r1", "chat", "alpha beta gamma delta", compute)
+
+    # Cosine similarity of the two bags of words is at most 3/4
+    near = "alpha beta gamma epsilon"
+    assert (await cache.get_or_compute("r1", "chat", near, compute))[1] is False
+
+    cache.threshold = 0.5
+    assert (await cache.get_or_compute("r1", "chat", near, compute))[1] is True
+
+
+async def test_scopes_are_separate(cache):
+    compute, _ = make_compute("answer")
+    await cache.get_or_compute("r1", "chat", "same query", compute)
+
+    assert (await cache.get_or_compute("r2", "chat", "same query", compute))[1] is False
+    assert (
+        await cache.get_or_compute("r1", "suggestions", "same query", compute)
+    )[1] is False
+
+
+async def test_invalidate_drops_responses(cache):
+    compute, calls = make_compute("answer")
+    await cache.get_or_compute("r1", "chat", "same query", compute)
+    await cache.invalidate("r1")
+
+    assert (await cache.get_or_compute("r1", "chat", "same query", compute))[1] is False
+    assert len(calls) == 2
+
+
+async def test_invalidate_does_not_scan_the_keyspace(cache, monkeypatch):
+    def scan_iter(*args, **kwargs):
+        raise AssertionError("invalidate scanned the keyspace")
+
+    monkeypatch.setattr(cache.client, "scan_iter", scan_iter)
+    compute, _ = make_compute("answer")
+    await cache.get_or_compute("r1", "chat", "same query", compute)
+    await cache.invalidate("r1")
+
+    assert cache.stats()["errors"] == 0
+    assert not cache._matrices
+
+
+async def test_matrix_reloads_only_after_scope_changes(cache):
+    compute, _ = make_compute("answer")
+    await cache.get_or_compute("r1", "chat", "first query", compute)
+    assert (await cache.get_or_compute("r1", "chat", "first query", compute))[1]
+    loads = cache.matrix_loads
+
+    for _ in range(3):
+        await cache.get_or_compute("r1", "chat", "first query", compute)
+    assert cache.matrix_loads == loads
+
+    # Another process stores an entry in the same scope
+    other = SemanticCache(cache.client, threshold=0.9, enabled=True)
+    await other.get_or_compute("r1", "chat", "second query", compute)
+    assert (await cache.get_or_compute("r1", "chat", "second query", compute))[1]
+    assert cache.matrix_loads == loads + 1
+
+
+async def test_entries_are_bounded(cache):
+    cache.max_entries = 2
+    for query in ("one", "two", "three"):
+        compute, _ = make_compute(query)
+        await cache.get_or_compute("r1", "chat", query, compute)
+
+    scope_key = await cache._scope_key("r1", "chat")
+    assert await cache.client.hlen(scope_key) == 2
+    assert await cache.client.hlen(f"{scope_key}:vectors") == 2
+
+    compute, calls = make_compute("one again")
+    assert await cache.get_or_compute("r1", "chat", "one", compute) == (
+        "one again",
+        False,
+    )
+    assert (await cache.get_or_compute("r1", "chat", "three", compute))[1] is True
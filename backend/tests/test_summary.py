@@ -0,0 +1,31 @@
+from llama_index.core.schema import TextNode
+
+from backend.summary import document_order
+
+
+def chunk(source: str, page_num: int, start_char_idx: int = 0) -> TextNode:
+    return TextNode(
+        text=source,
+        metadata={"source": source, "page_num": page_num},
+        start_char_idx=start_char_idx,
+    )
+
+
+def test_chunks_sort_by_page_and_block_number():
+    nodes = [
+        chunk("report-page10-block1", 10),
+        chunk("report-page2-block10", 2),
+        chunk("report-page2-block2", 2, start_char_idx=50),
+        chunk("report-page2-block2", 2),
+        chunk("report-page2-table1", 2),
+    ]
+
+    nodes.sort(key=document_order)
+
+    assert [(node.text, node.start_char_idx) for node in nodes] == [
+        ("report-page2-block2", 0),
+        ("report-page2-block2", 50),
+        ("report-page2-block10", 0),
+        ("report-page2-table1", 0),
+        ("report-page10-block1", 0),
+    ]
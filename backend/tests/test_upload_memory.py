@@ -0,0 +1,95 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import fitz
+import numpy as np
+import pytest
+
+SMALL_PAGES = 2
+LARGE_PAGES = 10
+PAGE_PIXELS = 1500
+
+# Runs in a fresh interpreter so ru_maxrss only reflects this upload
+MEASURE_UPLOAD = textwrap.dedent(
+    """
+    import asyncio, resource, shutil, sys, tempfile
+
+    from fastapi import UploadFile
+
+    from backend.processors import process_files
+
+    async def no_page_documents(*args, **kwargs):
+        return []
+
+    process_files.get_page_documents = no_page_documents
+
+    def peak_rss():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    async def main(path):
+        # Starlette hands uploads over as a SpooledTemporaryFile rolled to disk
+        spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, spooled)
+        spooled.seek(0)
+        before = peak_rss()
+        await process_files.process_files(
+            [UploadFile(file=spooled, filename="scan.pdf")], "research", "reference"
+        )
+        print(peak_rss() - before)
+
+    asyncio.run(main(sys.argv[1]))
+    """
+)
+
+
+def scanned_pdf(path, pages: int) -> str:
+    """A PDF of incompressible full-page images, like a large scan."""
+    rng = np.random.default_rng(0)
+    document = fitz.open()
+    for _ in range(pages):
+        pixels = rng.integers(0, 255, (PAGE_PIXELS, PAGE_PIXELS, 3), dtype=np.uint8)
+        pixmap = fitz.Pixmap(
+            fitz.csRGB, PAGE_PIXELS, PAGE_PIXELS, pixels.tobytes(), False
+        )
+        page = document.new_page()
+        page.insert_image(page.rect, pixmap=pixmap)
+    document.save(str(path))
+    return str(path)
+
+
+def upload_peak_growth(pdf_path: str, workspace_root: str) -> int:
+    """Growth of peak RSS while ingesting the PDF in a fresh process, in bytes."""
+    env = {
+        **os.environ,
+        "NVIDIA_API_KEY": "test",
+        "WORKSPACE_ROOT": workspace_root,
+        "CPU_WORKERS": "2",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_UPLOAD, pdf_path],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert result.returncode == 0, result.stderr
+    return int(result.stdout.strip().splitlines()[-1])
+
+
+def test_pdf_upload_peak_rss_does_not_scale_with_file_size(tmp_path):
+    small = scanned_pdf(tmp_path / "small.pdf", SMALL_PAGES)
+    large = scanned_pdf(tmp_path / "large.pdf", LARGE_PAGES)
+    extra_bytes = os.path.getsize(large) - os.path.getsize(small)
+
+    small_growth = upload_peak_growth(small, str(tmp_path / "workspaces"))
+    large_growth = upload_peak_growth(large, str(tmp_path / "workspaces"))
+
+    # Any in-memory copy of the upload would add at least extra_bytes
+    assert large_growth - small_growth < extra_bytes / 4, (
+        f"peak RSS grew {small_growth} bytes for the small upload and "
+        f"{large_growth} bytes for one {extra_bytes} bytes larger"
+    )
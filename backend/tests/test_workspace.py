@@ -0,0 +1,54 @@
+import os
+import shutil
+
+import pytest
+
+from backend.processors import process_files
+from backend.workspace import Workspace
+
+from .test_pdf_ingestion import InlineExecutor, text_pdf
+
+pytestmark = pytest.mark.anyio
+
+
+def test_on_error_keeps_workspace_marked_failed():
+    with Workspace(retention="on_error") as workspace:
+        workspace.mark_failed()
+    assert os.path.isdir(workspace.path)
+    shutil.rmtree(workspace.path)
+
+    with Workspace(retention="on_error") as clean:
+        pass
+    assert not os.path.exists(clean.path)
+
+
+async def test_failed_page_marks_workspace_failed(tmp_path, monkeypatch):
+    workspaces = []
+
+    def on_error_workspace():
+        workspace = Workspace(retention="on_error")
+        workspaces.append(workspace)
+        return workspace
+
+    async def page_documents(page_data, *args):
+        if page_data["pagenum"] == 1:
+            raise RuntimeError("vision call failed")
+        return []
+
+    async def noop(**counts):
+        pass
+
+    monkeypatch.setattr(process_files, "Workspace", on_error_workspace)
+    monkeypatch.setattr(process_files, "cpu_executor", InlineExecutor())
+    monkeypatch.setattr(process_files, "report_progress", noop)
+    monkeypatch.setattr(process_files, "get_page_documents", page_documents)
+
+    with open(text_pdf(tmp_path / "doc.pdf", 2), "rb") as f:
+        await process_files.process_files(
+            [process_files.UploadFile(file=f, filename="doc.pdf")], "r", "ref"
+        )
+
+    (workspace,) = workspaces
+    assert workspace.failed
+    assert os.path.isdir(workspace.path)
+    shutil.rmtree(workspace.path)
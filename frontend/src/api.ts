@@ -2,6 +2,7 @@ import { API_BASE_URL } from "./config";
 import {
   ChatMessage,
   ChatResponse,
+  Job,
   Note,
   PaginatedResearch,
   Research,
@@ -60,14 +61,42 @@ class ApiClient {
     return this.fetch<Research>(`/research/${id}`);
   }
 
-  async addLinkSource(researchId: string, url: string): Promise<Source> {
-    const data = await this.fetch<{ reference_id: string }>(
+  async getJob(jobId: string) {
+    return this.fetch<Job>(`/jobs/${jobId}`);
+  }
+
+  // Poll an ingestion job until it finishes, throwing if it failed
+  async waitForJob(
+    jobId: string,
+    onProgress?: (job: Job) => void,
+    intervalMs: number = 1000
+  ): Promise<Job> {
+    for (;;) {
+      const job = await this.getJob(jobId);
+      onProgress?.(job);
+      if (job.status === "completed") {
+        return job;
+      }
+      if (job.status === "failed" || job.status === "cancelled") {
+        throw new Error(job.error || `Ingestion job ${job.status}`);
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  }
+
+  async addLinkSource(
+    researchId: string,
+    url: string,
+    onProgress?: (job: Job) => void
+  ): Promise<Source> {
+    const data = await this.fetch<{ reference_id: string; job_id: string }>(
       `/research/${researchId}/sources/link`,
       {
         method: "POST",
         body: JSON.stringify({ url }),
       }
     );
+    await this.waitForJob(data.job_id, onProgress);
     return {
       reference_id: data.reference_id,
       type: "link" as const,
@@ -76,7 +105,11 @@ class ApiClient {
     };
   }
 
-  async addFileSource(researchId: string, files: File[]): Promise<Source[]> {
+  async addFileSource(
+    researchId: string,
+    files: File[],
+    onProgress?: (job: Job) => void
+  ): Promise<Source[]> {
     const formData = new FormData();
     files.forEach((file) => {
       formData.append("files", file);
@@ -84,11 +117,26 @@ class ApiClient {
 
     const response = await this.fetch<{
       files: { reference_id: string; filename: string; research_id: string }[];
+      job_id: string;
     }>(`/research/${researchId}/sources/files`, {
       method: "POST",
       body: formData,
     });
 
+    const job = await this.waitForJob(response.job_id, onProgress);
+    const results = job.result?.files ?? [];
+    const errors = results
+      .filter((file) => file.status === "failed")
+      .map((file) => `${file.filename}: ${file.error}`);
+    if (job.pages_failed > 0) {
+      errors.push(
+        `${job.pages_failed} page(s) could not be processed, the rest was added`
+      );
+    }
+    if (errors.length > 0) {
+      throw new Error(errors.join("\n"));
+    }
+
     return response.files.map((file) => ({
       reference_id: file.reference_id,
       type: "file" as const,
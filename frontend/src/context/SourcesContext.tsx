@@ -1,14 +1,22 @@
 import { createContext, useCallback, useContext, useState } from "react";
 import { api } from "../api";
-import { Source } from "../types";
+import { Job, Source } from "../types";
 
 interface SourcesContextType {
   sources: Source[];
   loading: boolean;
   error: string | null;
   fetchSources: (researchId: string) => Promise<void>;
-  addLinkSource: (researchId: string, url: string) => Promise<Source>;
-  addFileSource: (researchId: string, files: File[]) => Promise<Source[]>;
+  addLinkSource: (
+    researchId: string,
+    url: string,
+    onProgress?: (job: Job) => void
+  ) => Promise<Source>;
+  addFileSource: (
+    researchId: string,
+    files: File[],
+    onProgress?: (job: Job) => void
+  ) => Promise<Source[]>;
   deleteSource: (researchId: string, sourceId: string) => Promise<void>;
 }
 
@@ -35,13 +43,24 @@ export const SourcesProvider: React.FC<{ children: React.ReactNode }> = ({
     }
   }, []);
 
-  const addLinkSource = useCallback(async (researchId: string, url: string) => {
-    return api.addLinkSource(researchId, url);
-  }, []);
+  const addLinkSource = useCallback(
+    async (
+      researchId: string,
+      url: string,
+      onProgress?: (job: Job) => void
+    ) => {
+      return api.addLinkSource(researchId, url, onProgress);
+    },
+    []
+  );
 
   const addFileSource = useCallback(
-    async (researchId: string, files: File[]) => {
-      return api.addFileSource(researchId, files);
+    async (
+      researchId: string,
+      files: File[],
+      onProgress?: (job: Job) => void
+    ) => {
+      return api.addFileSource(researchId, files, onProgress);
     },
     []
   );
@@ -2,6 +2,7 @@ import { useState } from "react";
 import { FaFolder, FaLink, FaTimes } from "react-icons/fa";
 import { useParams } from "react-router-dom";
 import { useSources } from "../../../context/SourcesContext";
+import { Job } from "../../../types";
 import { FileUploadForm } from "./FileUploadForm";
 import { SourceLinkForm } from "./SourceLinkForm";
 import { SourceTypeButton } from "./SourceTypeButton";
@@ -25,6 +26,7 @@ export const AddSourceModal: React.FC<AddSourceModalProps> = ({
   const [isDragging, setIsDragging] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [isSubmitting, setIsSubmitting] = useState(false);
+  const [progress, setProgress] = useState<Job | null>(null);
 
   const handleSourceTypeChange = (type: "link" | "file") => {
     setSourceType(type);
@@ -46,7 +48,7 @@ export const AddSourceModal: React.FC<AddSourceModalProps> = ({
     try {
       setIsSubmitting(true);
       if (sourceType === "link" && url) {
-        await addLinkSource(researchId, url);
+        await addLinkSource(researchId, url, setProgress);
         setUrl("");
       } else if (sourceType === "file" && files.length > 0) {
         // Make sure files exist before trying to upload
@@ -54,13 +56,15 @@ export const AddSourceModal: React.FC<AddSourceModalProps> = ({
           throw new Error("No files selected");
         }
 
-        await addFileSource(researchId, files);
+        await addFileSource(researchId, files, setProgress);
         setFiles([]);
       }
       onSourceAdded?.();
       onClose();
     } catch (error) {
       console.error("Error adding source:", error);
+      // Other files of a partly failed upload were still added
+      onSourceAdded?.();
       setError(
         error instanceof Error
           ? error.message
@@ -68,6 +72,7 @@ export const AddSourceModal: React.FC<AddSourceModalProps> = ({
       );
     } finally {
       setIsSubmitting(false);
+      setProgress(null);
     }
   };
 
@@ -124,7 +129,7 @@ export const AddSourceModal: React.FC<AddSourceModalProps> = ({
         <form onSubmit={handleSubmit} className="modal-body">
           {error && (
             <div className="p-3 text-sm text-red-300 bg-red-800/20 rounded-lg flex justify-between items-center">
-              <span>{error}</span>
+              <span className="whitespace-pre-line">{error}</span>
               <button
                 type="button"
                 onClick={clearError}
@@ -179,7 +184,15 @@ export const AddSourceModal: React.FC<AddSourceModalProps> = ({
               className="btn btn-primary"
               disabled={isSubmitting}
             >
-              {isSubmitting ? "Adding..." : "Add"}
+              {!isSubmitting
+                ? "Add"
+                : progress?.status === "running"
+                ? `Processing... (${progress.pages_processed} pages${
+                    progress.pages_failed
+                      ? `, ${progress.pages_failed} failed`
+                      : ""
+                  })`
+                : "Adding..."}
             </button>
           </div>
         </form>
@@ -8,6 +8,37 @@ export interface Source {
   research_id: string;
 }
 
+export type JobStatus =
+  | "queued"
+  | "running"
+  | "completed"
+  | "failed"
+  | "cancelled";
+
+export interface SourceResult {
+  reference_id: string;
+  research_id: string;
+  filename?: string;
+  url?: string;
+  status: JobStatus;
+  error?: string | null;
+}
+
+export interface Job {
+  id: string;
+  type: string;
+  research_id: string;
+  status: JobStatus;
+  pages_processed: number;
+  pages_failed: number;
+  documents_embedded: number;
+  sources_summarized: number;
+  created_at: string;
+  updated_at: string;
+  result?: { files?: SourceResult[]; links?: SourceResult[] } | null;
+  error?: string | null;
+}
+
 export interface Research {
   id: string;
   title: string;